@@ -0,0 +1,164 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .image_preprocessing import PreparedImage, PreprocessOptions, encode_data_url, preprocess_image
+
+DEFAULT_MAX_BYTES = int(float(os.getenv("APERITIF_ASSET_CACHE_MB", "64")) * 1024 * 1024)
+
+
+@dataclass
+class EncodedAsset:
+    """A ready-to-send image_url payload and, if pre-processed, its size accounting"""
+
+    image_url: Dict[str, str]
+    prepared: Optional[PreparedImage] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.image_url["url"])
+
+
+class EncodedAssetCache:
+    """
+    Size-bounded LRU of encoded images, so a file is read and base64'd once per process.
+
+    Entries are keyed by the file's content hash plus the pre-processing
+    options and focus point. The hash is only recomputed when the file's
+    path, mtime or size changes, so a hit costs one ``os.stat``.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            max_bytes: Upper bound on the total length of cached data URLs
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, EncodedAsset]" = OrderedDict()
+        self._digests: Dict[str, Tuple[int, int, str]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _digest(self, path: str) -> Tuple[str, Optional[bytes]]:
+        """Content hash of ``path``, plus the file bytes when they had to be read"""
+        path = os.path.realpath(path)
+        st = os.stat(path)
+        with self._lock:
+            known = self._digests.get(path)
+        if known is not None and known[:2] == (st.st_mtime_ns, st.st_size):
+            return known[2], None
+
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._digests[path] = (st.st_mtime_ns, st.st_size, digest)
+        return digest, data
+
+    def get(
+        self,
+        path: str,
+        options: Optional[PreprocessOptions] = None,
+        focus: Optional[Tuple[float, float]] = None,
+    ) -> EncodedAsset:
+        """
+        Return the encoded image for ``path``, encoding it on a miss
+
+        Args:
+            path: Image file
+            options: Pre-processing settings, or None to send the file as-is
+            focus: Pixel the pre-processing crop is centered on
+        """
+        digest, data = self._digest(path)
+
+        def load() -> bytes:
+            if data is not None:
+                return data
+            with open(path, "rb") as f:
+                return f.read()
+
+        return self._get(digest, load, options, focus)
+
+    def get_data(
+        self,
+        data: bytes,
+        options: Optional[PreprocessOptions] = None,
+        focus: Optional[Tuple[float, float]] = None,
+    ) -> EncodedAsset:
+        """Same as ``get`` for an image that is already in memory"""
+        return self._get(hashlib.sha256(data).hexdigest(), lambda: data, options, focus)
+
+    def _get(
+        self,
+        digest: str,
+        load: Callable[[], bytes],
+        options: Optional[PreprocessOptions],
+        focus: Optional[Tuple[float, float]],
+    ) -> EncodedAsset:
+        if focus is not None:
+            focus = (round(focus[0]), round(focus[1]))
+        key = (digest, repr(options), focus)
+
+        with self._lock:
+            asset = self._entries.get(key)
+            if asset is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return asset
+            self.misses += 1
+
+        data = load()
+        if options is None:
+            asset = EncodedAsset({"url": encode_data_url(data)})
+        else:
+            prepared = preprocess_image(data, options, focus=focus)
+            asset = EncodedAsset({"url": prepared.data_url, "detail": prepared.detail}, prepared)
+
+        with self._lock:
+            if key not in self._entries and asset.size <= self.max_bytes:
+                self._entries[key] = asset
+                self._bytes += asset.size
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= evicted.size
+                    self.evictions += 1
+        return asset
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+            self._bytes = 0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_asset_cache: Optional[EncodedAssetCache] = None
+_asset_cache_lock = threading.Lock()
+
+
+def get_asset_cache() -> EncodedAssetCache:
+    """Return the process-wide encoded asset cache"""
+    global _asset_cache
+    with _asset_cache_lock:
+        if _asset_cache is None:
+            _asset_cache = EncodedAssetCache()
+        return _asset_cache
@@ -0,0 +1,304 @@
+"""
+Batch neighborhood classification for CSV files of addresses
+
+    python main.py --batch addresses.csv --output results.jsonl
+
+Addresses stream through geocode -> capture -> classify stages connected by
+bounded queues, each with its own worker count, and every result is written
+to the JSONL output as soon as it is ready. Memory use stays flat no matter
+how large the input is.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, Optional, TextIO, Tuple
+
+from .geocoding import GeocodingError, get_geocoder
+
+# Sentinel telling a stage's workers that no more items will arrive
+_DONE = object()
+
+
+def read_addresses(path: str, column: str = "address") -> Iterator[Tuple[int, str]]:
+    """
+    Lazily yield ``(row_number, address)`` pairs from a CSV file
+
+    Uses the ``column`` header if present, otherwise the first column.
+    """
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        if column in header:
+            index = header.index(column)
+        else:
+            # No matching header: treat the first row as data
+            index = 0
+            if header and header[0].strip():
+                yield 1, header[0].strip()
+        for row_number, row in enumerate(reader, start=2):
+            if len(row) > index and row[index].strip():
+                yield row_number, row[index].strip()
+
+
+def count_addresses(path: str, column: str = "address") -> int:
+    """Count addresses without holding them in memory (used for the ETA)"""
+    return sum(1 for _ in read_addresses(path, column))
+
+
+class Progress:
+    """Throughput and ETA reporting on stderr"""
+
+    def __init__(self, total: int, stream: TextIO = sys.stderr, interval: float = 1.0):
+        self.total = total
+        self.stream = stream
+        self.interval = interval
+        self.done = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+        self._last_report = 0.0
+
+    def update(self, success: bool):
+        self.done += 1
+        if not success:
+            self.failed += 1
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval or self.done == self.total:
+            self._last_report = now
+            self.report()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = max(0, self.total - self.done)
+        eta = f"{remaining / rate:.0f}s" if rate > 0 else "?"
+        print(
+            f"\r{self.done}/{self.total} done ({self.failed} failed) | {rate:.2f} addr/s | ETA {eta}   ",
+            end="",
+            file=self.stream,
+            flush=True,
+        )
+
+
+class BatchClassifier:
+    """
+    Streams addresses through geocode -> capture -> classify with bounded concurrency.
+
+    Reuses the cached geocoder, the shared browser pool and reference map
+    cache, and ``VisionAgent`` (or the local pixel classifier) directly,
+    without going through the conversational LLM.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        classifier: str = "vision",
+        geocode_workers: int = 8,
+        capture_workers: int = 2,
+        classify_workers: int = 4,
+        queue_size: int = 16,
+        use_openai: bool = True,
+        preprocess: bool = False,
+    ):
+        """
+        Args:
+            api_key: Google Maps API key for geocoding and pin maps
+            classifier: "vision" (pin map + VisionAgent), "local" (pixel lookup, no pin map)
+                or "cascade" (pin map + CascadeClassifier: local, then Phi-4, then OpenAI)
+            geocode_workers: Concurrent geocoding requests
+            capture_workers: Concurrent browser captures
+            classify_workers: Concurrent classification calls
+            queue_size: Capacity of each inter-stage queue
+            use_openai: Vision backend passed to VisionAgent
+            preprocess: Crop/downscale/re-encode images around the address before vision calls
+        """
+        if classifier not in ("vision", "local", "cascade"):
+            raise ValueError(f"Unknown classifier: {classifier}")
+        self.api_key = api_key
+        self.classifier = classifier
+        self.workers = {"geocode": geocode_workers, "capture": capture_workers, "classify": classify_workers}
+        self.queue_size = queue_size
+        self.use_openai = use_openai
+        self.preprocess = preprocess
+        self.geocoder = get_geocoder(api_key)
+        self._vision_agent = None
+        self._local_classifier = None
+        self._reference_png: Optional[bytes] = None
+        self._reference_transform = None
+
+    def _prepare(self):
+        """Capture (or load) the reference map and build the classifier once"""
+        from .map_capture import hoodmaps_reference
+
+        reference = hoodmaps_reference()
+        self._reference_png = reference.data
+        if self.classifier == "local":
+            from .local_classifier import LocalNeighborhoodClassifier
+
+            self._local_classifier = LocalNeighborhoodClassifier(reference.data)
+        else:
+            from .image_preprocessing import PreprocessOptions
+            from .local_classifier import HOODMAPS_SF_VIEW, GeoTransform
+
+            preprocess = PreprocessOptions() if self.preprocess else None
+            self._reference_transform = GeoTransform.from_view(**HOODMAPS_SF_VIEW)
+            if self.classifier == "cascade":
+                from .cascade import CascadeClassifier, default_tiers
+
+                self._vision_agent = CascadeClassifier(default_tiers(preprocess=preprocess))
+            else:
+                from .vision_agent import VisionAgent
+
+                self._vision_agent = VisionAgent(use_openai=self.use_openai, preprocess=preprocess)
+
+    # ------------------------------------------------------------------
+    # Stage work (blocking calls run in threads)
+    # ------------------------------------------------------------------
+
+    def _geocode(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        item["lat"], item["lng"] = self.geocoder.geocode(item["address"])
+        return item
+
+    def _capture(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        if self.classifier != "local":
+            from .map_capture import capture_pin_map
+
+            item["pin_png"] = capture_pin_map(item["lat"], item["lng"], self.api_key)
+        return item
+
+    def _classify(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        if self.classifier == "local":
+            return self._local_classifier.classify_point(item["lat"], item["lng"])
+
+        legend_focus = self._reference_transform.to_pixel(item["lat"], item["lng"])
+        return self._vision_agent.analyze_images(self._reference_png, item.pop("pin_png"), legend_focus)
+
+    # ------------------------------------------------------------------
+    # Pipeline
+    # ------------------------------------------------------------------
+
+    async def _stage(self, name: str, work, inbox: asyncio.Queue, outbox: asyncio.Queue, results: asyncio.Queue):
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                await inbox.put(_DONE)  # let sibling workers see it too
+                return
+            started = time.perf_counter()
+            try:
+                output = await asyncio.to_thread(work, item)
+            except Exception as e:
+                error = e.status if isinstance(e, GeocodingError) else str(e)
+                await results.put({**_summary(item), "success": False, "stage": name, "error": error})
+                continue
+            item.setdefault("timings", {})[name] = round((time.perf_counter() - started) * 1000, 1)
+            if name == "classify":
+                await results.put({**_summary(item), **output, "timings": item["timings"]})
+            else:
+                await outbox.put(output)
+
+    async def _run_stage(self, name: str, work, inbox, outbox, results):
+        await asyncio.gather(*(self._stage(name, work, inbox, outbox, results) for _ in range(self.workers[name])))
+        if outbox is not None:
+            await outbox.put(_DONE)
+
+    async def run(self, addresses: Iterator[Tuple[int, str]], output: TextIO, progress: Optional[Progress] = None):
+        """
+        Classify every address, writing one JSON line per address as it completes
+
+        Args:
+            addresses: ``(row_number, address)`` pairs
+            output: Text stream receiving JSONL results
+            progress: Optional progress reporter
+        """
+        await asyncio.to_thread(self._prepare)
+        if progress is not None:
+            progress.started = time.perf_counter()
+
+        geocode_q: asyncio.Queue = asyncio.Queue(self.queue_size)
+        capture_q: asyncio.Queue = asyncio.Queue(self.queue_size)
+        classify_q: asyncio.Queue = asyncio.Queue(self.queue_size)
+        results: asyncio.Queue = asyncio.Queue(self.queue_size)
+
+        async def feed():
+            for row, address in addresses:
+                await geocode_q.put({"row": row, "address": address})
+            await geocode_q.put(_DONE)
+
+        async def stages():
+            await asyncio.gather(
+                feed(),
+                self._run_stage("geocode", self._geocode, geocode_q, capture_q, results),
+                self._run_stage("capture", self._capture, capture_q, classify_q, results),
+                self._run_stage("classify", self._classify, classify_q, None, results),
+            )
+            await results.put(_DONE)
+
+        pipeline = asyncio.create_task(stages())
+        while True:
+            result = await results.get()
+            if result is _DONE:
+                break
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+            if progress is not None:
+                progress.update(result.get("success", False))
+        await pipeline
+
+
+def _summary(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: item[key] for key in ("row", "address", "lat", "lng") if key in item}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify a CSV of San Francisco addresses")
+    parser.add_argument("input", help="CSV file with an address column")
+    parser.add_argument("--output", "-o", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("--column", default="address", help="Name of the address column")
+    parser.add_argument("--classifier", choices=["vision", "local", "cascade"], default="vision")
+    parser.add_argument("--phi", action="store_true", help="Use the Phi-4 endpoint instead of OpenAI for vision")
+    parser.add_argument("--geocode-workers", type=int, default=8)
+    parser.add_argument("--capture-workers", type=int, default=2)
+    parser.add_argument("--classify-workers", type=int, default=4)
+    parser.add_argument("--preprocess", action="store_true", help="Shrink images around the address before vision calls")
+    args = parser.parse_args(argv)
+
+    api_key = os.getenv("GOOGLE_MAP_API_KEY")
+    if not api_key:
+        print("GOOGLE_MAP_API_KEY not set in environment.", file=sys.stderr)
+        sys.exit(1)
+
+    batch = BatchClassifier(
+        api_key,
+        classifier=args.classifier,
+        geocode_workers=args.geocode_workers,
+        capture_workers=args.capture_workers,
+        classify_workers=args.classify_workers,
+        use_openai=not args.phi,
+        preprocess=args.preprocess,
+    )
+    progress = Progress(count_addresses(args.input, args.column))
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        asyncio.run(batch.run(read_addresses(args.input, args.column), output, progress))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        print(file=sys.stderr)
+        print(f"Geocoding cache: {batch.geocoder.stats}", file=sys.stderr)
+        if args.classifier != "local":
+            from .asset_cache import get_asset_cache
+
+            print(f"Encoded asset cache: {get_asset_cache().stats}", file=sys.stderr)
+        from .http_clients import get_http_clients
+
+        print(f"HTTP connections: {get_http_clients().stats}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
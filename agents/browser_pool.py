@@ -0,0 +1,260 @@
+import asyncio
+import atexit
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, List, Optional, TypeVar
+
+from playwright.async_api import Browser, BrowserContext, Error as PlaywrightError, Page, async_playwright
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = int(os.environ.get("APERITIF_BROWSER_POOL_SIZE", "2"))
+DEFAULT_MAX_CONTEXT_USES = int(os.environ.get("APERITIF_BROWSER_MAX_CONTEXT_USES", "50"))
+
+
+class _ContextSlot:
+    """One pooled browser context and the browser it lives in"""
+
+    def __init__(self, browser_index: int):
+        self.browser_index = browser_index
+        self.context: Optional[BrowserContext] = None
+        self.uses = 0
+
+
+class BrowserPool:
+    """
+    Long-lived pool of warm Chromium browsers and isolated browser contexts.
+
+    The pool owns a private event loop running in a daemon thread so that the
+    synchronous tools can share one Playwright instance instead of paying for
+    ``asyncio.run()`` + ``chromium.launch()`` on every capture. Each capture gets
+    its own page inside a pooled context; contexts are recycled after
+    ``max_context_uses`` captures or as soon as a page crashes.
+    """
+
+    def __init__(
+        self,
+        size: int = DEFAULT_POOL_SIZE,
+        browsers: int = 1,
+        max_context_uses: int = DEFAULT_MAX_CONTEXT_USES,
+        headless: bool = True,
+        context_options: Optional[dict] = None,
+        context_setup: Optional[Callable[[BrowserContext], Awaitable[None]]] = None,
+    ):
+        """
+        Initialize the browser pool (nothing is launched until first use)
+
+        Args:
+            size: Maximum number of contexts (and therefore concurrent pages)
+            browsers: Number of Chromium processes the contexts are spread over
+            max_context_uses: Captures served by a context before it is recycled
+            headless: Launch Chromium headless
+            context_options: Extra keyword arguments for ``browser.new_context``
+            context_setup: Coroutine function awaited with every new context, e.g. to install routes
+        """
+        if size < 1:
+            raise ValueError("Browser pool size must be at least 1")
+
+        self.size = size
+        self.browser_count = max(1, min(browsers, size))
+        self.max_context_uses = max_context_uses
+        self.headless = headless
+        self.context_options = context_options or {}
+        self.context_setup = context_setup
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._playwright = None
+        self._browsers: List[Optional[Browser]] = []
+        self._browser_lock: Optional[asyncio.Lock] = None
+        self._slots: Optional[asyncio.Queue] = None
+        self._closed = False
+
+        self.stats = {"captures": 0, "contexts_created": 0, "contexts_recycled": 0, "crashes": 0}
+
+    # ------------------------------------------------------------------
+    # Event loop management
+    # ------------------------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._closed:
+                raise RuntimeError("Browser pool has been shut down")
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="aperitif-browser-pool", daemon=True
+                )
+                self._thread.start()
+                asyncio.run_coroutine_threadsafe(self._setup(), self._loop).result()
+                atexit.register(self.shutdown)
+        return self._loop
+
+    async def _setup(self):
+        self._browser_lock = asyncio.Lock()
+        self._slots = asyncio.Queue()
+        self._browsers = [None] * self.browser_count
+        for i in range(self.size):
+            self._slots.put_nowait(_ContextSlot(i % self.browser_count))
+        self._playwright = await async_playwright().start()
+
+    async def _get_browser(self, index: int) -> Browser:
+        async with self._browser_lock:
+            browser = self._browsers[index]
+            if browser is None or not browser.is_connected():
+                if browser is not None:
+                    logger.warning("Chromium instance %d disconnected, relaunching", index)
+                browser = await self._playwright.chromium.launch(headless=self.headless)
+                self._browsers[index] = browser
+            return browser
+
+    async def _close_context(self, slot: _ContextSlot):
+        if slot.context is not None:
+            try:
+                await slot.context.close()
+            except PlaywrightError:
+                pass
+        slot.context = None
+        slot.uses = 0
+
+    # ------------------------------------------------------------------
+    # Page hand-out
+    # ------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def page(self):
+        """
+        Borrow a fresh page from a pooled context (must run on the pool loop)
+
+        Yields:
+            A Playwright ``Page``; it is closed when the block exits
+        """
+        slot: _ContextSlot = await self._slots.get()
+        crashed: List[bool] = []
+        try:
+            try:
+                browser = await self._get_browser(slot.browser_index)
+                if slot.context is not None and (
+                    slot.uses >= self.max_context_uses or slot.context.browser is not browser
+                ):
+                    await self._close_context(slot)
+                    self.stats["contexts_recycled"] += 1
+                if slot.context is None:
+                    slot.context = await browser.new_context(**self.context_options)
+                    if self.context_setup is not None:
+                        await self.context_setup(slot.context)
+                    self.stats["contexts_created"] += 1
+                page: Page = await slot.context.new_page()
+            except PlaywrightError:
+                # A context that cannot open pages is unusable; rebuild it next time
+                self.stats["crashes"] += 1
+                await self._close_context(slot)
+                raise
+
+            page.on("crash", lambda _: crashed.append(True))
+            slot.uses += 1
+            self.stats["captures"] += 1
+
+            try:
+                yield page
+            except PlaywrightError:
+                crashed.append(True)
+                raise
+            finally:
+                if crashed:
+                    self.stats["crashes"] += 1
+                    await self._close_context(slot)
+                elif not page.is_closed():
+                    try:
+                        await page.close()
+                    except PlaywrightError:
+                        await self._close_context(slot)
+        finally:
+            self._slots.put_nowait(slot)
+
+    async def _run_on_page(self, capture: Callable[[Page], Awaitable[T]]) -> T:
+        async with self.page() as page:
+            return await capture(page)
+
+    def run(self, capture: Callable[[Page], Awaitable[T]], timeout: Optional[float] = None) -> T:
+        """
+        Run ``capture(page)`` on a pooled page from synchronous code
+
+        Args:
+            capture: Coroutine function receiving the borrowed page
+            timeout: Seconds to wait for the result (None waits forever)
+
+        Returns:
+            Whatever ``capture`` returns
+        """
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._run_on_page(capture), loop).result(timeout)
+
+    async def run_async(self, capture: Callable[[Page], Awaitable[T]]) -> T:
+        """Awaitable variant of ``run`` for callers living on another event loop"""
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._run_on_page(capture), loop)
+        return await asyncio.wrap_future(future)
+
+    # ------------------------------------------------------------------
+    # Shutdown
+    # ------------------------------------------------------------------
+
+    async def _teardown(self):
+        while not self._slots.empty():
+            await self._close_context(self._slots.get_nowait())
+        for browser in self._browsers:
+            if browser is not None:
+                try:
+                    await browser.close()
+                except PlaywrightError:
+                    pass
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+    def shutdown(self, timeout: float = 10.0):
+        """Close every context and browser and stop the pool thread"""
+        with self._start_lock:
+            if self._closed:
+                return
+            self._closed = True
+            loop = self._loop
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._teardown(), loop).result(timeout)
+        except Exception as e:
+            logger.warning("Browser pool shutdown incomplete: %s", e)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            if self._thread is not None:
+                self._thread.join(timeout)
+            atexit.unregister(self.shutdown)
+            logger.info("Browser pool shut down: %s", self.stats)
+
+
+_default_pool: Optional[BrowserPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_browser_pool(
+    size: Optional[int] = None,
+    context_setup: Optional[Callable[[BrowserContext], Awaitable[None]]] = None,
+) -> BrowserPool:
+    """
+    Return the process-wide browser pool, creating it on first call
+
+    Args:
+        size: Pool size for the first call (defaults to APERITIF_BROWSER_POOL_SIZE)
+        context_setup: Per-context setup hook for the first call (see ``BrowserPool``)
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None or _default_pool._closed:
+            _default_pool = BrowserPool(size=size or DEFAULT_POOL_SIZE, context_setup=context_setup)
+        return _default_pool
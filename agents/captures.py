@@ -0,0 +1,88 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional
+
+ARTIFACT_DIR_ENV = "APERITIF_ARTIFACT_DIR"
+CAPTURE_SCHEME = "capture://"
+
+
+def save_artifact(data: bytes, kind: str, suffix: str = ".png") -> Optional[str]:
+    """
+    Write a capture to the artifact directory, if one is configured
+
+    Files are named ``<kind>-<timestamp>-<random>`` so concurrent requests never
+    overwrite each other.
+
+    Returns:
+        The written path, or None when ``APERITIF_ARTIFACT_DIR`` is not set
+    """
+    artifact_dir = os.environ.get(ARTIFACT_DIR_ENV)
+    if not artifact_dir:
+        return None
+    os.makedirs(artifact_dir, exist_ok=True)
+    path = os.path.join(artifact_dir, f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}{suffix}")
+    with open(path, "wb") as f:
+        f.write(data)
+    logging.info(f"Saved {kind} capture to {path}")
+    return path
+
+
+class CaptureStore:
+    """
+    In-process store of recent screenshots, referenced by ``capture://`` handles.
+
+    Tools hand the handle to the LLM instead of a file path; the bytes stay in
+    memory until they are passed on to ``VisionAgent.analyze_images``.
+    """
+
+    def __init__(self, max_items: int = 64):
+        """
+        Args:
+            max_items: Number of captures kept before the oldest are dropped
+        """
+        self.max_items = max_items
+        self._captures: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, data: bytes, kind: str) -> Dict[str, Optional[str]]:
+        """
+        Keep a capture and return ``{"handle": ..., "artifact_path": ...}``
+
+        ``artifact_path`` is only set when an artifact directory is configured.
+        """
+        handle = f"{CAPTURE_SCHEME}{kind}/{uuid.uuid4().hex}"
+        with self._lock:
+            self._captures[handle] = data
+            while len(self._captures) > self.max_items:
+                self._captures.popitem(last=False)
+        return {"handle": handle, "artifact_path": save_artifact(data, kind)}
+
+    def get(self, ref: str) -> bytes:
+        """
+        Return the bytes of a ``capture://`` handle, or read ``ref`` as a file path
+
+        Raises:
+            KeyError: The handle is unknown or has been evicted
+        """
+        if not ref.startswith(CAPTURE_SCHEME):
+            with open(ref, "rb") as f:
+                return f.read()
+        with self._lock:
+            return self._captures[ref]
+
+
+_capture_store: Optional[CaptureStore] = None
+_capture_store_lock = threading.Lock()
+
+
+def get_capture_store() -> CaptureStore:
+    """Return the process-wide capture store"""
+    global _capture_store
+    with _capture_store_lock:
+        if _capture_store is None:
+            _capture_store = CaptureStore()
+        return _capture_store
@@ -0,0 +1,273 @@
+"""
+Confidence-based model cascade
+
+    from agents.cascade import CascadeClassifier
+    result = CascadeClassifier().analyze_images(reference_png, pin_png, legend_focus)
+    result["tier"], result["tier_timings"]    # e.g. "phi4", {"local": 1.2, "phi4": 2150.3}
+
+Tiers run cheapest first: the local pixel lookup (needs ``legend_focus``),
+then Phi-4, then the stronger OpenAI model. A tier's answer is accepted when
+its confidence reaches the tier's threshold and it agrees with every earlier
+tier that answered; otherwise the request escalates. The last tier always
+answers, unless it fails, in which case the most confident earlier answer is
+returned.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .tracing import estimate_cost, span
+
+CASCADE_MODEL = os.environ.get("APERITIF_CASCADE_MODEL", "gpt-4o")
+# Local confidence is the share of the predominant zone around the point
+LOCAL_MIN_CONFIDENCE = float(os.environ.get("APERITIF_CASCADE_LOCAL_CONFIDENCE", "0.6"))
+# Vision confidence is CONFIDENCE_LEVELS[high/medium/low], so 0.9 means "high"
+PHI4_MIN_CONFIDENCE = float(os.environ.get("APERITIF_CASCADE_PHI4_CONFIDENCE", "0.9"))
+
+# (legend map, pin map, legend_focus, bypass_cache=...) -> result dict, or None when the tier does not apply
+TierFunction = Callable[..., Optional[Dict[str, Any]]]
+
+
+@dataclass
+class CascadeTier:
+    """One backend of the cascade; its answers count from ``min_confidence`` up"""
+
+    name: str
+    classify: TierFunction
+    min_confidence: float = 0.0
+
+
+class LocalTier:
+    """Pixel lookup on the legend map around ``legend_focus``; skipped without a focus"""
+
+    def __init__(self, radius_m: float = 300.0, max_maps: int = 2):
+        """
+        Args:
+            radius_m: Radius of the classified area around the address
+            max_maps: Georeferenced legend maps kept in memory
+        """
+        self.radius_m = radius_m
+        self.max_maps = max_maps
+        self._classifiers: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, legend: Union[str, bytes]):
+        """Georeferenced classifier of a legend map, built on first use"""
+        from .local_classifier import LocalNeighborhoodClassifier
+
+        key = hashlib.sha256(legend).hexdigest() if isinstance(legend, bytes) else legend
+        with self._lock:
+            classifier = self._classifiers.get(key)
+            if classifier is None:
+                classifier = LocalNeighborhoodClassifier(legend)
+                self._classifiers[key] = classifier
+                while len(self._classifiers) > self.max_maps:
+                    self._classifiers.popitem(last=False)
+            self._classifiers.move_to_end(key)
+            return classifier
+
+    def __call__(
+        self,
+        legend: Union[str, bytes],
+        pin: Union[str, bytes],
+        legend_focus: Optional[Tuple[float, float]],
+        bypass_cache: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        # Pixel lookups are not memoized, so there is no cache to bypass
+        if legend_focus is None:
+            return None
+        classifier = self.load(legend)
+        lat, lng = classifier.transform.to_latlng(*legend_focus)
+        return classifier.classify_point(lat, lng, self.radius_m)
+
+
+def default_tiers(
+    local_confidence: float = LOCAL_MIN_CONFIDENCE,
+    phi4_confidence: float = PHI4_MIN_CONFIDENCE,
+    model_name: str = CASCADE_MODEL,
+    preprocess=None,
+    cache_results: bool = True,
+) -> List[CascadeTier]:
+    """
+    Local pixel lookup -> Phi-4 -> OpenAI
+
+    Args:
+        local_confidence: Predominant-zone share at which the local answer is accepted
+        phi4_confidence: Phi-4 confidence at which its answer is accepted
+        model_name: OpenAI model of the last tier
+        preprocess: PreprocessOptions for both vision tiers
+        cache_results: If False, the vision tiers never read or write memoized analyses
+    """
+    from .vision_agent import VisionAgent
+
+    phi4 = VisionAgent(use_openai=False, preprocess=preprocess, cache_results=cache_results)
+    openai = VisionAgent(use_openai=True, preprocess=preprocess, cache_results=cache_results, model_name=model_name)
+    return [
+        CascadeTier("local", LocalTier(), local_confidence),
+        CascadeTier("phi4", phi4.analyze_images, phi4_confidence),
+        CascadeTier("openai", openai.analyze_images),
+    ]
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+class CascadeClassifier:
+    """
+    Drop-in replacement for ``VisionAgent`` that only pays for the strong model on hard cases
+
+    Results are the answering tier's result plus ``tier`` (its name),
+    ``tier_timings`` (milliseconds spent per tier), ``tiers`` (each attempt and
+    why it was accepted or escalated), and the summed ``usage`` and
+    estimated ``cost_usd`` of every model call made.
+    """
+
+    def __init__(self, tiers: Optional[List[CascadeTier]] = None, require_agreement: bool = True):
+        """
+        Args:
+            tiers: Backends from cheapest to strongest (``default_tiers()`` if omitted)
+            require_agreement: Escalate when a confident answer contradicts an earlier tier's answer
+        """
+        self.tiers = tiers if tiers is not None else default_tiers()
+        if not self.tiers:
+            raise ValueError("A cascade needs at least one tier")
+        self.require_agreement = require_agreement
+        self.model_name = "cascade:" + ">".join(tier.name for tier in self.tiers)
+
+    def analyze_with_reference(
+        self,
+        legend_map_path: str,
+        pin_map_path: str,
+        legend_focus: Optional[Tuple[float, float]] = None,
+        bypass_cache: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Analyze by comparing a legend/reference map with a pin map
+
+        Args:
+            legend_map_path: Path to map with colored zones and legend
+            pin_map_path: Path to map with pin location
+            legend_focus: Pixel of the address on the legend map; without it the local tier is skipped
+            bypass_cache: Make every model tier call its model instead of replaying a memoized result
+
+        Returns:
+            Dictionary with neighborhood analysis and the cascade fields
+        """
+        return self._analyze(legend_map_path, pin_map_path, legend_focus, bypass_cache)
+
+    def analyze_images(
+        self,
+        legend_png: bytes,
+        pin_png: bytes,
+        legend_focus: Optional[Tuple[float, float]] = None,
+        bypass_cache: bool = False,
+    ) -> Dict[str, Any]:
+        """Same as ``analyze_with_reference`` for in-memory captures"""
+        return self._analyze(legend_png, pin_png, legend_focus, bypass_cache)
+
+    def _judge(
+        self, tier: CascadeTier, result: Dict[str, Any], answers: List[Tuple[str, Dict[str, Any]]]
+    ) -> Optional[str]:
+        """Reason to escalate past ``result``, or None to accept it"""
+        if not result.get("success") or result.get("neighborhood_type") is None:
+            return "no answer"
+        confidence = result.get("confidence")
+        if confidence is None or confidence < tier.min_confidence:
+            return "low confidence"
+        if self.require_agreement and any(
+            answer["neighborhood_type"] != result["neighborhood_type"] for _, answer in answers
+        ):
+            return "disagreement"
+        return None
+
+    def _analyze(
+        self,
+        legend: Union[str, bytes],
+        pin: Union[str, bytes],
+        legend_focus: Optional[Tuple[float, float]],
+        bypass_cache: bool = False,
+    ) -> Dict[str, Any]:
+        with span("cascade.analyze", tiers=len(self.tiers)) as cascade_span:
+            attempts: List[Dict[str, Any]] = []
+            timings: Dict[str, float] = {}
+            # Earlier (tier, result) pairs that classified the images
+            answers: List[Tuple[str, Dict[str, Any]]] = []
+            usage = {"prompt_tokens": 0, "completion_tokens": 0}
+            cost = 0.0
+            chosen: Optional[Tuple[str, Dict[str, Any]]] = None
+            last_result: Optional[Dict[str, Any]] = None
+
+            for i, tier in enumerate(self.tiers):
+                started = time.perf_counter()
+                # Everything about the attempt is recorded before the span ends and is exported
+                with span("cascade.tier", tier=tier.name) as tier_span:
+                    try:
+                        result = tier.classify(legend, pin, legend_focus, bypass_cache=bypass_cache)
+                    except Exception as e:
+                        result = {"success": False, "neighborhood_type": None, "error": str(e)}
+                    timings[tier.name] = _elapsed_ms(started)
+                    if result is None:
+                        tier_span.set(skipped=True, outcome="skipped")
+                        attempts.append({"tier": tier.name, "outcome": "skipped"})
+                        continue
+
+                    tier_usage = result.get("usage") or {}
+                    for key in usage:
+                        usage[key] += tier_usage.get(key, 0)
+                    tier_cost = estimate_cost(
+                        result.get("model_used") or "", tier_usage.get("prompt_tokens", 0),
+                        tier_usage.get("completion_tokens", 0)
+                    ) if tier_usage else 0.0
+                    cost = None if cost is None or tier_cost is None else cost + tier_cost
+
+                    last_result = result
+                    reason = self._judge(tier, result, answers)
+                    is_last = i == len(self.tiers) - 1
+                    accepted = reason is None or (is_last and reason != "no answer")
+                    attempts.append({
+                        "tier": tier.name,
+                        "model_used": result.get("model_used"),
+                        "neighborhood_type": result.get("neighborhood_type"),
+                        "confidence": result.get("confidence"),
+                        "elapsed_ms": timings[tier.name],
+                        "outcome": "accepted" if accepted else f"{'failed' if is_last else 'escalated'}: {reason}",
+                        "error": result.get("error"),
+                    })
+                    tier_span.set(confidence=result.get("confidence"), outcome=attempts[-1]["outcome"])
+                if accepted:
+                    chosen = (tier.name, result)
+                    break
+                if reason != "no answer":
+                    answers.append((tier.name, result))
+
+            if chosen is None and answers:
+                # The strongest tier failed: fall back to the most confident earlier answer
+                chosen = max(answers, key=lambda answer: answer[1].get("confidence") or 0.0)
+                next(a for a in attempts if a["tier"] == chosen[0])["outcome"] = "fallback"
+            if chosen is None:
+                chosen = (attempts[-1]["tier"], last_result or {
+                    "success": False,
+                    "model_used": self.model_name,
+                    "raw_analysis": None,
+                    "neighborhood_type": None,
+                    "neighborhood_info": None,
+                    "error": "No cascade tier could classify these images",
+                    "method": "cascade",
+                })
+
+            tier_name, result = chosen
+            cascade_span.set(tier=tier_name, success=bool(result.get("success")))
+            return {
+                **result,
+                "tier": tier_name,
+                "tier_timings": timings,
+                "tiers": attempts,
+                "usage": usage,
+                "cost_usd": None if cost is None else round(cost, 8),
+            }
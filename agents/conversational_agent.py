@@ -1,29 +1,105 @@
 import os
 import json
+import time
 import subprocess
-from typing import Dict, Any, List, Optional
-from openai import OpenAI
-from .vision_agent import VisionAgent
+import threading
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Generator, Iterator, List, Optional, Tuple
+from .captures import get_capture_store
+from .history import DEFAULT_TOKEN_BUDGET, ConversationHistory, compact_tool_result
+from .map_capture import HOODMAPS_VIEWPORT
+from .pipeline import analyze_address, format_timings, match_address_query
+from .reference_cache import get_reference_cache
+from .scraper_client import ScraperUnavailable, get_scraper_client
+from .tracing import span
+
+# Seconds a tool call may run (including time queued for a worker) before the turn moves on
+TOOL_TIMEOUTS = {
+    "take_google_maps_screenshot": 60.0,
+    "take_hoodmaps_screenshot": 120.0,
+    "analyze_neighborhood": 90.0,
+}
+DEFAULT_TOOL_TIMEOUT = 60.0
+
+CHAT_BASE_URL = os.environ.get("APERITIF_CHAT_BASE_URL", "https://symbolic-keeley-metal-fiefs-0z-3a306699.koyeb.app/v1")
+
+CHAT_SYSTEM_PROMPT = """You are a helpful assistant that can take screenshots of maps and analyze San Francisco neighborhoods. 
+
+You have access to these tools:
+1. take_google_maps_screenshot - Take screenshots of Google Maps for any location
+2. take_hoodmaps_screenshot - Take screenshots of HoodMaps showing SF neighborhood zones
+3. analyze_neighborhood - Use AI vision to analyze what type of neighborhood a location is
+
+Your workflow for neighborhood analysis:
+1. Take a Google Maps screenshot of the requested location
+2. Take a HoodMaps screenshot to get the reference map with neighborhood zones
+3. Use the vision AI to analyze both images and determine the neighborhood type
+
+Be conversational and helpful. Explain what you're doing step by step."""
+
+# Simplified system prompt for demo mode
+DEMO_SYSTEM_PROMPT = """You are a helpful assistant that specializes in analyzing San Francisco neighborhoods. 
+
+When asked about neighborhood analysis, explain that you would normally:
+1. Take screenshots of Google Maps for the location
+2. Take screenshots of HoodMaps with neighborhood zones
+3. Use AI vision to analyze both images
+4. Provide detailed neighborhood classification
+
+Be conversational and helpful. Explain your planned approach for the request."""
+
+DEMO_FALLBACK_RESPONSE = """I'd be happy to analyze the Mission District neighborhood for you! 
+
+Here's what I would normally do:
+1. Take a Google Maps screenshot of the Mission District area
+2. Capture a HoodMaps reference showing SF neighborhood zones
+3. Use AI vision to analyze both images and determine the neighborhood type
+4. Provide you with detailed insights about the area's characteristics
+
+The Mission District is known for being a vibrant, diverse neighborhood with a rich Latino heritage, great food scene, and mix of residential and commercial areas. Would you like me to proceed with the detailed analysis?"""
 
 
 class ConversationalAgent:
     """Conversational agent using Qwen that can call tools and coordinate with vision agent"""
     
-    def __init__(self, demo_mode=False):
+    def __init__(
+        self,
+        demo_mode=False,
+        max_tool_workers: int = 4,
+        tool_timeouts: Optional[Dict[str, float]] = None,
+        history_token_budget: int = DEFAULT_TOKEN_BUDGET,
+        fast_path: bool = True,
+        cascade: bool = False
+    ):
         """
         Initialize the conversational agent with correct Koyeb endpoint and model
         
         Args:
             demo_mode: If True, fake tool calls for demonstration purposes
+            max_tool_workers: Maximum number of tool calls from one turn running at once
+            tool_timeouts: Per-tool timeouts in seconds, overriding TOOL_TIMEOUTS
+            history_token_budget: Estimated prompt tokens the conversation history is kept under
+            fast_path: Answer "what kind of neighborhood is <address>" questions with
+                ``analyze_address`` instead of LLM tool planning
+            cascade: Classify with ``CascadeClassifier`` (local pixel lookup, then Phi-4,
+                escalating to GPT-4o only on low confidence or disagreement)
         """
         self.demo_mode = demo_mode
-        self.client = OpenAI(
-            api_key=os.environ.get("OPENAI_API_KEY", "fake"),
-            base_url="https://symbolic-keeley-metal-fiefs-0z-3a306699.koyeb.app/v1",
-        )
+        self.fast_path = fast_path
+        # Result (with per-stage timings) of the latest fast-path answer
+        self.last_fast_path_result: Optional[Dict[str, Any]] = None
+        self.tool_timeouts = {**TOOL_TIMEOUTS, **(tool_timeouts or {})}
+        self.max_tool_workers = max_tool_workers
+        self._tool_executor: Optional[ThreadPoolExecutor] = None
+        # The chat client and the vision agent are built on first use, so demo runs
+        # and CLI startup never import openai or need OPENAI_API_KEY for vision
+        self.cascade = cascade
+        self._client = None
+        self._vision_agent = None
+        self._lazy_lock = threading.Lock()
         # self.model_name = "DeepSeek-R1-Distill-Llama-8B"
         self.model_name = "/models/DeepSeek-R1-Distill-Llama-8B"
-        self.vision_agent = VisionAgent(use_openai=True)  # Use GPT-4o for vision
         
         # Available tools
         self.tools = [
@@ -76,11 +152,11 @@ class ConversationalAgent:
                         "properties": {
                             "pin_map_path": {
                                 "type": "string",
-                                "description": "Path to the map with pin location"
+                                "description": "Path or capture:// handle of the map with pin location"
                             },
                             "legend_map_path": {
                                 "type": "string", 
-                                "description": "Path to the reference map with neighborhood zones"
+                                "description": "Path or capture:// handle of the reference map with neighborhood zones"
                             }
                         },
                         "required": ["pin_map_path", "legend_map_path"]
@@ -89,7 +165,7 @@ class ConversationalAgent:
             }
         ]
         
-        self.conversation_history = []
+        self.conversation_history = ConversationHistory(token_budget=history_token_budget)
     
     def take_google_maps_screenshot(self, location: str, use_test_image: bool = True) -> Dict[str, Any]:
         """Take a Google Maps screenshot or use test image"""
@@ -104,34 +180,53 @@ class ConversationalAgent:
             }
         else:
             try:
-                # Run the Go screenshot service (currently uses default location)
-                result = subprocess.run(
-                    ["go", "run", "cmd/service.go"],
-                    cwd="/Users/home/aperitif/aperitif_scraper",
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
-                
-                if result.returncode == 0:
-                    return {
-                        "success": True,
-                        "screenshot_path": "/Users/home/aperitif/aperitif_scraper/google_screenshot.png",
-                        "location": location,
-                        "method": "go_service"
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": result.stderr,
-                        "location": location
-                    }
+                # The scraper daemon keeps Chrome warm and pins the requested location
+                png = get_scraper_client().capture("googlemaps", address=location)
+                method = "scraper_daemon"
+            except ScraperUnavailable as e:
+                print(f"Scraper daemon unavailable ({e}), falling back to go run")
+                png, method = None, "go_service"
             except Exception as e:
                 return {
                     "success": False,
                     "error": str(e),
                     "location": location
                 }
+            
+            if png is None:
+                try:
+                    # Run the Go screenshot service (currently uses default location)
+                    result = subprocess.run(
+                        ["go", "run", "cmd/service.go"],
+                        cwd="/Users/home/aperitif/aperitif_scraper",
+                        capture_output=True,
+                        text=True,
+                        timeout=30
+                    )
+                    if result.returncode != 0:
+                        return {
+                            "success": False,
+                            "error": result.stderr,
+                            "location": location
+                        }
+                    # Keep the capture in memory; the Go service's file is overwritten by the next run
+                    with open("/Users/home/aperitif/aperitif_scraper/google_screenshot.png", "rb") as f:
+                        png = f.read()
+                except Exception as e:
+                    return {
+                        "success": False,
+                        "error": str(e),
+                        "location": location
+                    }
+            
+            capture = get_capture_store().put(png, "googlemaps")
+            return {
+                "success": True,
+                "screenshot_path": capture["handle"],
+                "artifact_path": capture["artifact_path"],
+                "location": location,
+                "method": method
+            }
     
     def take_hoodmaps_screenshot(self, use_test_image: bool = True) -> Dict[str, Any]:
         """Take a HoodMaps screenshot or use test image"""
@@ -145,54 +240,141 @@ class ConversationalAgent:
             }
         else:
             try:
-                # Run the Go screenshot service for hoodmaps
-                result = subprocess.run(
-                    ["go", "run", "cmd/service.go"],
-                    cwd="/Users/home/aperitif/aperitif_scraper",
-                    capture_output=True,
-                    text=True,
-                    timeout=30
+                # The reference map is the same for every address, so only run the
+                # Go screenshot service when the cached capture is missing. The Go
+                # scraper captures at the same window size as the Playwright path.
+                reference = get_reference_cache().get(
+                    self._capture_hoodmaps_with_go_service, viewport=HOODMAPS_VIEWPORT
                 )
-                
-                if result.returncode == 0:
-                    return {
-                        "success": True,
-                        "screenshot_path": "/Users/home/aperitif/aperitif_scraper/hoodmaps_screenshot.png",
-                        "method": "go_service"
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": result.stderr
-                    }
+                capture = get_capture_store().put(reference.data, "hoodmaps")
+                return {
+                    "success": True,
+                    "screenshot_path": capture["handle"],
+                    "artifact_path": capture["artifact_path"],
+                    "method": "reference_cache",
+                    "captured_at": reference.metadata["captured_at"]
+                }
             except Exception as e:
                 return {
                     "success": False,
                     "error": str(e)
                 }
     
+    def _capture_hoodmaps_with_go_service(self) -> bytes:
+        """Capture HoodMaps with the scraper daemon, or a one-off Go service run if it is down"""
+        try:
+            return get_scraper_client().capture("hoodmaps")
+        except ScraperUnavailable as e:
+            print(f"Scraper daemon unavailable ({e}), falling back to go run")
+        
+        result = subprocess.run(
+            ["go", "run", "cmd/service.go"],
+            cwd="/Users/home/aperitif/aperitif_scraper",
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr)
+        
+        with open("/Users/home/aperitif/aperitif_scraper/hoodmaps_screenshot.png", "rb") as f:
+            return f.read()
+    
+    @property
+    def client(self):
+        """OpenAI-compatible client of the conversational model"""
+        with self._lazy_lock:
+            if self._client is None:
+                from openai import OpenAI
+                from .http_clients import get_http_client
+
+                self._client = OpenAI(
+                    api_key=os.environ.get("OPENAI_API_KEY", "fake"),
+                    base_url=CHAT_BASE_URL,
+                    http_client=get_http_client(CHAT_BASE_URL),
+                )
+            return self._client
+    
+    @property
+    def vision_agent(self):
+        """GPT-4o ``VisionAgent``, or ``CascadeClassifier`` when ``cascade`` is set"""
+        with self._lazy_lock:
+            if self._vision_agent is None:
+                if self.cascade:
+                    from .cascade import CascadeClassifier
+
+                    self._vision_agent = CascadeClassifier()
+                else:
+                    from .vision_agent import VisionAgent
+
+                    self._vision_agent = VisionAgent(use_openai=True)  # Use GPT-4o for vision
+            return self._vision_agent
+    
+    @vision_agent.setter
+    def vision_agent(self, agent):
+        self._vision_agent = agent
+    
     def analyze_neighborhood(self, pin_map_path: str, legend_map_path: str) -> Dict[str, Any]:
         """Analyze neighborhood using the vision agent"""
-        return self.vision_agent.analyze_with_reference(legend_map_path, pin_map_path)
+        # Captures arrive as capture:// handles and are analyzed without touching disk
+        store = get_capture_store()
+        return self.vision_agent.analyze_images(store.get(legend_map_path), store.get(pin_map_path))
     
     def execute_tool_call(self, tool_call) -> str:
         """Execute a tool call and return the result"""
         function_name = tool_call.function.name
         arguments = json.loads(tool_call.function.arguments)
         
-        try:
-            if function_name == "take_google_maps_screenshot":
-                result = self.take_google_maps_screenshot(**arguments)
-            elif function_name == "take_hoodmaps_screenshot":
-                result = self.take_hoodmaps_screenshot(**arguments)
-            elif function_name == "analyze_neighborhood":
-                result = self.analyze_neighborhood(**arguments)
-            else:
-                result = {"success": False, "error": f"Unknown function: {function_name}"}
-            
-            return json.dumps(result, indent=2)
-        except Exception as e:
-            return json.dumps({"success": False, "error": str(e)})
+        with span(f"tool.{function_name}") as tool_span:
+            try:
+                if function_name == "take_google_maps_screenshot":
+                    result = self.take_google_maps_screenshot(**arguments)
+                elif function_name == "take_hoodmaps_screenshot":
+                    result = self.take_hoodmaps_screenshot(**arguments)
+                elif function_name == "analyze_neighborhood":
+                    result = self.analyze_neighborhood(**arguments)
+                else:
+                    result = {"success": False, "error": f"Unknown function: {function_name}"}
+                
+                tool_span.set(success=bool(result.get("success")), method=result.get("method"))
+                return compact_tool_result(result)
+            except Exception as e:
+                tool_span.set(success=False, error_message=str(e))
+                return json.dumps({"success": False, "error": str(e)})
+    
+    def execute_tool_calls(self, tool_calls) -> List[str]:
+        """
+        Execute independent tool calls concurrently
+        
+        A turn takes as long as its slowest tool instead of the sum of all of them.
+        A call that outlives its timeout is reported as failed; it keeps running
+        in the background but its result is discarded.
+        
+        Returns:
+            One JSON result per tool call, in the order the calls were made
+        """
+        with self._lazy_lock:
+            if self._tool_executor is None:
+                self._tool_executor = ThreadPoolExecutor(
+                    max_workers=self.max_tool_workers, thread_name_prefix="tool-call"
+                )
+            executor = self._tool_executor
+        submitted_at = time.monotonic()
+        futures = [executor.submit(self.execute_tool_call, tc) for tc in tool_calls]
+        
+        results = []
+        for tool_call, future in zip(tool_calls, futures):
+            timeout = self.tool_timeouts.get(tool_call.function.name, DEFAULT_TOOL_TIMEOUT)
+            remaining = max(0.0, submitted_at + timeout - time.monotonic())
+            try:
+                results.append(future.result(timeout=remaining))
+            except FutureTimeoutError:
+                future.cancel()
+                results.append(json.dumps({
+                    "success": False,
+                    "error": f"{tool_call.function.name} timed out after {timeout:g}s"
+                }))
+        return results
     
     def chat(self, user_message: str) -> str:
         """Have a conversation with the user, using tools when needed"""
@@ -202,40 +384,30 @@ class ConversationalAgent:
         if self.demo_mode:
             return self._demo_chat(user_message)
         
-        system_prompt = """You are a helpful assistant that can take screenshots of maps and analyze San Francisco neighborhoods. 
-
-You have access to these tools:
-1. take_google_maps_screenshot - Take screenshots of Google Maps for any location
-2. take_hoodmaps_screenshot - Take screenshots of HoodMaps showing SF neighborhood zones
-3. analyze_neighborhood - Use AI vision to analyze what type of neighborhood a location is
-
-Your workflow for neighborhood analysis:
-1. Take a Google Maps screenshot of the requested location
-2. Take a HoodMaps screenshot to get the reference map with neighborhood zones
-3. Use the vision AI to analyze both images and determine the neighborhood type
-
-Be conversational and helpful. Explain what you're doing step by step."""
-
-        messages = [
-            {"role": "system", "content": system_prompt},
-            *self.conversation_history
-        ]
+        answer = self._fast_path_answer(user_message)
+        if answer is not None:
+            return answer
+        
+        messages = self.conversation_history.build_prompt(CHAT_SYSTEM_PROMPT)
         
         # Try without tools first to test basic connectivity
         try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,
-                tools=self.tools,
-                temperature=0.7,
-                max_tokens=1000
-            )
+            with span("llm.chat", model=self.model_name, phase="plan") as llm_span:
+                response = self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=messages,
+                    tools=self.tools,
+                    temperature=0.7,
+                    max_tokens=1000
+                )
+                llm_span.record_usage(self.model_name, getattr(response, "usage", None))
         except Exception as e:
             if "tool choice" in str(e).lower() or "tool" in str(e).lower():
                 return self._demo_chat(user_message)
             else:
                 raise e
         
+        self.conversation_history.record_usage(getattr(response, "usage", None))
         response_message = response.choices[0].message
         
         # Handle tool calls if any
@@ -256,10 +428,9 @@ Be conversational and helpful. Explain what you're doing step by step."""
                 ]
             })
             
-            # Execute each tool call
-            for tool_call in response_message.tool_calls:
-                tool_result = self.execute_tool_call(tool_call)
-                
+            # Execute the tool calls concurrently; results come back in call order
+            tool_results = self.execute_tool_calls(response_message.tool_calls)
+            for tool_call, tool_result in zip(response_message.tool_calls, tool_results):
                 # Add tool result to history
                 self.conversation_history.append({
                     "role": "tool",
@@ -268,16 +439,16 @@ Be conversational and helpful. Explain what you're doing step by step."""
                 })
             
             # Get final response after tool execution
-            final_response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    *self.conversation_history
-                ],
-                temperature=0.7,
-                max_tokens=1000
-            )
+            with span("llm.chat", model=self.model_name, phase="answer") as llm_span:
+                final_response = self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=self.conversation_history.build_prompt(CHAT_SYSTEM_PROMPT),
+                    temperature=0.7,
+                    max_tokens=1000
+                )
+                llm_span.record_usage(self.model_name, getattr(final_response, "usage", None))
             
+            self.conversation_history.record_usage(getattr(final_response, "usage", None))
             final_message = final_response.choices[0].message.content
             self.conversation_history.append({"role": "assistant", "content": final_message})
             return final_message
@@ -286,31 +457,53 @@ Be conversational and helpful. Explain what you're doing step by step."""
             self.conversation_history.append({"role": "assistant", "content": response_message.content})
             return response_message.content
     
+    def _fast_path_answer(self, user_message: str) -> Optional[str]:
+        """
+        Answer a single-address question with the deterministic pipeline
+        
+        Skips both LLM round trips of the tool-calling loop. Returns None (and
+        leaves the history untouched) when the message is not such a question
+        or the pipeline fails, so the caller falls back to the full agent.
+        """
+        address = match_address_query(user_message) if self.fast_path else None
+        if address is None:
+            return None
+        
+        try:
+            # Building the vision agent can fail too (e.g. OPENAI_API_KEY unset)
+            result = analyze_address(address, vision_agent=self.vision_agent)
+        except Exception as e:
+            print(f"Fast path unavailable ({e}), using the full agent")
+            return None
+        self.last_fast_path_result = result
+        if not result.get("success") or not result.get("neighborhood_type"):
+            print(f"Fast path failed at {result.get('stage', 'classify')} ({result.get('error')}), using the full agent")
+            return None
+        
+        answer = (
+            f"{address} is in a **{result['neighborhood_type']}** area on HoodMaps.\n\n"
+            f"{(result.get('rationale') or result.get('raw_analysis') or '').strip()}\n\n"
+            f"[fast path: {format_timings(result['timings'])}]"
+        )
+        self.conversation_history.append({"role": "assistant", "content": answer})
+        return answer
+    
     def _demo_chat(self, user_message: str) -> str:
         """Demo mode: Just get conversational response from DeepSeek R1"""
-        # Simplified system prompt for demo
-        system_prompt = """You are a helpful assistant that specializes in analyzing San Francisco neighborhoods. 
-        
-When asked about neighborhood analysis, explain that you would normally:
-1. Take screenshots of Google Maps for the location
-2. Take screenshots of HoodMaps with neighborhood zones
-3. Use AI vision to analyze both images
-4. Provide detailed neighborhood classification
-
-Be conversational and helpful. Explain your planned approach for the request."""
-
         messages = [
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": DEMO_SYSTEM_PROMPT},
             {"role": "user", "content": user_message}
         ]
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=500
-            )
+            with span("llm.chat", model=self.model_name, phase="demo") as llm_span:
+                response = self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=500
+                )
+                llm_span.record_usage(self.model_name, getattr(response, "usage", None))
             
             conversational_response = response.choices[0].message.content
             self.conversation_history.append({"role": "assistant", "content": conversational_response})
@@ -318,18 +511,142 @@ Be conversational and helpful. Explain your planned approach for the request."""
             
         except Exception as e:
             # Fallback response
-            fallback_response = """I'd be happy to analyze the Mission District neighborhood for you! 
-
-Here's what I would normally do:
-1. Take a Google Maps screenshot of the Mission District area
-2. Capture a HoodMaps reference showing SF neighborhood zones
-3. Use AI vision to analyze both images and determine the neighborhood type
-4. Provide you with detailed insights about the area's characteristics
-
-The Mission District is known for being a vibrant, diverse neighborhood with a rich Latino heritage, great food scene, and mix of residential and commercial areas. Would you like me to proceed with the detailed analysis?"""
-            
-            self.conversation_history.append({"role": "assistant", "content": fallback_response})
-            return fallback_response
+            self.conversation_history.append({"role": "assistant", "content": DEMO_FALLBACK_RESPONSE})
+            return DEMO_FALLBACK_RESPONSE
+    
+    def chat_stream(self, user_message: str) -> Iterator[str]:
+        """
+        Streaming variant of ``chat``: yields content deltas as they arrive
+        
+        Tool calls requested by the model are assembled from the streamed
+        deltas, executed, and followed by a streamed final answer. The
+        conversation history ends up the same as after ``chat``.
+        """
+        self.conversation_history.append({"role": "user", "content": user_message})
+        
+        if self.demo_mode:
+            yield from self._demo_chat_stream(user_message)
+            return
+        
+        answer = self._fast_path_answer(user_message)
+        if answer is not None:
+            yield answer
+            return
+        
+        messages = self.conversation_history.build_prompt(CHAT_SYSTEM_PROMPT)
+        with span("llm.chat", model=self.model_name, phase="plan", stream=True) as llm_span:
+            try:
+                stream = self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=messages,
+                    tools=self.tools,
+                    temperature=0.7,
+                    max_tokens=1000,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+            except Exception as e:
+                if not ("tool choice" in str(e).lower() or "tool" in str(e).lower()):
+                    raise e
+                stream = None
+            if stream is not None:
+                content, tool_calls, usage = yield from self._consume_stream(stream)
+                llm_span.record_usage(self.model_name, usage)
+        
+        if stream is None:
+            yield from self._demo_chat_stream(user_message)
+            return
+        self.conversation_history.record_usage(usage)
+        
+        if not tool_calls:
+            self.conversation_history.append({"role": "assistant", "content": content})
+            return
+        
+        self.conversation_history.append({"role": "assistant", "content": content or None, "tool_calls": tool_calls})
+        calls = [
+            SimpleNamespace(id=tc["id"], function=SimpleNamespace(**tc["function"]))
+            for tc in tool_calls
+        ]
+        for tool_call, tool_result in zip(calls, self.execute_tool_calls(calls)):
+            self.conversation_history.append({
+                "role": "tool",
+                "tool_call_id": tool_call.id,
+                "content": tool_result
+            })
+        
+        with span("llm.chat", model=self.model_name, phase="answer", stream=True) as llm_span:
+            stream = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=self.conversation_history.build_prompt(CHAT_SYSTEM_PROMPT),
+                temperature=0.7,
+                max_tokens=1000,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            final_message, _, usage = yield from self._consume_stream(stream)
+            llm_span.record_usage(self.model_name, usage)
+        self.conversation_history.record_usage(usage)
+        self.conversation_history.append({"role": "assistant", "content": final_message})
+    
+    def _consume_stream(self, stream) -> Generator[str, None, Tuple[str, List[Dict[str, Any]], Any]]:
+        """
+        Yield content deltas from a streamed completion
+        
+        Returns:
+            ``(content, tool_calls, usage)`` once the stream ends; tool calls are
+            rebuilt from their per-index fragments in the history format and
+            usage is None unless the endpoint sent a usage chunk
+        """
+        content = []
+        tool_calls: Dict[int, Dict[str, Any]] = {}
+        usage = None
+        for chunk in stream:
+            # With include_usage the last chunk carries the usage and no choices
+            usage = getattr(chunk, "usage", None) or usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                content.append(delta.content)
+                yield delta.content
+            for fragment in delta.tool_calls or []:
+                call = tool_calls.setdefault(
+                    fragment.index,
+                    {"id": None, "type": "function", "function": {"name": "", "arguments": ""}}
+                )
+                if fragment.id:
+                    call["id"] = fragment.id
+                if fragment.function is not None:
+                    # The name arrives whole in the first fragment, arguments in pieces
+                    call["function"]["name"] += fragment.function.name or ""
+                    call["function"]["arguments"] += fragment.function.arguments or ""
+        return "".join(content), [tool_calls[index] for index in sorted(tool_calls)], usage
+    
+    def _demo_chat_stream(self, user_message: str) -> Iterator[str]:
+        """Streaming variant of ``_demo_chat``"""
+        messages = [
+            {"role": "system", "content": DEMO_SYSTEM_PROMPT},
+            {"role": "user", "content": user_message}
+        ]
+        content = []
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=500,
+                stream=True
+            )
+            for delta in self._consume_stream(stream):
+                content.append(delta)
+                yield delta
+        except Exception:
+            if content:
+                raise
+            # Fallback response
+            content = [DEMO_FALLBACK_RESPONSE]
+            yield DEMO_FALLBACK_RESPONSE
+        self.conversation_history.append({"role": "assistant", "content": "".join(content)})
     
     def demo_vision_analysis(self) -> str:
         """Separate step: Run the actual vision analysis"""
@@ -355,7 +672,7 @@ The Mission District is known for being a vibrant, diverse neighborhood with a r
         
         if analysis_result['success']:
             neighborhood_type = analysis_result.get('neighborhood_type', 'Unknown')
-            raw_analysis = analysis_result.get('raw_analysis', '')
+            raw_analysis = analysis_result.get('rationale') or analysis_result.get('raw_analysis', '')
             
             vision_response = f"""✅ Vision Analysis Complete!
 
@@ -380,4 +697,16 @@ The workflow is set up correctly, but there was an issue with the vision compone
     
     def reset_conversation(self):
         """Reset the conversation history"""
-        self.conversation_history = []
\ No newline at end of file
+        self.conversation_history.clear()
+    
+    def close(self):
+        """
+        Shut the tool-call pool down without waiting for timed-out tools
+        
+        Queued calls are cancelled. The agent stays usable: the next turn that
+        calls tools starts a new pool.
+        """
+        with self._lazy_lock:
+            executor, self._tool_executor = self._tool_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
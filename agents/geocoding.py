@@ -0,0 +1,305 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from .tracing import span
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+GEOCODE_URL = os.environ.get("APERITIF_GEOCODE_URL", "https://maps.googleapis.com/maps/api/geocode/json")
+DEFAULT_CACHE_PATH = os.path.join(
+    os.environ.get("APERITIF_CACHE_DIR", os.path.expanduser("~/.cache/aperitif")), "geocode.sqlite3"
+)
+DEFAULT_TTL_SECONDS = int(os.environ.get("APERITIF_GEOCODE_TTL", str(30 * 24 * 60 * 60)))
+DEFAULT_NEGATIVE_TTL_SECONDS = int(os.environ.get("APERITIF_GEOCODE_NEGATIVE_TTL", str(24 * 60 * 60)))
+
+# Street suffix abbreviations expanded during normalization
+STREET_SUFFIXES = {
+    "st": "street",
+    "ave": "avenue",
+    "av": "avenue",
+    "blvd": "boulevard",
+    "rd": "road",
+    "dr": "drive",
+    "ln": "lane",
+    "ct": "court",
+    "pl": "place",
+    "ter": "terrace",
+    "hwy": "highway",
+    "pkwy": "parkway",
+}
+TRAILING_COUNTRY = {"usa", "us", "united states", "united states of america"}
+TRAILING_STATE = {"ca", "california"}
+
+LatLng = Tuple[float, float]
+
+
+class GeocodingError(Exception):
+    """Raised when the Geocoding API cannot resolve an address"""
+
+    def __init__(self, status: str):
+        super().__init__(f"Failed to geocode: {status}")
+        self.status = status
+
+
+def normalize_address(address: str) -> str:
+    """
+    Canonical form of an address used as the cache key
+
+    Lower-cases, collapses whitespace and punctuation, expands street suffixes
+    ("St" -> "street") and drops a trailing country and "CA"/"California", so
+    "208 Anza St, San Francisco, CA" and "208 anza street, san francisco, usa"
+    share one cache entry.
+    """
+    parts = []
+    for part in address.lower().split(","):
+        words = re.sub(r"[^\w\s#-]", " ", part).split()
+        words = [STREET_SUFFIXES.get(w, w) for w in words]
+        if words:
+            parts.append(" ".join(words))
+
+    while parts and parts[-1] in TRAILING_COUNTRY:
+        parts.pop()
+    if parts:
+        # "ca", "ca 94118" or "san francisco ca usa" -> drop state and country, keep the zip
+        words = parts.pop().split()
+        zip_code = words.pop() if words and re.fullmatch(r"\d{5}(-\d{4})?", words[-1]) else None
+        if words and words[-1] in TRAILING_COUNTRY:
+            words.pop()
+        if words and words[-1] in TRAILING_STATE:
+            words.pop()
+        if zip_code:
+            words.append(zip_code)
+        if words:
+            parts.append(" ".join(words))
+    return ", ".join(parts)
+
+
+class GeocodeCache:
+    """In-process LRU in front of a SQLite table of geocoding results"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, lru_size: int = 1024):
+        """
+        Args:
+            path: SQLite database file (":memory:" keeps everything in-process)
+            lru_size: Number of entries kept in the in-process LRU
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS geocodes ("
+            "key TEXT PRIMARY KEY, status TEXT NOT NULL, lat REAL, lng REAL, fetched_at REAL NOT NULL)"
+        )
+        self._db.commit()
+        self._lru: "OrderedDict[str, Tuple[str, Optional[LatLng], float]]" = OrderedDict()
+        self._lru_size = lru_size
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[Optional[Tuple[str, Optional[LatLng], float]], str]:
+        """
+        Look up a normalized address
+
+        Returns:
+            ``((status, (lat, lng) or None, fetched_at), tier)`` where tier is
+            "memory", "disk" or "miss"
+        """
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+                return entry, "memory"
+            row = self._db.execute(
+                "SELECT status, lat, lng, fetched_at FROM geocodes WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, "miss"
+            status, lat, lng, fetched_at = row
+            entry = (status, (lat, lng) if status == "OK" else None, fetched_at)
+            self._remember(key, entry)
+            return entry, "disk"
+
+    def put(self, key: str, status: str, location: Optional[LatLng]):
+        entry = (status, location, time.time())
+        lat, lng = location if location else (None, None)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO geocodes (key, status, lat, lng, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (key, status, lat, lng, entry[2]),
+            )
+            self._db.commit()
+            self._remember(key, entry)
+
+    def _remember(self, key: str, entry):
+        self._lru[key] = entry
+        self._lru.move_to_end(key)
+        while len(self._lru) > self._lru_size:
+            self._lru.popitem(last=False)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class Geocoder:
+    """
+    Google Geocoding client with address normalization and persistent caching.
+
+    Successful lookups are cached for ``ttl_seconds`` and ZERO_RESULTS answers
+    for ``negative_ttl_seconds``; other API errors (quota, denied key) are never
+    cached. Requests go over the shared keep-alive client of the Geocoding API's
+    origin (``agents.http_clients``).
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        cache: Optional[GeocodeCache] = None,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        negative_ttl_seconds: int = DEFAULT_NEGATIVE_TTL_SECONDS,
+        max_workers: int = 8,
+        http_client: Optional["httpx.Client"] = None,
+    ):
+        """
+        Args:
+            api_key: Google Maps API key
+            cache: Result cache (defaults to the SQLite store under APERITIF_CACHE_DIR)
+            ttl_seconds: Lifetime of successful lookups
+            negative_ttl_seconds: Lifetime of ZERO_RESULTS lookups
+            max_workers: Concurrent API requests issued by ``geocode_many``
+            http_client: HTTP client to send requests with (the shared one for GEOCODE_URL if omitted)
+        """
+        self.api_key = api_key
+        self.cache = cache or GeocodeCache()
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_workers = max_workers
+        if http_client is None:
+            from .http_clients import get_http_client
+
+            http_client = get_http_client(GEOCODE_URL)
+        self.http_client = http_client
+        self._stats_lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "negative_hits": 0, "misses": 0, "api_calls": 0}
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Cache hit/miss counters and the resulting hit rate"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["negative_hits"] + stats["misses"]
+        stats["hit_rate"] = (lookups - stats["misses"]) / lookups if lookups else 0.0
+        return stats
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _cached(self, key: str) -> Tuple[bool, Optional[LatLng]]:
+        entry, tier = self.cache.get(key)
+        if entry is None:
+            self._count("misses")
+            return False, None
+
+        status, location, fetched_at = entry
+        ttl = self.ttl_seconds if status == "OK" else self.negative_ttl_seconds
+        if time.time() - fetched_at > ttl:
+            self._count("misses")
+            return False, None
+
+        if status != "OK":
+            self._count("negative_hits")
+            raise GeocodingError(status)
+        self._count(f"{tier}_hits")
+        return True, location
+
+    def _fetch(self, key: str, address: str) -> LatLng:
+        self._count("api_calls")
+        response = self.http_client.get(GEOCODE_URL, params={"address": address, "key": self.api_key}, timeout=10)
+        data = response.json()
+        status = data.get("status")
+
+        if status == "OK" and data.get("results"):
+            location = data["results"][0]["geometry"]["location"]
+            result = (location["lat"], location["lng"])
+            self.cache.put(key, "OK", result)
+            return result
+
+        if status == "ZERO_RESULTS":
+            self.cache.put(key, status, None)
+        raise GeocodingError(status)
+
+    def geocode(self, address: str) -> LatLng:
+        """
+        Resolve an address to (lat, lng), using the cache when possible
+
+        Raises:
+            GeocodingError: The API returned no usable result
+        """
+        with span("geocode") as geocode_span:
+            key = normalize_address(address)
+            hit, location = self._cached(key)
+            geocode_span.set(cache="hit" if hit else "miss")
+            if hit:
+                return location
+            return self._fetch(key, address)
+
+    def geocode_many(self, addresses: Iterable[str]) -> List[Optional[LatLng]]:
+        """
+        Resolve many addresses, sending only distinct cache misses to the API
+
+        Returns:
+            One (lat, lng) per input address, or None where geocoding failed
+        """
+        addresses = list(addresses)
+        keys = [normalize_address(a) for a in addresses]
+        resolved: Dict[str, Optional[LatLng]] = {}
+        pending: Dict[str, str] = {}
+
+        for key, address in zip(keys, addresses):
+            if key in resolved or key in pending:
+                continue
+            try:
+                hit, location = self._cached(key)
+            except GeocodingError:
+                resolved[key] = None
+                continue
+            if hit:
+                resolved[key] = location
+            else:
+                pending[key] = address
+
+        def _lookup(item: Tuple[str, str]) -> Tuple[str, Optional[LatLng]]:
+            key, address = item
+            try:
+                return key, self._fetch(key, address)
+            except Exception as e:
+                logger.warning("Geocoding %r failed: %s", address, e)
+                return key, None
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as executor:
+                resolved.update(executor.map(_lookup, pending.items()))
+
+        return [resolved[key] for key in keys]
+
+
+_geocoders: Dict[str, Geocoder] = {}
+_geocoders_lock = threading.Lock()
+
+
+def get_geocoder(api_key: str) -> Geocoder:
+    """Return the process-wide geocoder for an API key"""
+    with _geocoders_lock:
+        if api_key not in _geocoders:
+            _geocoders[api_key] = Geocoder(api_key)
+        return _geocoders[api_key]
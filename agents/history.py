@@ -0,0 +1,152 @@
+import json
+import os
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("APERITIF_HISTORY_TOKEN_BUDGET", "6000"))
+
+# Result fields that only matter to the caller, never to the conversation model
+_DROPPED_RESULT_FIELDS = ("preprocessing", "category_shares", "timings", "usage", "tiers", "tier_timings")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English and JSON)"""
+    return len(text) // 4 + 1
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    """Estimated prompt tokens of one chat message, including per-message overhead"""
+    tokens = 4 + estimate_tokens(message.get("content") or "")
+    for tool_call in message.get("tool_calls") or []:
+        tokens += 4 + estimate_tokens(tool_call["function"]["name"] + tool_call["function"]["arguments"])
+    return tokens
+
+
+def compact_tool_result(result: Dict[str, Any], max_analysis_chars: int = 600) -> str:
+    """
+    Serialize a tool result for the conversation history
+
+    No indentation, caller-only fields dropped and ``raw_analysis`` truncated
+    to ``max_analysis_chars`` (or dropped for structured answers, whose
+    ``rationale`` and category fields already hold all of it).
+    """
+    compact = {key: value for key, value in result.items() if key not in _DROPPED_RESULT_FIELDS}
+    if compact.get("rationale"):
+        compact.pop("raw_analysis", None)
+    analysis = compact.get("raw_analysis")
+    if isinstance(analysis, str) and len(analysis) > max_analysis_chars:
+        compact["raw_analysis"] = analysis[:max_analysis_chars].rstrip() + "..."
+    return json.dumps(compact, separators=(",", ":"))
+
+
+def _shorten(text: Optional[str], limit: int = 120) -> str:
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[:limit].rstrip() + "..."
+
+
+class ConversationHistory:
+    """
+    Conversation history kept under a prompt token budget.
+
+    Messages are grouped into turns (a user message and everything after it).
+    When the estimated prompt exceeds the budget, the oldest whole turns are
+    dropped and replaced by one-line summaries appended to the system prompt,
+    so an assistant ``tool_calls`` message is never separated from its tool
+    results. Behaves like a list of messages for appending and iteration.
+    """
+
+    def __init__(self, token_budget: int = DEFAULT_TOKEN_BUDGET, max_summaries: int = 10, max_prompt_records: int = 100):
+        """
+        Args:
+            token_budget: Target size in estimated tokens of each prompt
+            max_summaries: Number of dropped-turn summaries kept in the system prompt
+            max_prompt_records: Number of recent prompts kept in ``prompt_tokens``
+        """
+        self.token_budget = token_budget
+        self.max_summaries = max_summaries
+        self._messages: List[Dict[str, Any]] = []
+        # Only the latest summaries are rendered, so older ones are dropped as new ones arrive
+        self._summaries: "deque[str]" = deque(maxlen=max_summaries)
+        self._dropped_tokens = 0
+        # One entry per recent prompt: estimated size and, when reported, the API's count.
+        # Bounded so a long session does not grow it without limit.
+        self.prompt_tokens: "deque[Dict[str, Any]]" = deque(maxlen=max_prompt_records)
+        self._requests = 0
+
+    def append(self, message: Dict[str, Any]):
+        self._messages.append(message)
+
+    def clear(self):
+        self._messages.clear()
+        self._summaries.clear()
+        self._dropped_tokens = 0
+        self.prompt_tokens.clear()
+        self._requests = 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._messages)
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __getitem__(self, index):
+        return self._messages[index]
+
+    def _turn_starts(self) -> List[int]:
+        return [i for i, message in enumerate(self._messages) if message["role"] == "user"]
+
+    def _summarize_turn(self, turn: List[Dict[str, Any]]) -> str:
+        question = _shorten(turn[0].get("content"))
+        outcome = None
+        for message in turn[1:]:
+            if message["role"] == "tool":
+                try:
+                    result = json.loads(message["content"])
+                except (TypeError, ValueError):
+                    continue
+                if isinstance(result, dict) and result.get("neighborhood_type"):
+                    outcome = f"classified as {result['neighborhood_type']}"
+            elif message["role"] == "assistant" and message.get("content"):
+                outcome = outcome or f"answered: {_shorten(message['content'])}"
+        return f"- User asked: {question}" + (f" ({outcome})" if outcome else "")
+
+    def _system_message(self, system_prompt: str) -> Dict[str, Any]:
+        if not self._summaries:
+            return {"role": "system", "content": system_prompt}
+        summary = "\n".join(self._summaries)
+        return {"role": "system", "content": f"{system_prompt}\n\nEarlier in this conversation:\n{summary}"}
+
+    def build_prompt(self, system_prompt: str) -> List[Dict[str, Any]]:
+        """
+        Return ``[system, *history]`` within the token budget, compacting older turns if needed
+
+        The current (last) turn is always kept whole, even if it alone exceeds
+        the budget.
+        """
+        while True:
+            messages = [self._system_message(system_prompt), *self._messages]
+            tokens = sum(message_tokens(message) for message in messages)
+            starts = self._turn_starts()
+            if tokens <= self.token_budget or len(starts) < 2:
+                break
+            oldest = self._messages[starts[0]:starts[1]]
+            self._summaries.append(self._summarize_turn(oldest))
+            self._dropped_tokens += sum(message_tokens(message) for message in self._messages[:starts[1]])
+            # Anything before the first user message belongs to the dropped turn too
+            del self._messages[:starts[1]]
+
+        self._requests += 1
+        self.prompt_tokens.append({
+            "request": self._requests,
+            "estimated": tokens,
+            # What the prompt would be had no turn been dropped
+            "uncompacted": message_tokens({"content": system_prompt})
+            + sum(message_tokens(message) for message in self._messages) + self._dropped_tokens,
+            "messages": len(messages),
+        })
+        return messages
+
+    def record_usage(self, usage):
+        """Attach the API-reported prompt token count to the latest prompt"""
+        if usage is not None and self.prompt_tokens:
+            self.prompt_tokens[-1]["reported"] = getattr(usage, "prompt_tokens", None)
@@ -0,0 +1,174 @@
+"""
+Shared keep-alive HTTP clients, one per origin
+
+    from agents.http_clients import get_http_client, get_http_clients
+
+    client = OpenAI(base_url=base_url, http_client=get_http_client(base_url))
+    get_http_clients().stats    # {"https://api.openai.com": {"requests": 40, "connections": 2, ...}}
+
+Every OpenAI-compatible client, the agno model and the geocoder draw their
+``httpx.Client`` from the process-wide registry, so requests to the same host
+reuse warm TCP/TLS connections (multiplexed over HTTP/2 when the ``h2``
+package is installed) whichever agent sends them. Clients are keyed by
+origin, so ``https://api.openai.com/v1`` and ``https://api.openai.com`` share
+a pool.
+
+- ``APERITIF_HTTP_MAX_CONNECTIONS`` - open connections per origin (default 32)
+- ``APERITIF_HTTP_MAX_KEEPALIVE`` - idle connections kept per origin (default 16)
+- ``APERITIF_HTTP_TIMEOUT`` - seconds to wait for a response (default 120; connecting times out after 10)
+- ``APERITIF_HTTP2`` - set to 0 to stay on HTTP/1.1
+"""
+
+import importlib.util
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+MAX_CONNECTIONS = int(os.environ.get("APERITIF_HTTP_MAX_CONNECTIONS", "32"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("APERITIF_HTTP_MAX_KEEPALIVE", "16"))
+TIMEOUT_SECONDS = float(os.environ.get("APERITIF_HTTP_TIMEOUT", "120"))
+CONNECT_TIMEOUT_SECONDS = 10.0
+HTTP2 = os.environ.get("APERITIF_HTTP2", "1") != "0"
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def origin(url: str) -> str:
+    """``scheme://host:port`` of a URL, the unit connections are pooled by"""
+    parts = urlsplit(url)
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port or _DEFAULT_PORTS.get(scheme)
+    return f"{scheme}://{host}:{port}"
+
+
+class _OriginStats:
+    """Requests sent and connections opened to one origin"""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self.http_versions: Dict[str, int] = {}
+
+
+class HttpClientRegistry:
+    """
+    Process-wide ``httpx.Client`` per origin, with connection reuse counters
+
+    New connections are counted through httpcore's ``trace`` request
+    extension, so ``stats`` reports how many requests went over an already
+    open connection rather than a fresh handshake.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS,
+        timeout: float = TIMEOUT_SECONDS,
+        http2: Optional[bool] = None,
+    ):
+        """
+        Args:
+            max_connections: Open connections allowed per origin
+            max_keepalive_connections: Idle connections kept open per origin
+            timeout: Seconds to wait for a response (per request, unless the caller overrides it)
+            http2: Negotiate HTTP/2; defaults to APERITIF_HTTP2 when the ``h2`` package is installed
+        """
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.timeout = timeout
+        if http2 is None:
+            http2 = HTTP2 and importlib.util.find_spec("h2") is not None
+        self.http2 = http2
+        self._clients: Dict[str, "httpx.Client"] = {}
+        self._stats: Dict[str, _OriginStats] = {}
+        self._lock = threading.Lock()
+
+    def get(self, base_url: str) -> "httpx.Client":
+        """Shared client for the origin of ``base_url``, created on first use"""
+        key = origin(base_url)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None or client.is_closed:
+                client = self._create_client(key)
+                self._clients[key] = client
+            return client
+
+    def _create_client(self, key: str) -> "httpx.Client":
+        import httpx
+
+        stats = self._stats.setdefault(key, _OriginStats())
+
+        def trace(event: str, info: Dict[str, Any]):
+            if event == "connection.connect_tcp.started":
+                with self._lock:
+                    stats.connections += 1
+
+        def on_request(request: "httpx.Request"):
+            request.extensions["trace"] = trace
+            with self._lock:
+                stats.requests += 1
+
+        def on_response(response: "httpx.Response"):
+            with self._lock:
+                stats.http_versions[response.http_version] = stats.http_versions.get(response.http_version, 0) + 1
+
+        logger.debug("Creating shared HTTP client for %s (http2=%s)", key, self.http2)
+        return httpx.Client(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+            ),
+            timeout=httpx.Timeout(self.timeout, connect=CONNECT_TIMEOUT_SECONDS),
+            event_hooks={"request": [on_request], "response": [on_response]},
+        )
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per origin: requests, connections opened, requests that reused a connection, and HTTP versions"""
+        with self._lock:
+            report = {}
+            for key, stats in self._stats.items():
+                reused = max(0, stats.requests - stats.connections)
+                report[key] = {
+                    "requests": stats.requests,
+                    "connections": stats.connections,
+                    "reused": reused,
+                    "reuse_rate": reused / stats.requests if stats.requests else 0.0,
+                    "http_versions": dict(stats.http_versions),
+                }
+            return report
+
+    def close(self):
+        """Close every client; the next ``get`` opens a new one"""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.close()
+
+
+_registry: Optional[HttpClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_http_clients() -> HttpClientRegistry:
+    """Return the process-wide HTTP client registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = HttpClientRegistry()
+        return _registry
+
+
+def get_http_client(base_url: str) -> "httpx.Client":
+    """Shared ``httpx.Client`` for the origin of ``base_url``"""
+    return get_http_clients().get(base_url)
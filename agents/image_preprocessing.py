@@ -0,0 +1,153 @@
+import base64
+import io
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+# Pillow is imported by the functions that decode images, keeping it out of agent startup
+if TYPE_CHECKING:
+    from PIL import Image
+
+MIME_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+
+@dataclass
+class PreprocessOptions:
+    """
+    How to shrink an image before sending it to a vision model
+
+    Attributes:
+        roi_size: Side in pixels of the square region kept around the focus point
+            (the pin, or the geocoded point on the legend map); None keeps the whole image
+        max_side: Longest side after downscaling
+        format: "PNG", "JPEG" or "WEBP"
+        quality: Encoder quality for JPEG/WEBP
+        detail: "low", "high" or None to pick "low" whenever the image fits in one 512px tile
+    """
+
+    roi_size: Optional[int] = 800
+    max_side: int = 1024
+    format: str = "JPEG"
+    quality: int = 85
+    detail: Optional[str] = None
+
+
+@dataclass
+class PreparedImage:
+    """An image encoded for a vision request, with before/after sizes"""
+
+    data_url: str
+    detail: str
+    original_bytes: int
+    processed_bytes: int
+    original_size: Tuple[int, int]
+    processed_size: Tuple[int, int]
+    original_tokens: int
+    processed_tokens: int
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "original_bytes": self.original_bytes,
+            "processed_bytes": self.processed_bytes,
+            "bytes_saved": self.original_bytes - self.processed_bytes,
+            "original_size": list(self.original_size),
+            "processed_size": list(self.processed_size),
+            "detail": self.detail,
+            "original_tokens": self.original_tokens,
+            "processed_tokens": self.processed_tokens,
+            "tokens_saved": self.original_tokens - self.processed_tokens,
+        }
+
+
+def estimate_image_tokens(width: int, height: int, detail: str = "high") -> int:
+    """
+    Estimate the input tokens an image costs, following OpenAI's published formula
+
+    Low detail is a flat 85 tokens. High detail fits the image in 2048x2048,
+    scales the shortest side down to 768px and charges 170 tokens per 512px
+    tile plus 85.
+    """
+    if detail == "low":
+        return 85
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 170 * math.ceil(width / 512) * math.ceil(height / 512) + 85
+
+
+def crop_to_roi(img: "Image.Image", focus: Tuple[float, float], size: int) -> "Image.Image":
+    """Crop a ``size`` x ``size`` square centered on ``focus``, shifted to stay inside the image"""
+    width, height = img.size
+    size_x, size_y = min(size, width), min(size, height)
+    left = int(min(max(focus[0] - size_x / 2, 0), width - size_x))
+    top = int(min(max(focus[1] - size_y / 2, 0), height - size_y))
+    return img.crop((left, top, left + size_x, top + size_y))
+
+
+def image_center(data: bytes) -> Tuple[float, float]:
+    """Center pixel of an encoded image (only the header is decoded)"""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as img:
+        return img.size[0] / 2, img.size[1] / 2
+
+
+def encode_data_url(data: bytes, mime_type: str = "image/png") -> str:
+    return f"data:{mime_type};base64,{base64.b64encode(data).decode()}"
+
+
+def preprocess_image(
+    data: bytes, options: PreprocessOptions, focus: Optional[Tuple[float, float]] = None
+) -> PreparedImage:
+    """
+    Crop, downscale and re-encode an image for a vision request
+
+    Args:
+        data: Original encoded image (PNG/JPEG)
+        options: Pre-processing settings
+        focus: Pixel the region of interest is centered on; no cropping without it
+
+    Returns:
+        The prepared image with byte and token accounting
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as original:
+        original_size = original.size
+        img = original.convert("RGB")
+
+    if focus is not None and options.roi_size:
+        img = crop_to_roi(img, focus, options.roi_size)
+    if max(img.size) > options.max_side:
+        img.thumbnail((options.max_side, options.max_side), Image.Resampling.LANCZOS)
+
+    fmt = options.format.upper()
+    buffer = io.BytesIO()
+    if fmt == "PNG":
+        img.save(buffer, format=fmt, optimize=True)
+    else:
+        img.save(buffer, format=fmt, quality=options.quality)
+    processed = buffer.getvalue()
+
+    detail = options.detail or ("low" if max(img.size) <= 512 else "high")
+    return PreparedImage(
+        data_url=encode_data_url(processed, MIME_TYPES[fmt]),
+        detail=detail,
+        original_bytes=len(data),
+        processed_bytes=len(processed),
+        original_size=original_size,
+        processed_size=img.size,
+        original_tokens=estimate_image_tokens(*original_size),
+        processed_tokens=estimate_image_tokens(*img.size, detail=detail),
+    )
+
+
+def summarize_savings(legend: PreparedImage, pin: PreparedImage) -> Dict[str, Any]:
+    """Per-request savings reported in the analysis result"""
+    return {
+        "legend": legend.stats(),
+        "pin": pin.stats(),
+        "bytes_saved": legend.original_bytes + pin.original_bytes - legend.processed_bytes - pin.processed_bytes,
+        "tokens_saved": legend.original_tokens + pin.original_tokens - legend.processed_tokens - pin.processed_tokens,
+    }
@@ -0,0 +1,263 @@
+import io
+import math
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from .vision_agent import NEIGHBORHOOD_TYPES
+
+# Category index of every legend entry; pixels matching nothing get UNKNOWN_LABEL
+CATEGORIES = list(NEIGHBORHOOD_TYPES.keys())
+UNKNOWN_LABEL = 255
+
+# Fill colors of the HoodMaps legend bar, sampled from hoodmaps_screenshot.png
+LEGEND_RGB = {
+    "Offices": (66, 165, 255),
+    "Rich": (43, 222, 115),
+    "Hip": (255, 201, 36),
+    "Tourist": (255, 71, 66),
+    "Uni": (28, 81, 130),
+    "Normies": (204, 204, 204),
+}
+
+# Non-zone colors that sit close to a legend color and must not be counted
+BACKGROUND_RGB = {
+    "water": (133, 203, 250),
+    "road": (255, 255, 255),
+}
+
+# Approximate view of the HoodMaps San Francisco page in a 1280x720 viewport,
+# calibrated against landmarks in hoodmaps_screenshot.png
+HOODMAPS_SF_VIEW = {"lat": 37.7760, "lng": -122.4197, "zoom": 13.0, "width": 1280, "height": 720}
+
+# Part of the capture showing the map; the legend bar and page footer start below it
+HOODMAPS_MAP_AREA = (0, 0, 1280, 668)
+
+EARTH_CIRCUMFERENCE_M = 40075016.686
+
+
+def _mercator(lat: float, lng: float) -> Tuple[float, float]:
+    """Web Mercator world coordinates in [0, 1)"""
+    siny = min(max(math.sin(math.radians(lat)), -0.9999), 0.9999)
+    x = 0.5 + lng / 360.0
+    y = 0.5 - math.log((1 + siny) / (1 - siny)) / (4 * math.pi)
+    return x, y
+
+
+def _inverse_mercator(x: float, y: float) -> Tuple[float, float]:
+    lng = (x - 0.5) * 360.0
+    lat = math.degrees(2 * math.atan(math.exp((0.5 - y) * 2 * math.pi)) - math.pi / 2)
+    return lat, lng
+
+
+class GeoTransform:
+    """
+    Affine transform between Web Mercator world coordinates and image pixels.
+
+    Both Google Maps and HoodMaps render in Web Mercator, so a screenshot is an
+    affine image of world coordinates: ``[px, py] = matrix @ [wx, wy, 1]``.
+    """
+
+    def __init__(self, matrix: Sequence[Sequence[float]]):
+        self.matrix = np.asarray(matrix, dtype=np.float64).reshape(2, 3)
+        self._inverse = np.linalg.inv(np.vstack([self.matrix, [0.0, 0.0, 1.0]]))[:2]
+
+    @classmethod
+    def from_view(
+        cls, lat: float, lng: float, zoom: float, width: int, height: int, tile_size: int = 256
+    ) -> "GeoTransform":
+        """Transform of a map centered on (lat, lng) at a zoom level, as in generate_map_html()"""
+        scale = tile_size * 2 ** zoom
+        cx, cy = _mercator(lat, lng)
+        return cls([[scale, 0.0, width / 2 - cx * scale], [0.0, scale, height / 2 - cy * scale]])
+
+    @classmethod
+    def from_bounds(
+        cls, north: float, south: float, east: float, west: float, width: int, height: int
+    ) -> "GeoTransform":
+        """Transform of an image whose edges are the given latitudes and longitudes"""
+        left, top = _mercator(north, west)
+        right, bottom = _mercator(south, east)
+        sx = width / (right - left)
+        sy = height / (bottom - top)
+        return cls([[sx, 0.0, -left * sx], [0.0, sy, -top * sy]])
+
+    @classmethod
+    def from_control_points(cls, points: Sequence[Tuple[float, float, float, float]]) -> "GeoTransform":
+        """
+        Least-squares fit from landmarks
+
+        Args:
+            points: At least three ``(lat, lng, x, y)`` pairs of known locations
+        """
+        if len(points) < 3:
+            raise ValueError("At least three control points are needed")
+        world = np.array([[*_mercator(lat, lng), 1.0] for lat, lng, _, _ in points])
+        pixels = np.array([[x, y] for _, _, x, y in points], dtype=np.float64)
+        solution, *_ = np.linalg.lstsq(world, pixels, rcond=None)
+        return cls(solution.T)
+
+    def to_pixel(self, lat: float, lng: float) -> Tuple[float, float]:
+        x, y = self.matrix @ np.array([*_mercator(lat, lng), 1.0])
+        return float(x), float(y)
+
+    def to_latlng(self, x: float, y: float) -> Tuple[float, float]:
+        wx, wy = self._inverse @ np.array([x, y, 1.0])
+        return _inverse_mercator(wx, wy)
+
+    def meters_per_pixel(self, lat: float) -> float:
+        pixels_per_world = math.sqrt(abs(np.linalg.det(self.matrix[:, :2])))
+        return EARTH_CIRCUMFERENCE_M * math.cos(math.radians(lat)) / pixels_per_world
+
+
+def quantize_labels(rgb: np.ndarray, max_distance: float = 60.0) -> np.ndarray:
+    """
+    Map every pixel to the index of the nearest legend color
+
+    Args:
+        rgb: ``(H, W, 3)`` uint8 image
+        max_distance: Largest RGB distance still counted as a legend color
+
+    Returns:
+        ``(H, W)`` uint8 array of category indices, UNKNOWN_LABEL elsewhere
+    """
+    palette = np.array(list(LEGEND_RGB.values()) + list(BACKGROUND_RGB.values()), dtype=np.int32)
+    pixels = rgb.reshape(-1, 3).astype(np.int32)
+
+    # One palette color at a time keeps the temporaries at O(pixels) instead of O(pixels * colors)
+    best = np.full(len(pixels), np.iinfo(np.int32).max, dtype=np.int32)
+    labels = np.zeros(len(pixels), dtype=np.uint8)
+    for index, color in enumerate(palette):
+        distance = ((pixels - color) ** 2).sum(axis=1)
+        closer = distance < best
+        best[closer] = distance[closer]
+        labels[closer] = index
+
+    labels[(labels >= len(LEGEND_RGB)) | (best > max_distance ** 2)] = UNKNOWN_LABEL
+    return labels.reshape(rgb.shape[:2])
+
+
+def summarize_labels(
+    labels: np.ndarray, model_used: str, method: str, pixel: Tuple[float, float]
+) -> Dict[str, Any]:
+    """Turn a window of category labels into an analyze_with_reference()-style result"""
+    counts = np.bincount(labels[labels != UNKNOWN_LABEL].ravel(), minlength=len(CATEGORIES))[: len(CATEGORIES)]
+    classified = int(counts.sum())
+    if classified == 0:
+        return _error_result("No neighborhood colors found around the point", model_used, method)
+
+    shares = {name: round(int(count) / classified, 3) for name, count in zip(CATEGORIES, counts) if count}
+    neighborhood_type = CATEGORIES[int(counts.argmax())]
+    confidence = shares[neighborhood_type]
+    breakdown = ", ".join(f"{name} {share:.0%}" for name, share in sorted(shares.items(), key=lambda kv: -kv[1]))
+
+    return {
+        "success": True,
+        "model_used": model_used,
+        "raw_analysis": f"Predominant zone: {neighborhood_type} ({breakdown}; {classified} pixels)",
+        "neighborhood_type": neighborhood_type,
+        "neighborhood_info": NEIGHBORHOOD_TYPES[neighborhood_type],
+        "error": None,
+        "method": method,
+        "confidence": confidence,
+        "category_shares": shares,
+        "coverage": round(classified / labels.size, 3),
+        "pixel": [round(pixel[0], 1), round(pixel[1], 1)],
+    }
+
+
+def classify_labels_at(
+    labels: np.ndarray,
+    transform: GeoTransform,
+    lat: float,
+    lng: float,
+    radius_m: float,
+    model_used: str,
+    method: str,
+) -> Dict[str, Any]:
+    """Classify the circular window of ``labels`` within ``radius_m`` of (lat, lng)"""
+    start = time.perf_counter()
+    x, y = transform.to_pixel(lat, lng)
+    height, width = labels.shape
+    if not (0 <= x < width and 0 <= y < height):
+        return _error_result(f"Point ({lat}, {lng}) is outside the reference map", model_used, method)
+
+    radius_px = max(1, int(round(radius_m / transform.meters_per_pixel(lat))))
+    x0, x1 = max(0, int(x) - radius_px), min(width, int(x) + radius_px + 1)
+    y0, y1 = max(0, int(y) - radius_px), min(height, int(y) + radius_px + 1)
+    window = np.asarray(labels[y0:y1, x0:x1])
+
+    yy, xx = np.ogrid[y0:y1, x0:x1]
+    inside = (xx - x) ** 2 + (yy - y) ** 2 <= radius_px ** 2
+    result = summarize_labels(window[inside], model_used, method, (x, y))
+    result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+
+def _error_result(error: str, model_used: str, method: str) -> Dict[str, Any]:
+    return {
+        "success": False,
+        "model_used": model_used,
+        "raw_analysis": None,
+        "neighborhood_type": None,
+        "neighborhood_info": None,
+        "error": error,
+        "method": method,
+    }
+
+
+class LocalNeighborhoodClassifier:
+    """
+    Offline neighborhood classifier reading zone colors straight from a HoodMaps capture.
+
+    The capture is georeferenced once and quantized to legend categories, after
+    which classifying a point is a window slice plus a ``bincount`` - no model
+    round trip. Results use the same dict shape as
+    ``VisionAgent.analyze_with_reference`` plus ``confidence`` and
+    ``category_shares``.
+    """
+
+    model_name = "local-pixel-classifier"
+    method = "local pixel lookup"
+
+    def __init__(
+        self,
+        reference_map: Union[str, bytes],
+        transform: Optional[GeoTransform] = None,
+        map_area: Optional[Tuple[int, int, int, int]] = HOODMAPS_MAP_AREA,
+        max_color_distance: float = 60.0,
+    ):
+        """
+        Args:
+            reference_map: Path to, or PNG bytes of, a HoodMaps capture
+            transform: Pixel <-> lat/lng transform (defaults to HOODMAPS_SF_VIEW)
+            map_area: ``(left, top, right, bottom)`` of the map inside the capture
+            max_color_distance: RGB distance within which a pixel matches a legend color
+        """
+        source = io.BytesIO(reference_map) if isinstance(reference_map, bytes) else reference_map
+        with Image.open(source) as img:
+            rgb = np.asarray(img.convert("RGB"))
+
+        self.transform = transform or GeoTransform.from_view(**HOODMAPS_SF_VIEW)
+        self.labels = quantize_labels(rgb, max_color_distance)
+        if map_area is not None:
+            left, top, right, bottom = map_area
+            valid = np.zeros(self.labels.shape, dtype=bool)
+            valid[top:bottom, left:right] = True
+            self.labels[~valid] = UNKNOWN_LABEL
+
+    def classify_point(self, lat: float, lng: float, radius_m: float = 300.0) -> Dict[str, Any]:
+        """
+        Classify the area within ``radius_m`` of a point
+
+        Args:
+            lat: Latitude of the geocoded address
+            lng: Longitude of the geocoded address
+            radius_m: Radius of the surrounding area (300m is roughly 4-6 blocks)
+
+        Returns:
+            Dictionary with neighborhood analysis
+        """
+        return classify_labels_at(self.labels, self.transform, lat, lng, radius_m, self.model_name, self.method)
@@ -0,0 +1,140 @@
+import logging
+import os
+
+# browser_pool and page_readiness pull in Playwright, so they are imported by
+# the functions that drive a page rather than when this module is loaded
+from .reference_cache import CachedReference, get_reference_cache
+from .tracing import span
+
+HOODMAPS_URL = "https://hoodmaps.com/san-francisco-neighborhood-map"
+HOODMAPS_VIEWPORT = {"width": 1280, "height": 720}
+
+
+def generate_map_html(lat: float, lng: float, api_key: str) -> str:
+    from .page_readiness import TILES_LOADED_FLAG
+
+    return f"""
+<!DOCTYPE html>
+<html>
+  <head>
+    <title>Map Screenshot</title>
+    <style>
+      html, body, #map {{
+        margin: 0;
+        padding: 0;
+        height: 100%;
+        width: 100%;
+      }}
+    </style>
+    <script src="https://maps.googleapis.com/maps/api/js?key={api_key}"></script>
+    <script>
+      function initMap() {{
+        const center = {{ lat: {lat}, lng: {lng} }};
+        const map = new google.maps.Map(document.getElementById("map"), {{
+          zoom: 13,
+          center: center,
+          disableDefaultUI: true
+        }});
+        new google.maps.Marker({{
+          position: center,
+          map: map
+        }});
+        google.maps.event.addListenerOnce(map, "tilesloaded", () => {{
+          window.{TILES_LOADED_FLAG} = true;
+        }});
+      }}
+      window.onload = initMap;
+    </script>
+  </head>
+  <body>
+    <div id="map"></div>
+  </body>
+</html>
+"""
+
+
+async def capture_hoodmaps_page(page) -> bytes:
+    """Open HoodMaps, switch to the zone view and return a full-page PNG"""
+    from .page_readiness import PageReadiness
+
+    ready = PageReadiness(page, label="hoodmaps")
+    await ready.goto(HOODMAPS_URL)
+    await ready.map_rendered()
+
+    await ready.click("div.action-toggle-tags")
+    await ready.click("div.action-toggle-shapes")
+    await ready.click("div.action-toggle-shapes")
+    await ready.network_idle(timeout_ms=3000)
+    await ready.map_rendered(timeout_ms=3000)
+    ready.timings()
+
+    return await page.screenshot(full_page=True)
+
+
+def hoodmaps_reference() -> CachedReference:
+    """Return the HoodMaps reference map, capturing it only when the cache is empty"""
+    from .browser_pool import get_browser_pool
+
+    # The city-wide map is the same for every address, so reuse the cached capture
+    with span("capture.hoodmaps", source="reference_cache") as capture_span:
+        reference = get_reference_cache().get(
+            lambda: get_browser_pool().run(capture_hoodmaps_page), viewport=HOODMAPS_VIEWPORT
+        )
+        capture_span.set(bytes=len(reference.data), stale=reference.stale)
+    logging.info(f"Hoodmaps reference map at {reference.path} (stale={reference.stale})")
+    return reference
+
+
+# The pin page is served by request routing on each page, never from a socket,
+# but the Maps JS API sees this URL as the page's referrer. A key restricted by
+# HTTP referrer rejects it unless its origin is on the key's allowed referrers,
+# so either allow-list it or point APERITIF_PIN_PAGE_URL at an allowed origin.
+PIN_PAGE_URL = os.environ.get("APERITIF_PIN_PAGE_URL", "http://aperitif.localhost/pin-map")
+
+
+async def take_screenshot(page, html: str) -> bytes:
+    """Render ``html`` at PIN_PAGE_URL on ``page`` and return a full-page PNG"""
+    from .page_readiness import PageReadiness
+
+    async def fulfill(route):
+        await route.fulfill(status=200, content_type="text/html", body=html)
+
+    await page.route(PIN_PAGE_URL, fulfill)
+    ready = PageReadiness(page, label="googlemaps")
+    await ready.goto(PIN_PAGE_URL)
+    await ready.tiles_loaded()
+    await ready.network_idle(timeout_ms=2000)
+    ready.timings()
+    return await page.screenshot(full_page=True)
+
+
+def capture_pin_map(lat: float, lng: float, api_key: str) -> bytes:
+    """
+    Render a Google Map with a pin at (lat, lng) and return it as PNG bytes
+
+    Safe to call from many threads at once: each capture gets its own pooled
+    page with its own route, so concurrency is bounded only by the pool size.
+
+    Args:
+        lat: Latitude of the pin
+        lng: Longitude of the pin
+        api_key: Google Maps JavaScript API key
+    """
+    from .browser_pool import get_browser_pool
+
+    html = generate_map_html(lat, lng, api_key)
+    with span("capture.googlemaps", source="browser_pool") as capture_span:
+        png = get_browser_pool().run(lambda page: take_screenshot(page, html))
+        capture_span.set(bytes=len(png))
+    return png
+
+
+async def capture_pin_map_async(lat: float, lng: float, api_key: str) -> bytes:
+    """Awaitable variant of ``capture_pin_map``"""
+    from .browser_pool import get_browser_pool
+
+    html = generate_map_html(lat, lng, api_key)
+    with span("capture.googlemaps", source="browser_pool") as capture_span:
+        png = await get_browser_pool().run_async(lambda page: take_screenshot(page, html))
+        capture_span.set(bytes=len(png))
+    return png
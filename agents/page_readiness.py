@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Flag set by the tilesloaded listener injected into generate_map_html()
+TILES_LOADED_FLAG = "__aperitifTilesLoaded"
+
+# True once a map canvas has a drawable size and no raster tiles are still loading.
+# Covers the MapLibre/Mapbox canvas used by HoodMaps and Leaflet-style <img> tiles.
+MAP_RENDERED_JS = """
+() => {
+  const canvas = document.querySelector("canvas");
+  if (!canvas || canvas.width === 0 || canvas.height === 0) return false;
+  for (const tile of document.querySelectorAll("img.leaflet-tile, .gm-style img")) {
+    if (!tile.complete) return false;
+  }
+  const map = window.map;
+  if (map && typeof map.areTilesLoaded === "function") return map.areTilesLoaded();
+  return true;
+}
+""".strip()
+
+# Resolves after two animation frames, i.e. once the last DOM change has been painted
+NEXT_PAINT_JS = "() => new Promise(r => requestAnimationFrame(() => requestAnimationFrame(() => r(true))))"
+
+
+class PageReadiness:
+    """
+    Waits for real page-readiness signals instead of fixed sleeps.
+
+    Every step gets its own timeout, capped by what is left of the overall
+    budget, and its duration is recorded in a timing log. Signal steps are
+    best-effort: if one times out the capture carries on (the old fixed
+    sleeps gave no guarantee either), while action steps such as clicks
+    still raise.
+    """
+
+    def __init__(self, page: Page, label: str = "capture", budget_ms: int = 30000):
+        """
+        Args:
+            page: Page being prepared for a screenshot
+            label: Name used in the timing log
+            budget_ms: Total time all steps together may spend waiting
+        """
+        self.page = page
+        self.label = label
+        self.budget_ms = budget_ms
+        self.steps: List[Dict[str, Any]] = []
+        self._started = time.perf_counter()
+
+    @property
+    def remaining_ms(self) -> int:
+        elapsed = (time.perf_counter() - self._started) * 1000
+        return max(0, int(self.budget_ms - elapsed))
+
+    async def step(
+        self,
+        name: str,
+        wait: Callable[[int], Awaitable[Any]],
+        timeout_ms: int,
+        required: bool = False,
+    ) -> bool:
+        """
+        Run one readiness step and record how long it took
+
+        Args:
+            name: Step name for the timing log
+            wait: Coroutine function receiving the step timeout in milliseconds
+            timeout_ms: Step budget, capped by the remaining overall budget
+            required: Re-raise on timeout instead of continuing
+
+        Returns:
+            True if the signal was observed before the timeout
+        """
+        timeout = max(1, min(timeout_ms, self.remaining_ms))
+        start = time.perf_counter()
+        ok = True
+        try:
+            await wait(timeout)
+        except (PlaywrightTimeoutError, asyncio.TimeoutError):
+            ok = False
+            if required:
+                raise
+            logger.warning("%s: %s not ready after %dms, continuing", self.label, name, timeout)
+        except Exception:
+            ok = False
+            raise
+        finally:
+            elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+            self.steps.append({"step": name, "ms": elapsed_ms, "timeout_ms": timeout, "ok": ok})
+        return ok
+
+    async def goto(self, url: str, timeout_ms: int = 30000):
+        """Navigate and wait for DOMContentLoaded rather than the full load event"""
+        await self.step(
+            "goto",
+            lambda t: self.page.goto(url, wait_until="domcontentloaded", timeout=t),
+            timeout_ms,
+            required=True,
+        )
+
+    async def network_idle(self, timeout_ms: int = 5000) -> bool:
+        """Wait until there have been no network connections for 500ms"""
+        return await self.step(
+            "network_idle", lambda t: self.page.wait_for_load_state("networkidle", timeout=t), timeout_ms
+        )
+
+    async def map_rendered(self, timeout_ms: int = 10000) -> bool:
+        """Wait for the map canvas to be sized and all visible tiles to be loaded"""
+        return await self.step(
+            "map_rendered",
+            lambda t: self.page.wait_for_function(MAP_RENDERED_JS, timeout=t, polling="raf"),
+            timeout_ms,
+        )
+
+    async def tiles_loaded(self, timeout_ms: int = 10000) -> bool:
+        """Wait for the Google Maps ``tilesloaded`` hook to fire"""
+        return await self.step(
+            "tiles_loaded",
+            lambda t: self.page.wait_for_function(f"() => window.{TILES_LOADED_FLAG} === true", timeout=t),
+            timeout_ms,
+        )
+
+    async def click(self, selector: str, timeout_ms: int = 10000):
+        """Click once the element is actionable, then wait for the change to be painted"""
+        await self.step(
+            f"click {selector}", lambda t: self.page.click(selector, timeout=t), timeout_ms, required=True
+        )
+        await self.step("paint", lambda t: asyncio.wait_for(self.page.evaluate(NEXT_PAINT_JS), t / 1000), 1000)
+
+    def timings(self) -> Dict[str, Any]:
+        """Return the timing log and write a one-line summary to the logger"""
+        total_ms = round((time.perf_counter() - self._started) * 1000, 1)
+        summary = ", ".join(f"{s['step']}={s['ms']:.0f}ms{'' if s['ok'] else '(timeout)'}" for s in self.steps)
+        logger.info("%s ready in %.0fms: %s", self.label, total_ms, summary)
+        return {"label": self.label, "total_ms": total_ms, "steps": self.steps}
@@ -0,0 +1,197 @@
+"""
+Fast path for single-address questions
+
+    from agents.pipeline import analyze_address
+    result = analyze_address("208 Anza St, San Francisco, CA")
+
+Runs geocode -> (pin capture || reference map) -> classify directly, with no
+LLM deciding which tools to call. The conversational agent routes questions
+like "what kind of neighborhood is 208 Anza St?" here and leaves everything
+else to the full tool-calling loop.
+"""
+
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from .geocoding import GeocodingError, get_geocoder
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Questions answered by the fast path; the named group is the address
+ADDRESS_QUERY_PATTERNS = [
+    re.compile(
+        r"^\s*(?:what|which)\s+(?:kind|type|sort)\s+of\s+(?:neighbou?rhood|area|hood|zone)\s+"
+        r"is\s+(?:the\s+address\s+)?(?:at\s+|in\s+)?(?P<address>.+?)\s*(?:\bin\b\s*)?[?.!]*\s*$",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"^\s*(?:please\s+)?(?:analy[sz]e|classify)\s+(?:the\s+)?(?:neighbou?rhood|area)\s+"
+        r"(?:at|of|for|around)\s+(?P<address>.+?)\s*[?.!]*\s*$",
+        re.IGNORECASE,
+    ),
+]
+
+# Words that show the "address" is really a follow-up question, e.g. "what kind of area is it?"
+_NOT_AN_ADDRESS = {"it", "this", "that", "there", "here", "this one", "that one"}
+
+
+def match_address_query(message: str) -> Optional[str]:
+    """
+    Return the address of a "what kind of neighborhood is <address>" question
+
+    Returns:
+        The address, or None when the message needs the full agent
+    """
+    for pattern in ADDRESS_QUERY_PATTERNS:
+        match = pattern.match(message)
+        if match:
+            address = match.group("address").strip(" ,")
+            if address and address.lower() not in _NOT_AN_ADDRESS:
+                return address
+    return None
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def capture_pin(lat: float, lng: float, api_key: str) -> bytes:
+    """Pin map from the scraper daemon when it is up, otherwise from the local browser pool"""
+    from .scraper_client import ScraperUnavailable, get_scraper_client
+
+    try:
+        return get_scraper_client().capture("googlemaps", lat=lat, lng=lng)
+    except ScraperUnavailable as e:
+        logger.info("Scraper daemon unavailable (%s), capturing with the browser pool", e)
+
+    from .map_capture import capture_pin_map
+
+    return capture_pin_map(lat, lng, api_key)
+
+
+def _reference_png() -> bytes:
+    from .map_capture import hoodmaps_reference
+
+    return hoodmaps_reference().data
+
+
+_vision_agent = None
+_vision_agent_lock = threading.Lock()
+
+
+def _default_vision_agent():
+    global _vision_agent
+    with _vision_agent_lock:
+        if _vision_agent is None:
+            from .vision_agent import VisionAgent
+
+            _vision_agent = VisionAgent(use_openai=True)
+        return _vision_agent
+
+
+def analyze_address(
+    address: str,
+    api_key: Optional[str] = None,
+    vision_agent=None,
+) -> Dict[str, Any]:
+    """
+    Classify the neighborhood of one address without a planner LLM
+
+    The pin map and the HoodMaps reference are captured concurrently once the
+    address is geocoded; the reference usually comes straight from the
+    reference cache, so the stage costs about one pin capture.
+
+    Args:
+        address: Street address or place name
+        api_key: Google Maps API key (defaults to GOOGLE_MAP_API_KEY)
+        vision_agent: VisionAgent used to classify (a shared GPT-4o agent if omitted)
+
+    Returns:
+        The vision result plus ``address``, ``lat``, ``lng``, ``method`` and
+        ``timings`` (milliseconds per stage: geocode, pin_capture, reference,
+        capture, classify, total). Failures have ``success`` False and ``stage``
+        naming the stage that failed.
+    """
+    with span("pipeline.analyze_address") as pipeline_span:
+        result = _run_pipeline(address, api_key, vision_agent)
+        pipeline_span.set(success=bool(result.get("success")), failed_stage=result.get("stage"))
+        return result
+
+
+def _run_pipeline(address: str, api_key: Optional[str], vision_agent) -> Dict[str, Any]:
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+
+    def _failed(stage: str, error: str) -> Dict[str, Any]:
+        timings["total"] = _elapsed_ms(started)
+        return {
+            "success": False,
+            "address": address,
+            "stage": stage,
+            "error": error,
+            "method": "fast_path",
+            "timings": timings,
+        }
+
+    api_key = api_key or os.getenv("GOOGLE_MAP_API_KEY")
+    if not api_key:
+        return _failed("geocode", "GOOGLE_MAP_API_KEY not set in environment.")
+
+    stage_started = time.perf_counter()
+    try:
+        lat, lng = get_geocoder(api_key).geocode(address)
+    except GeocodingError as e:
+        return _failed("geocode", e.status)
+    except Exception as e:
+        return _failed("geocode", str(e))
+    timings["geocode"] = _elapsed_ms(stage_started)
+
+    def _timed(name: str, work, *args):
+        work_started = time.perf_counter()
+        try:
+            return work(*args)
+        finally:
+            timings[name] = _elapsed_ms(work_started)
+
+    stage_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="fast-path") as executor:
+        # Each worker runs in a copy of this context so its spans nest under the pipeline span
+        pin_future = executor.submit(
+            contextvars.copy_context().run, _timed, "pin_capture", capture_pin, lat, lng, api_key
+        )
+        reference_future = executor.submit(contextvars.copy_context().run, _timed, "reference", _reference_png)
+        try:
+            pin_png = pin_future.result()
+            reference_png = reference_future.result()
+        except Exception as e:
+            return _failed("capture", str(e))
+    timings["capture"] = _elapsed_ms(stage_started)
+
+    from .local_classifier import HOODMAPS_SF_VIEW, GeoTransform
+
+    stage_started = time.perf_counter()
+    legend_focus = GeoTransform.from_view(**HOODMAPS_SF_VIEW).to_pixel(lat, lng)
+    result = (vision_agent or _default_vision_agent()).analyze_images(reference_png, pin_png, legend_focus)
+    timings["classify"] = _elapsed_ms(stage_started)
+    timings["total"] = _elapsed_ms(started)
+
+    if not result.get("success"):
+        result = {**result, "stage": "classify"}
+    return {**result, "address": address, "lat": lat, "lng": lng, "method": "fast_path", "timings": timings}
+
+
+def format_timings(timings: Dict[str, float]) -> str:
+    """One-line stage latency summary, e.g. ``geocode 12ms · capture 2.31s · classify 3.02s · total 5.35s``"""
+    parts = []
+    for name in ("geocode", "capture", "classify", "total"):
+        if name in timings:
+            ms = timings[name]
+            parts.append(f"{name} {ms:.0f}ms" if ms < 1000 else f"{name} {ms / 1000:.2f}s")
+    return " · ".join(parts)
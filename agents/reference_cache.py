@@ -0,0 +1,241 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("APERITIF_CACHE_DIR", os.path.expanduser("~/.cache/aperitif")), "reference_maps"
+)
+DEFAULT_TTL_SECONDS = int(os.environ.get("APERITIF_REFERENCE_TTL", str(24 * 60 * 60)))
+
+
+def perceptual_hash(png_bytes: bytes) -> str:
+    """
+    Difference hash (dHash) of an image as 16 hex characters
+
+    Two captures of an unchanged map hash to the same or a very close value
+    even when PNG encoding or antialiasing differs byte-for-byte.
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(png_bytes)) as img:
+        small = img.convert("L").resize((9, 8), Image.Resampling.LANCZOS)
+        pixels = list(small.getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (1 if left > right else 0)
+    return f"{bits:016x}"
+
+
+def hash_distance(a: str, b: str) -> int:
+    """Number of differing bits between two perceptual hashes"""
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def _cache_key(city: str, zoom: int, viewport: Optional[Dict[str, int]]) -> Tuple[str, int, str]:
+    size = f"{viewport['width']}x{viewport['height']}" if viewport else "default"
+    return city, zoom, size
+
+
+@dataclass
+class CachedReference:
+    """A cached reference map capture"""
+
+    path: str
+    data: bytes
+    metadata: Dict[str, Any]
+    stale: bool = False
+
+
+class ReferenceMapCache:
+    """
+    On-disk cache for the city-wide HoodMaps reference capture.
+
+    Entries are keyed by city, zoom and viewport and stored as
+    ``<city>_z<zoom>_<width>x<height>.png`` plus a JSON sidecar holding the
+    capture time and the content and perceptual hashes. Captures of different
+    viewport sizes never stand in for each other, since pixel lookups on the map
+    depend on its size. Fresh entries are served straight from memory; an expired
+    entry is still served while a single background thread re-captures it.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        """
+        Args:
+            cache_dir: Directory holding the PNGs and metadata sidecars
+            ttl_seconds: Age after which an entry is refreshed in the background
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Tuple[str, int, str], CachedReference] = {}
+        self._lock = threading.Lock()
+        self._miss_lock = threading.Lock()
+        self._refreshing: Dict[Tuple[str, int, str], threading.Thread] = {}
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "captures": 0}
+
+    def _paths(self, key: Tuple[str, int, str]) -> Tuple[str, str]:
+        city, zoom, size = key
+        base = os.path.join(self.cache_dir, f"{city}_z{zoom}_{size}")
+        return f"{base}.png", f"{base}.json"
+
+    def _load(self, key: Tuple[str, int, str], viewport: Optional[Dict[str, int]]) -> Optional[CachedReference]:
+        png_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                metadata = json.load(f)
+            with open(png_path, "rb") as f:
+                data = f.read()
+        except (OSError, ValueError):
+            return None
+        if hashlib.sha256(data).hexdigest() != metadata.get("sha256"):
+            logger.warning("Reference map %s does not match its metadata, ignoring it", png_path)
+            return None
+        if metadata.get("viewport") != viewport:
+            logger.warning("Reference map %s was captured at viewport %s, ignoring it", png_path, metadata.get("viewport"))
+            return None
+        return CachedReference(path=png_path, data=data, metadata=metadata)
+
+    def _is_expired(self, entry: CachedReference) -> bool:
+        return time.time() - entry.metadata.get("captured_at", 0) > self.ttl_seconds
+
+    def _store(self, key: Tuple[str, int, str], data: bytes, viewport: Optional[Dict[str, int]]) -> CachedReference:
+        """Hash and write a capture to disk; called without ``_lock`` so readers never wait on file I/O"""
+        city, zoom, _ = key
+        png_path, meta_path = self._paths(key)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        with self._lock:
+            previous = self._entries.get(key)
+        metadata = {
+            "city": city,
+            "zoom": zoom,
+            "captured_at": time.time(),
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "phash": perceptual_hash(data),
+            "viewport": viewport,
+            "bytes": len(data),
+        }
+        if previous is not None and previous.metadata.get("phash"):
+            distance = hash_distance(previous.metadata["phash"], metadata["phash"])
+            metadata["changed"] = distance > 4
+            logger.info("Reference map %s_z%d refreshed (phash distance %d)", city, zoom, distance)
+
+        # Write the PNG before the sidecar so a crash never leaves metadata pointing at a torn image
+        for path, payload, mode in ((png_path, data, "wb"), (meta_path, json.dumps(metadata, indent=2), "w")):
+            tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+            with open(tmp_path, mode) as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+
+        return CachedReference(path=png_path, data=data, metadata=metadata)
+
+    def refresh(
+        self,
+        capture: Callable[[], bytes],
+        city: str = "san-francisco",
+        zoom: int = 13,
+        viewport: Optional[Dict[str, int]] = None,
+    ) -> CachedReference:
+        """Capture the reference map now and replace the cached copy"""
+        data = capture()
+        key = _cache_key(city, zoom, viewport)
+        entry = self._store(key, data, viewport)
+        with self._lock:
+            self.stats["captures"] += 1
+            self._entries[key] = entry
+        return entry
+
+    def _refresh_in_background(self, key: Tuple[str, int, str], capture: Callable[[], bytes], viewport):
+        def _worker():
+            try:
+                self.refresh(capture, key[0], key[1], viewport)
+            except Exception as e:
+                logger.warning("Background refresh of reference map %s_z%d failed: %s", key[0], key[1], e)
+            finally:
+                with self._lock:
+                    self._refreshing.pop(key, None)
+
+        thread = threading.Thread(target=_worker, name=f"reference-refresh-{key[0]}", daemon=True)
+        self._refreshing[key] = thread
+        thread.start()
+
+    def get(
+        self,
+        capture: Callable[[], bytes],
+        city: str = "san-francisco",
+        zoom: int = 13,
+        viewport: Optional[Dict[str, int]] = None,
+    ) -> CachedReference:
+        """
+        Return the cached reference map, capturing it only when nothing is cached
+
+        Args:
+            capture: Function returning freshly captured PNG bytes
+            city: City slug used in the cache key
+            zoom: Map zoom level used in the cache key
+            viewport: Viewport ``capture`` renders at, part of the cache key
+
+        Returns:
+            The cached entry; ``stale`` is set when a background refresh was started
+        """
+        key = _cache_key(city, zoom, viewport)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load(key, viewport)
+                if entry is not None:
+                    self._entries[key] = entry
+
+            if entry is not None:
+                if not self._is_expired(entry):
+                    self.stats["hits"] += 1
+                    return entry
+                self.stats["stale_hits"] += 1
+                if key not in self._refreshing:
+                    self._refresh_in_background(key, capture, viewport)
+                return CachedReference(entry.path, entry.data, entry.metadata, stale=True)
+
+        # Serialize cold captures so concurrent first requests share one capture
+        with self._miss_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self.stats["hits"] += 1
+                    return entry
+                self.stats["misses"] += 1
+            return self.refresh(capture, city, zoom, viewport)
+
+    def invalidate(self, city: str = "san-francisco", zoom: int = 13, viewport: Optional[Dict[str, int]] = None):
+        """Drop a cached entry from memory and disk"""
+        key = _cache_key(city, zoom, viewport)
+        with self._lock:
+            self._entries.pop(key, None)
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+
+_default_cache: Optional[ReferenceMapCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_reference_cache() -> ReferenceMapCache:
+    """Return the process-wide reference map cache"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ReferenceMapCache()
+        return _default_cache
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.environ.get("APERITIF_CACHE_DIR", os.path.expanduser("~/.cache/aperitif")), "vision_results.sqlite3"
+)
+DEFAULT_MAX_BYTES = int(float(os.environ.get("APERITIF_RESULT_CACHE_MB", "50")) * 1024 * 1024)
+
+
+def content_hash(data: str) -> str:
+    """Hash of an image payload (a data URL) as sent to the model"""
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def result_cache_key(
+    pin_hash: str, legend_hash: str, model_name: str, prompt_version: str, temperature: float
+) -> str:
+    """Cache key of one vision analysis"""
+    return hashlib.sha256(
+        json.dumps([pin_hash, legend_hash, model_name, prompt_version, temperature]).encode()
+    ).hexdigest()
+
+
+class VisionResultCache:
+    """
+    Memoized vision analysis results: an in-process LRU in front of a SQLite store.
+
+    The store is bounded by the total size of the serialized results; once it
+    grows past ``max_bytes`` the least recently used rows are deleted. Rows
+    record the model and prompt version so that ``invalidate()`` can drop
+    everything produced by an outdated prompt.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES, lru_size: int = 256):
+        """
+        Args:
+            path: SQLite database file (":memory:" keeps everything in-process)
+            max_bytes: Size bound of the on-disk store
+            lru_size: Number of results kept in the in-process LRU
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, prompt_version TEXT NOT NULL, "
+            "result TEXT NOT NULL, size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+        self._db.commit()
+        self.max_bytes = max_bytes
+        self._lru: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lru_size = lru_size
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result for ``key``, or None"""
+        with self._lock:
+            result = self._lru.get(key)
+            if result is not None:
+                self._lru.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return dict(result)
+            row = self._db.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._db.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            result = json.loads(row[0])
+            self._remember(key, result)
+            self.stats["disk_hits"] += 1
+            return dict(result)
+
+    def put(self, key: str, result: Dict[str, Any], model_name: str, prompt_version: str):
+        serialized = json.dumps(result)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, model, prompt_version, result, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model_name, prompt_version, serialized, len(serialized), now, now),
+            )
+            self._evict()
+            self._db.commit()
+            self._remember(key, result)
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM results ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+            self._lru.pop(key, None)
+            total -= size
+            self.stats["evictions"] += 1
+
+    def _remember(self, key: str, result: Dict[str, Any]):
+        self._lru[key] = result
+        self._lru.move_to_end(key)
+        while len(self._lru) > self._lru_size:
+            self._lru.popitem(last=False)
+
+    def invalidate(self, model_name: Optional[str] = None, prompt_version: Optional[str] = None) -> int:
+        """
+        Drop cached results, e.g. after the prompt text changes
+
+        Args:
+            model_name: Only drop results from this model
+            prompt_version: Only drop results produced with this prompt version
+
+        Returns:
+            Number of rows deleted from the on-disk store
+        """
+        clauses, params = [], []
+        if model_name is not None:
+            clauses.append("model = ?")
+            params.append(model_name)
+        if prompt_version is not None:
+            clauses.append("prompt_version = ?")
+            params.append(prompt_version)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            deleted = self._db.execute(f"DELETE FROM results{where}", params).rowcount
+            self._db.commit()
+            # The LRU does not record model/prompt, so it is simply emptied
+            self._lru.clear()
+        return deleted
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_result_cache: Optional[VisionResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> VisionResultCache:
+    """Return the process-wide vision result cache"""
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = VisionResultCache()
+        return _result_cache
@@ -0,0 +1,160 @@
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from .tracing import span
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCRAPER_URL = os.environ.get("APERITIF_SCRAPER_URL", "http://127.0.0.1:8765")
+
+
+class ScraperUnavailable(RuntimeError):
+    """The scraper daemon is not running or its browser is unhealthy"""
+
+
+class ScraperClient:
+    """
+    Client for the long-running Go scraper daemon (``aperitif_scraper/cmd/daemon``).
+
+    Requests share a keep-alive connection pool. The daemon's health is
+    checked at most every ``health_interval`` seconds and a failed request
+    marks it unhealthy until the next successful check, so callers can fall
+    back quickly instead of waiting for timeouts.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_SCRAPER_URL,
+        pool_size: int = 4,
+        timeout: float = 90.0,
+        health_interval: float = 10.0,
+        session: Optional["requests.Session"] = None,
+    ):
+        """
+        Args:
+            base_url: Daemon address
+            pool_size: Keep-alive connections kept open to the daemon
+            timeout: Seconds to wait for a capture
+            health_interval: Seconds a health check result is trusted
+            session: HTTP session to reuse (a pooled one is created if omitted)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.health_interval = health_interval
+        if session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self._health_lock = threading.Lock()
+        self._healthy: Optional[bool] = None
+        self._checked_at = 0.0
+        self.last_health: Dict[str, Any] = {}
+
+    def health(self) -> Dict[str, Any]:
+        """
+        Query ``/healthz``
+
+        Raises:
+            ScraperUnavailable: The daemon cannot be reached or reports a dead browser
+        """
+        import requests
+
+        try:
+            response = self.session.get(f"{self.base_url}/healthz", timeout=5)
+            body = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise ScraperUnavailable(f"Scraper daemon unreachable at {self.base_url}: {e}") from e
+        if response.status_code != 200:
+            raise ScraperUnavailable(body.get("status", f"HTTP {response.status_code}"))
+        return body
+
+    def is_healthy(self, force: bool = False) -> bool:
+        """Cached health check; re-queries the daemon once the last result is older than health_interval"""
+        with self._health_lock:
+            if not force and self._healthy is not None and time.monotonic() - self._checked_at < self.health_interval:
+                return self._healthy
+            try:
+                self.last_health = self.health()
+                self._healthy = True
+            except ScraperUnavailable as e:
+                logger.info("Scraper daemon unhealthy: %s", e)
+                self._healthy = False
+            self._checked_at = time.monotonic()
+            return self._healthy
+
+    def _mark_unhealthy(self):
+        with self._health_lock:
+            self._healthy = False
+            self._checked_at = time.monotonic()
+
+    def capture(
+        self,
+        capture_type: str,
+        address: Optional[str] = None,
+        lat: Optional[float] = None,
+        lng: Optional[float] = None,
+    ) -> bytes:
+        """
+        Take a capture with the daemon's warm browser
+
+        Args:
+            capture_type: "hoodmaps" or "googlemaps"
+            address: Address to pin (googlemaps), geocoded by the daemon
+            lat: Latitude to pin (googlemaps), skips geocoding together with ``lng``
+            lng: Longitude to pin (googlemaps)
+
+        Returns:
+            The screenshot bytes
+
+        Raises:
+            ScraperUnavailable: The daemon is down or unhealthy
+            RuntimeError: The daemon rejected or failed the capture
+        """
+        import requests
+
+        if not self.is_healthy():
+            raise ScraperUnavailable(f"Scraper daemon at {self.base_url} is not healthy")
+
+        params: Dict[str, Any] = {"type": capture_type}
+        if lat is not None and lng is not None:
+            params.update(lat=lat, lng=lng)
+        elif address:
+            params["address"] = address
+
+        with span(f"capture.{capture_type}", source="scraper_daemon") as capture_span:
+            try:
+                response = self.session.get(f"{self.base_url}/capture", params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                self._mark_unhealthy()
+                raise ScraperUnavailable(f"Scraper daemon request failed: {e}") from e
+            if response.status_code != 200:
+                raise RuntimeError(f"{capture_type} capture failed ({response.status_code}): {response.text.strip()}")
+            capture_span.set(bytes=len(response.content))
+            return response.content
+
+    def close(self):
+        self.session.close()
+
+
+_scraper_client: Optional[ScraperClient] = None
+_scraper_client_lock = threading.Lock()
+
+
+def get_scraper_client() -> ScraperClient:
+    """Return the process-wide scraper daemon client"""
+    global _scraper_client
+    with _scraper_client_lock:
+        if _scraper_client is None:
+            _scraper_client = ScraperClient()
+        return _scraper_client
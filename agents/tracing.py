@@ -0,0 +1,358 @@
+"""
+Lightweight spans for timing, token usage and cost
+
+    from agents.tracing import span
+
+    with span("geocode", address=address) as s:
+        lat, lng = geocoder.geocode(address)
+        s.set(cache="miss")
+
+    with span("llm.chat", model=model) as s:
+        response = client.chat.completions.create(...)
+        s.record_usage(model, response.usage)
+
+Tracing is off unless enabled; ``span()`` then returns a shared no-op object,
+so instrumented code pays one flag check. When on, every finished span is
+aggregated into Prometheus-style metrics and, if a sink is configured,
+written as one JSON line:
+
+- ``APERITIF_TRACE_FILE`` - append spans to this JSONL file (enables tracing)
+- ``APERITIF_METRICS_PORT`` - serve ``GET /metrics`` on this port (enables tracing)
+"""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# USD per million (prompt, completion) tokens. Self-hosted endpoints cost nothing per token.
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "microsoft/Phi-4-multimodal-instruct": (0.0, 0.0),
+    "/models/DeepSeek-R1-Distill-Llama-8B": (0.0, 0.0),
+}
+
+# Upper bounds (seconds) of the duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("aperitif_span", default=None)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """Estimated USD cost of a request, or None for a model without a known price"""
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+class Span:
+    """One timed operation; attributes are free-form JSON values"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes", "error", "_started", "_start_time",
+                 "duration_ms", "_token")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        parent = _current_span.get()
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.duration_ms = 0.0
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def record_usage(self, model: str, usage):
+        """Record token counts from an API ``usage`` object and the estimated cost"""
+        self.attributes["model"] = model
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        self.attributes["prompt_tokens"] = prompt_tokens
+        self.attributes["completion_tokens"] = completion_tokens
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        if cost is not None:
+            self.attributes["cost_usd"] = round(cost, 8)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self._start_time = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _tracer.finish(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": round(self._start_time, 6),
+            "duration_ms": round(self.duration_ms, 3),
+            "error": self.error,
+            **self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Returned by ``span()`` while tracing is off"""
+
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+    def record_usage(self, model: str, usage):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class JsonlSink:
+    """Appends finished spans to a file, one JSON object per line"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._file = open(path, "a", buffering=1)
+        self._lock = threading.Lock()
+
+    def write(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: Any) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Metrics:
+    """Per-span-name aggregates rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans: Dict[str, Dict[str, Any]] = {}
+        self._tokens: Dict[Tuple[str, str], int] = {}
+        self._cost: Dict[str, float] = {}
+
+    def observe(self, span: Span):
+        seconds = span.duration_ms / 1000
+        attributes = span.attributes
+        with self._lock:
+            entry = self._spans.get(span.name)
+            if entry is None:
+                entry = self._spans[span.name] = {
+                    "count": 0, "errors": 0, "seconds": 0.0, "bytes": 0, "buckets": [0] * len(DURATION_BUCKETS)
+                }
+            entry["count"] += 1
+            entry["seconds"] += seconds
+            entry["errors"] += span.error is not None
+            entry["bytes"] += attributes.get("bytes") or 0
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    entry["buckets"][i] += 1
+
+            model = attributes.get("model")
+            if model:
+                for kind in ("prompt", "completion"):
+                    tokens = attributes.get(f"{kind}_tokens")
+                    if tokens:
+                        self._tokens[(model, kind)] = self._tokens.get((model, kind), 0) + tokens
+                if attributes.get("cost_usd"):
+                    self._cost[model] = self._cost.get(model, 0.0) + attributes["cost_usd"]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Plain-dict copy of the aggregates"""
+        with self._lock:
+            return {
+                "spans": {name: {**entry, "buckets": list(entry["buckets"])} for name, entry in self._spans.items()},
+                "tokens": {f"{model}:{kind}": tokens for (model, kind), tokens in self._tokens.items()},
+                "cost_usd": dict(self._cost),
+            }
+
+    def render(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        with self._lock:
+            spans = {name: {**entry, "buckets": list(entry["buckets"])} for name, entry in self._spans.items()}
+            tokens = dict(self._tokens)
+            cost = dict(self._cost)
+
+        lines: List[str] = [
+            "# HELP aperitif_span_duration_seconds Duration of traced operations",
+            "# TYPE aperitif_span_duration_seconds histogram",
+        ]
+        for name, entry in sorted(spans.items()):
+            for bound, count in zip(DURATION_BUCKETS, entry["buckets"]):
+                lines.append(f"aperitif_span_duration_seconds_bucket{_labels(span=name, le=f'{bound:g}')} {count}")
+            lines.append(f"aperitif_span_duration_seconds_bucket{_labels(span=name, le='+Inf')} {entry['count']}")
+            lines.append(f"aperitif_span_duration_seconds_sum{_labels(span=name)} {entry['seconds']:.6f}")
+            lines.append(f"aperitif_span_duration_seconds_count{_labels(span=name)} {entry['count']}")
+
+        lines += ["# HELP aperitif_span_errors_total Traced operations that raised",
+                  "# TYPE aperitif_span_errors_total counter"]
+        lines += [f"aperitif_span_errors_total{_labels(span=name)} {e['errors']}" for name, e in sorted(spans.items())]
+
+        lines += ["# HELP aperitif_span_bytes_total Bytes produced by traced operations (captures, encoded images)",
+                  "# TYPE aperitif_span_bytes_total counter"]
+        lines += [f"aperitif_span_bytes_total{_labels(span=name)} {e['bytes']}"
+                  for name, e in sorted(spans.items()) if e["bytes"]]
+
+        lines += ["# HELP aperitif_tokens_total Tokens reported by model APIs",
+                  "# TYPE aperitif_tokens_total counter"]
+        lines += [f"aperitif_tokens_total{_labels(model=model, kind=kind)} {count}"
+                  for (model, kind), count in sorted(tokens.items())]
+
+        lines += ["# HELP aperitif_cost_usd_total Estimated model API spend in USD",
+                  "# TYPE aperitif_cost_usd_total counter"]
+        lines += [f"aperitif_cost_usd_total{_labels(model=model)} {usd:.8f}" for model, usd in sorted(cost.items())]
+        return "\n".join(lines) + "\n"
+
+
+class _Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.metrics = Metrics()
+        self.sink: Optional[JsonlSink] = None
+
+    def finish(self, span: Span):
+        self.metrics.observe(span)
+        if self.sink is not None:
+            try:
+                self.sink.write(span)
+            except (OSError, ValueError) as e:
+                logger.warning("Dropping span %s: %s", span.name, e)
+
+
+_tracer = _Tracer()
+_metrics_server: Optional["ThreadingHTTPServer"] = None
+_configure_lock = threading.Lock()
+
+
+def span(name: str, **attributes):
+    """
+    Context manager timing one operation
+
+    Args:
+        name: Span name, e.g. "geocode", "capture.googlemaps", "llm.chat"
+        **attributes: Initial attributes (more can be added with ``.set()``)
+    """
+    if not _tracer.enabled:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def tracing_enabled() -> bool:
+    return _tracer.enabled
+
+
+def get_metrics() -> Metrics:
+    return _tracer.metrics
+
+
+def enable_tracing(jsonl_path: Optional[str] = None):
+    """Turn tracing on, optionally writing spans to a JSONL file"""
+    with _configure_lock:
+        if jsonl_path and (_tracer.sink is None or _tracer.sink.path != jsonl_path):
+            if _tracer.sink is not None:
+                _tracer.sink.close()
+            _tracer.sink = JsonlSink(jsonl_path)
+        _tracer.enabled = True
+
+
+def disable_tracing():
+    """Turn tracing off and close the JSONL sink (metrics gathered so far are kept)"""
+    with _configure_lock:
+        _tracer.enabled = False
+        if _tracer.sink is not None:
+            _tracer.sink.close()
+            _tracer.sink = None
+
+
+def _metrics_handler():
+    """Request handler class for ``/metrics``, built on first use so http.server is only imported when serving"""
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = _tracer.metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return MetricsHandler
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> "ThreadingHTTPServer":
+    """Serve ``GET /metrics`` from a daemon thread (enables tracing); returns the running server"""
+    global _metrics_server
+    enable_tracing()
+    with _configure_lock:
+        if _metrics_server is None:
+            from http.server import ThreadingHTTPServer
+
+            _metrics_server = ThreadingHTTPServer((host, port), _metrics_handler())
+            _metrics_server.daemon_threads = True
+            threading.Thread(target=_metrics_server.serve_forever, name="aperitif-metrics", daemon=True).start()
+            logger.info("Serving metrics on http://%s:%d/metrics", host, _metrics_server.server_address[1])
+        return _metrics_server
+
+
+def configure_from_env():
+    """Apply APERITIF_TRACE_FILE and APERITIF_METRICS_PORT"""
+    trace_file = os.environ.get("APERITIF_TRACE_FILE")
+    if trace_file:
+        enable_tracing(trace_file)
+    metrics_port = os.environ.get("APERITIF_METRICS_PORT")
+    if metrics_port:
+        try:
+            start_metrics_server(int(metrics_port))
+        except (OSError, ValueError) as e:
+            logger.warning("Cannot serve metrics on port %s: %s", metrics_port, e)
+
+
+configure_from_env()
@@ -1,69 +1,36 @@
 import os
-import base64
-from typing import Dict, Any, Optional
-from openai import OpenAI
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+from typing import TYPE_CHECKING, Dict, Any, Iterable, List, Optional, Tuple, Union
+from .asset_cache import EncodedAssetCache, get_asset_cache
+from .image_preprocessing import (
+    PreprocessOptions, encode_data_url, image_center, preprocess_image, summarize_savings
+)
+from .result_cache import VisionResultCache, content_hash, get_result_cache, result_cache_key
+from .tracing import span
 
-class VisionAgent:
-    """Agent for analyzing San Francisco neighborhood maps"""
-    
-    def __init__(self, use_openai: bool = False):
-        """
-        Initialize the vision agent
-        
-        Args:
-            use_openai: If True, use OpenAI's GPT-4 Vision. If False, use Phi-4
-        """
-        self.use_openai = use_openai
-        
-        if use_openai:
-            # Use OpenAI's GPT-4 Vision
-            api_key = os.environ.get("OPENAI_API_KEY")
-            if not api_key:
-                raise ValueError("OPENAI_API_KEY environment variable is required for OpenAI mode")
-            
-            self.client = OpenAI(api_key=api_key)
-            self.model_name = "gpt-4o-mini"  # or "gpt-4-vision-preview" for better results
-            print(f"Using OpenAI model: {self.model_name}")
-        else:
-            # Use Phi-4 endpoint
-            self.client = OpenAI(
-                api_key=os.environ.get("OPENAI_API_KEY", "fake"),
-                base_url="https://phi-4-multimodal-instruct-guillaume-derouville-7ea5e77d.koyeb.app/v1",
-            )
-            self.model_name = "microsoft/Phi-4-multimodal-instruct"
-            print(f"Using Phi-4 model: {self.model_name}")
-        
-        # San Francisco neighborhood types
-        self.neighborhood_types = {
-            "Offices": {"color": "blue", "description": "Business district, corporate area"},
-            "Rich": {"color": "green", "description": "Wealthy residential area"},
-            "Hip": {"color": "yellow", "description": "Trendy, artistic neighborhoods"},
-            "Tourist": {"color": "red", "description": "Tourist hotspots, attractions"},
-            "Uni": {"color": "dark blue", "description": "University area, student housing"},
-            "Normies": {"color": "gray", "description": "Regular residential neighborhoods"}
-        }
-    
-    def analyze_with_reference(self, legend_map_path: str, pin_map_path: str) -> Dict[str, Any]:
-        """
-        Analyze by comparing a legend/reference map with a pin map
-        
-        Args:
-            legend_map_path: Path to map with colored zones and legend
-            pin_map_path: Path to map with pin location
-            
-        Returns:
-            Dictionary with neighborhood analysis
-        """
-        try:
-            # Load and encode both images
-            with open(legend_map_path, 'rb') as f:
-                legend_b64 = base64.b64encode(f.read()).decode()
-            
-            with open(pin_map_path, 'rb') as f:
-                pin_b64 = base64.b64encode(f.read()).decode()
-            
-            # Create a more specific prompt for two-image comparison
-            prompt = """I'm showing you two images of San Francisco:
+# openai and httpx take most of a second to import; they are loaded when the first client is built
+if TYPE_CHECKING:
+    import httpx
+    from openai import BadRequestError
+
+# San Francisco neighborhood types, in HoodMaps legend order
+NEIGHBORHOOD_TYPES = {
+    "Offices": {"color": "blue", "description": "Business district, corporate area"},
+    "Rich": {"color": "green", "description": "Wealthy residential area"},
+    "Hip": {"color": "yellow", "description": "Trendy, artistic neighborhoods"},
+    "Tourist": {"color": "red", "description": "Tourist hotspots, attractions"},
+    "Uni": {"color": "dark blue", "description": "University area, student housing"},
+    "Normies": {"color": "gray", "description": "Regular residential neighborhoods"}
+}
+
+SYSTEM_PROMPT = "You are an expert at comparing maps and identifying locations across different map views. Be very precise about matching locations between the two images."
+
+TASK_PROMPT = """I'm showing you two images of San Francisco:
 
 IMAGE 1 (Legend/Reference): A colored neighborhood map with zones and a legend at the bottom:
 - Offices (blue) - Business districts
@@ -98,7 +65,9 @@ Step-by-step process:
 
 AREA ANALYSIS: Instead of looking at the exact pin point, examine the predominant color in the surrounding 4-6 blocks around the identified location. This accounts for mapping precision and scale differences.
 
-Please respond with:
+"""
+
+TEXT_RESPONSE_PROMPT = """Please respond with:
 - Pin location: [specific landmarks and neighborhood where pin is placed]
 - Surrounding area analysis: [describe the colors you see in the 4-6 blocks around that location]
 - Predominant zone color: [the most common color in that area]
@@ -106,67 +75,649 @@ Please respond with:
 - Reasoning: [how you matched the location and determined the predominant color]
 - Confidence: [high/medium/low]"""
 
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert at comparing maps and identifying locations across different map views. Be very precise about matching locations between the two images."
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": prompt
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{legend_b64}"
-                                }
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{pin_b64}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                temperature=0.1,
-                max_tokens=400
+ANALYSIS_PROMPT = TASK_PROMPT + TEXT_RESPONSE_PROMPT
+
+JSON_RESPONSE_PROMPT = """Respond with a single JSON object and nothing else:
+{"neighborhood_type": "<one of: %s>", "confidence": "<high|medium|low>", "rationale": "<at most one short sentence naming the landmarks you matched>"}""" % ", ".join(NEIGHBORHOOD_TYPES)
+
+STRUCTURED_ANALYSIS_PROMPT = TASK_PROMPT + JSON_RESPONSE_PROMPT
+
+# Answer shape for endpoints with structured outputs; strict mode needs every field required
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "neighborhood_type": {"type": "string", "enum": list(NEIGHBORHOOD_TYPES)},
+        "confidence": {"type": "string", "enum": ["high", "medium", "low"]},
+        "rationale": {"type": "string", "description": "At most one short sentence; may be empty"},
+    },
+    "required": ["neighborhood_type", "confidence", "rationale"],
+    "additionalProperties": False,
+}
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "neighborhood_analysis", "strict": True, "schema": ANALYSIS_SCHEMA},
+}
+
+# How the answer is requested and parsed:
+#   text         prose answer (ANALYSIS_PROMPT), category read from its "Neighborhood type" line
+#   json         JSON answer asked for in the prompt and parsed leniently, for endpoints without schemas
+#   json_schema  JSON answer constrained by RESPONSE_FORMAT
+OUTPUT_FORMATS = ("text", "json", "json_schema")
+
+# Part of the result cache key: editing a prompt or the schema retires every memoized result
+PROMPT_VERSION = hashlib.sha256((SYSTEM_PROMPT + ANALYSIS_PROMPT).encode()).hexdigest()[:12]
+STRUCTURED_PROMPT_VERSION = hashlib.sha256(
+    (SYSTEM_PROMPT + STRUCTURED_ANALYSIS_PROMPT + json.dumps(ANALYSIS_SCHEMA, sort_keys=True)).encode()
+).hexdigest()[:12]
+
+# The model's "Confidence: high/medium/low" on the 0-1 scale of the local
+# classifier's predominant-zone share, so cascade thresholds compare across tiers
+CONFIDENCE_LEVELS = {"high": 0.9, "medium": 0.6, "low": 0.3}
+_CONFIDENCE_PATTERN = re.compile(r"confidence\W*(high|medium|low)\b", re.IGNORECASE)
+
+TEMPERATURE = 0.1
+MAX_TOKENS = 400
+# A JSON answer is a category, a confidence and one sentence
+STRUCTURED_MAX_TOKENS = 120
+
+# Where the OpenAI SDK sends requests when OPENAI_BASE_URL is not set
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+PHI4_BASE_URL = os.environ.get(
+    "APERITIF_PHI4_BASE_URL", "https://phi-4-multimodal-instruct-guillaume-derouville-7ea5e77d.koyeb.app/v1"
+)
+
+_CATEGORY_LINE_PATTERN = re.compile(
+    r"neighbou?rhood[ _]type\W*(%s)\b" % "|".join(NEIGHBORHOOD_TYPES), re.IGNORECASE
+)
+_CATEGORY_WORD_PATTERN = re.compile(r"\b(%s)\b" % "|".join(NEIGHBORHOOD_TYPES), re.IGNORECASE)
+
+
+def _match_category(value: Any) -> Optional[str]:
+    """The NEIGHBORHOOD_TYPES key equal to ``value`` ignoring case, or None"""
+    if not isinstance(value, str):
+        return None
+    for ntype in NEIGHBORHOOD_TYPES:
+        if ntype.lower() == value.strip().lower():
+            return ntype
+    return None
+
+
+def parse_text_answer(analysis: str) -> Dict[str, Optional[str]]:
+    """
+    Read category and confidence from a prose answer
+
+    The category comes from the "Neighborhood type:" line; without one, only a
+    category named alone in the whole answer counts, so a category mentioned in
+    passing in the reasoning is never picked by accident.
+    """
+    match = _CATEGORY_LINE_PATTERN.search(analysis)
+    if match:
+        neighborhood_type = _match_category(match.group(1))
+    else:
+        named = {_match_category(word) for word in _CATEGORY_WORD_PATTERN.findall(analysis)}
+        neighborhood_type = named.pop() if len(named) == 1 else None
+    confidence = _CONFIDENCE_PATTERN.search(analysis)
+    return {
+        "neighborhood_type": neighborhood_type,
+        "confidence": confidence.group(1).lower() if confidence else None,
+        "rationale": None,
+    }
+
+
+def parse_json_answer(analysis: str) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Read a JSON answer, tolerating code fences or prose around the object
+
+    Returns:
+        ``neighborhood_type``, ``confidence`` and ``rationale`` (None where missing
+        or not a valid value), or None when the answer holds no JSON object
+    """
+    start, end = analysis.find("{"), analysis.rfind("}")
+    if start == -1 or end < start:
+        return None
+    try:
+        data = json.loads(analysis[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    confidence = str(data.get("confidence") or "").strip().lower()
+    rationale = data.get("rationale")
+    return {
+        "neighborhood_type": _match_category(data.get("neighborhood_type")),
+        "confidence": confidence if confidence in CONFIDENCE_LEVELS else None,
+        "rationale": (rationale.strip() or None) if isinstance(rationale, str) else None,
+    }
+
+
+class VisionAgent:
+    """Agent for analyzing San Francisco neighborhood maps"""
+    
+    def __init__(
+        self,
+        use_openai: bool = False,
+        preprocess: Optional[PreprocessOptions] = None,
+        asset_cache: Optional[EncodedAssetCache] = None,
+        result_cache: Optional[VisionResultCache] = None,
+        cache_results: bool = True,
+        model_name: Optional[str] = None,
+        output_format: Optional[str] = None
+    ):
+        """
+        Initialize the vision agent
+        
+        Args:
+            use_openai: If True, use OpenAI's GPT-4 Vision. If False, use Phi-4
+            preprocess: If set, crop/downscale/re-encode both images before sending them
+            asset_cache: Cache of encoded legend images (defaults to the process-wide one)
+            result_cache: Memoized analyses (defaults to the process-wide one)
+            cache_results: If False, never read or write memoized analyses
+            model_name: Model to request instead of the endpoint's default, e.g. "gpt-4o"
+            output_format: One of OUTPUT_FORMATS; defaults to "json_schema" for OpenAI and
+                "json" for Phi-4 (the Koyeb deployment does not accept ``response_format``)
+        """
+        output_format = output_format or ("json_schema" if use_openai else "json")
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format {output_format!r}, expected one of {OUTPUT_FORMATS}")
+        self.output_format = output_format
+        self._format_lock = threading.Lock()
+        self.use_openai = use_openai
+        self.preprocess = preprocess
+        self.asset_cache = asset_cache or get_asset_cache()
+        self.result_cache = (result_cache or get_result_cache()) if cache_results else None
+        
+        if use_openai:
+            # Use OpenAI's GPT-4 Vision
+            api_key = os.environ.get("OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("OPENAI_API_KEY environment variable is required for OpenAI mode")
+            
+            self.client = self._create_client(api_key=api_key)
+            self.model_name = model_name or "gpt-4o-mini"  # or "gpt-4o" for better results
+            print(f"Using OpenAI model: {self.model_name}")
+        else:
+            # Use Phi-4 endpoint
+            self.client = self._create_client(
+                api_key=os.environ.get("OPENAI_API_KEY", "fake"),
+                base_url=PHI4_BASE_URL,
             )
+            self.model_name = model_name or "microsoft/Phi-4-multimodal-instruct"
+            print(f"Using Phi-4 model: {self.model_name}")
+        
+        # San Francisco neighborhood types
+        self.neighborhood_types = NEIGHBORHOOD_TYPES
+    
+    def analyze_with_reference(
+        self,
+        legend_map_path: str,
+        pin_map_path: str,
+        legend_focus: Optional[Tuple[float, float]] = None,
+        bypass_cache: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Analyze by comparing a legend/reference map with a pin map
+        
+        Args:
+            legend_map_path: Path to map with colored zones and legend
+            pin_map_path: Path to map with pin location
+            legend_focus: Pixel of the address on the legend map, used to crop it when pre-processing
+            bypass_cache: Always call the model (the fresh result still replaces the memoized one)
             
-            # Parse the response
-            analysis = response.choices[0].message.content
+        Returns:
+            Dictionary with neighborhood analysis; memoized results have ``cached`` set to True
+        """
+        return self._analyze(legend_map_path, pin_map_path, legend_focus, bypass_cache)
+    
+    def analyze_images(
+        self,
+        legend_png: bytes,
+        pin_png: bytes,
+        legend_focus: Optional[Tuple[float, float]] = None,
+        bypass_cache: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Same as ``analyze_with_reference`` for in-memory captures, e.g. ``page.screenshot()`` bytes
+        
+        Args:
+            legend_png: Encoded map with colored zones and legend
+            pin_png: Encoded map with pin location
+            legend_focus: Pixel of the address on the legend map, used to crop it when pre-processing
+            bypass_cache: Always call the model (the fresh result still replaces the memoized one)
             
-            # Extract neighborhood type from response
-            neighborhood_type = None
-            for ntype in self.neighborhood_types.keys():
-                if ntype.lower() in analysis.lower():
-                    neighborhood_type = ntype
-                    break
+        Returns:
+            Dictionary with neighborhood analysis; memoized results have ``cached`` set to True
+        """
+        return self._analyze(legend_png, pin_png, legend_focus, bypass_cache)
+    
+    def _analyze(
+        self,
+        legend: Union[str, bytes],
+        pin: Union[str, bytes],
+        legend_focus: Optional[Tuple[float, float]],
+        bypass_cache: bool
+    ) -> Dict[str, Any]:
+        with span("vision.analyze", model=self.model_name) as analyze_span:
+            try:
+                # Encode both images (the legend comes from the asset cache)
+                images, savings = self._prepare_images(legend, pin, legend_focus)
+                cache_key, cached = self._lookup_result(images, bypass_cache)
+                analyze_span.set(cached=cached is not None)
+                if cached is not None:
+                    return cached
+                
+                with span("llm.vision", model=self.model_name, output_format=self.output_format) as llm_span:
+                    response = self._create_completion(self._build_messages(*images))
+                    llm_span.record_usage(self.model_name, getattr(response, "usage", None))
+                
+                result = self._parse_response(
+                    response.choices[0].message.content, savings, getattr(response, "usage", None)
+                )
+                self._store_result(cache_key, result)
+                return result
+                
+            except Exception as e:
+                analyze_span.set(success=False, error_message=str(e))
+                return self._error_result(e)
+    
+    def _create_client(self, **kwargs):
+        """Create the OpenAI-compatible client used for vision requests, on the shared connection pool"""
+        from openai import OpenAI
+        from .http_clients import get_http_client
+
+        base_url = kwargs.get("base_url") or os.environ.get("OPENAI_BASE_URL") or OPENAI_BASE_URL
+        return OpenAI(http_client=get_http_client(base_url), **kwargs)
+    
+    @property
+    def prompt_version(self) -> str:
+        """Version of the prompt in use, part of the result cache key"""
+        return PROMPT_VERSION if self.output_format == "text" else STRUCTURED_PROMPT_VERSION
+    
+    def _request_options(self) -> Dict[str, Any]:
+        """Sampling and answer-format arguments of a vision request"""
+        if self.output_format == "text":
+            return {"temperature": TEMPERATURE, "max_tokens": MAX_TOKENS}
+        options = {"temperature": TEMPERATURE, "max_tokens": STRUCTURED_MAX_TOKENS}
+        if self.output_format == "json_schema":
+            options["response_format"] = RESPONSE_FORMAT
+        return options
+    
+    def _schema_rejected(self, error: "BadRequestError", options: Dict[str, Any]) -> bool:
+        """
+        Whether a request sent with ``options`` failed because the endpoint refused ``response_format``
+        
+        Decided from the failed request itself, not the current ``output_format``:
+        concurrent requests can still be in flight with a schema after another one
+        has switched the agent to "json". Both formats send the same prompt, so the
+        request can be retried as-is without ``response_format``.
+        """
+        if "response_format" not in options or "response_format" not in str(error):
+            return False
+        with self._format_lock:
+            if self.output_format == "json_schema":
+                print(f"{self.model_name} does not support response_format, parsing JSON answers without a schema")
+                self.output_format = "json"
+        return True
+    
+    @staticmethod
+    def _without_schema(options: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in options.items() if key != "response_format"}
+    
+    def _create_completion(self, messages: List[Dict[str, Any]]):
+        from openai import BadRequestError
+
+        options = self._request_options()
+        try:
+            return self.client.chat.completions.create(model=self.model_name, messages=messages, **options)
+        except BadRequestError as e:
+            if not self._schema_rejected(e, options):
+                raise
+            return self.client.chat.completions.create(
+                model=self.model_name, messages=messages, **self._without_schema(options)
+            )
+    
+    def _lookup_result(
+        self, images: Tuple[Dict[str, str], Dict[str, str]], bypass_cache: bool = False
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Return ``(cache_key, memoized result or None)`` for an encoded image pair"""
+        if self.result_cache is None:
+            return None, None
+        legend_image, pin_image = images
+        cache_key = result_cache_key(
+            content_hash(pin_image["url"]), content_hash(legend_image["url"]),
+            self.model_name, self.prompt_version, TEMPERATURE
+        )
+        if bypass_cache:
+            return cache_key, None
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            cached["cached"] = True
+        return cache_key, cached
+    
+    def _store_result(self, cache_key: Optional[str], result: Dict[str, Any]):
+        result["cached"] = False
+        # Only successful, classified answers are worth replaying; token usage
+        # belongs to the call that produced them, not to the replays
+        if cache_key is not None and result["neighborhood_type"] is not None:
+            stored = {key: value for key, value in result.items() if key != "usage"}
+            self.result_cache.put(cache_key, stored, self.model_name, self.prompt_version)
+    
+    def invalidate_cache(self, prompt_version: Optional[str] = None) -> int:
+        """
+        Drop this model's memoized results
+        
+        Args:
+            prompt_version: Only drop results from this prompt version (default: all versions)
             
-            return {
-                "success": True,
-                "model_used": self.model_name,
-                "raw_analysis": analysis,
-                "neighborhood_type": neighborhood_type,
-                "neighborhood_info": self.neighborhood_types.get(neighborhood_type, {}) if neighborhood_type else None,
-                "error": None,
-                "method": "two-image comparison"
+        Returns:
+            Number of results removed from the on-disk store
+        """
+        if self.result_cache is None:
+            return 0
+        return self.result_cache.invalidate(model_name=self.model_name, prompt_version=prompt_version)
+    
+    def _prepare_images(
+        self,
+        legend_map: Union[str, bytes],
+        pin_map: Union[str, bytes],
+        legend_focus: Optional[Tuple[float, float]] = None
+    ) -> Tuple[Tuple[Dict[str, str], Dict[str, str]], Optional[Dict[str, Any]]]:
+        """
+        Encode both images as image_url payloads, pre-processing them if configured
+        
+        Args:
+            legend_map: Path to, or encoded bytes of, the legend map
+            pin_map: Path to, or encoded bytes of, the pin map
+            legend_focus: Pixel of the address on the legend map
+        
+        Returns:
+            ``((legend_image_url, pin_image_url), savings)``; savings is None without pre-processing
+        """
+        with span("vision.encode", preprocess=self.preprocess is not None) as encode_span:
+            images, savings = self._encode_images(legend_map, pin_map, legend_focus)
+            encode_span.set(bytes=sum(len(image["url"]) for image in images))
+        return images, savings
+    
+    def _encode_images(
+        self,
+        legend_map: Union[str, bytes],
+        pin_map: Union[str, bytes],
+        legend_focus: Optional[Tuple[float, float]]
+    ) -> Tuple[Tuple[Dict[str, str], Dict[str, str]], Optional[Dict[str, Any]]]:
+        # The legend is the same image for every address, so its encoding is cached
+        if isinstance(legend_map, bytes):
+            legend = self.asset_cache.get_data(legend_map, self.preprocess, legend_focus)
+        else:
+            legend = self.asset_cache.get(legend_map, self.preprocess, legend_focus)
+        if isinstance(pin_map, bytes):
+            pin_bytes = pin_map
+        else:
+            with open(pin_map, 'rb') as f:
+                pin_bytes = f.read()
+        
+        if self.preprocess is None:
+            return (legend.image_url, {"url": encode_data_url(pin_bytes)}), None
+        
+        # generate_map_html() centers the map on the address, so the pin is in the middle
+        pin = preprocess_image(pin_bytes, self.preprocess, focus=image_center(pin_bytes))
+        return (
+            legend.image_url,
+            {"url": pin.data_url, "detail": pin.detail},
+        ), summarize_savings(legend.prepared, pin)
+    
+    def _build_messages(self, legend_image: Dict[str, str], pin_image: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Build the two-image comparison request"""
+        return [
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": ANALYSIS_PROMPT if self.output_format == "text" else STRUCTURED_ANALYSIS_PROMPT
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": legend_image
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": pin_image
+                    }
+                ]
             }
-            
-        except Exception as e:
-            return {
-                "success": False,
-                "model_used": self.model_name,
-                "raw_analysis": None,
-                "neighborhood_type": None,
-                "neighborhood_info": None,
-                "error": str(e),
-                "method": "two-image comparison"
+        ]
+    
+    def _parse_response(
+        self, analysis: str, preprocessing: Optional[Dict[str, Any]] = None, usage=None
+    ) -> Dict[str, Any]:
+        """Turn the model's answer into the analysis result dict, with the API ``usage`` if reported"""
+        analysis = analysis or ""
+        answer = None if self.output_format == "text" else parse_json_answer(analysis)
+        if answer is None:
+            # Prose answer, or a JSON-mode endpoint that ignored the format instructions
+            answer = parse_text_answer(analysis)
+        neighborhood_type = answer["neighborhood_type"]
+        
+        result = {
+            "success": True,
+            "model_used": self.model_name,
+            "raw_analysis": analysis,
+            "neighborhood_type": neighborhood_type,
+            "neighborhood_info": self.neighborhood_types.get(neighborhood_type, {}) if neighborhood_type else None,
+            "error": None,
+            "method": "two-image comparison",
+            "confidence": CONFIDENCE_LEVELS.get(answer["confidence"]),
+            "rationale": answer["rationale"]
+        }
+        if preprocessing is not None:
+            result["preprocessing"] = preprocessing
+        if usage is not None:
+            result["usage"] = {
+                "prompt_tokens": getattr(usage, "prompt_tokens", None) or 0,
+                "completion_tokens": getattr(usage, "completion_tokens", None) or 0,
             }
+        return result
+    
+    def _error_result(self, error: Exception) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "model_used": self.model_name,
+            "raw_analysis": None,
+            "neighborhood_type": None,
+            "neighborhood_info": None,
+            "error": str(error),
+            "method": "two-image comparison"
+        }
+
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class AsyncVisionAgent(VisionAgent):
+    """
+    Asynchronous vision agent for running many analyses from one event loop.
+
+    Requests go through ``AsyncOpenAI`` over a shared keep-alive HTTP pool, at
+    most ``max_concurrency`` are in flight at once, each has its own timeout,
+    and 429/5xx responses are retried with jittered exponential backoff.
+    Results are the same dicts as ``VisionAgent.analyze_with_reference``.
+    """
+    
+    def __init__(
+        self,
+        use_openai: bool = False,
+        max_concurrency: int = 8,
+        request_timeout: float = 60.0,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        http_client: Optional["httpx.AsyncClient"] = None,
+        preprocess: Optional[PreprocessOptions] = None,
+        asset_cache: Optional[EncodedAssetCache] = None,
+        result_cache: Optional[VisionResultCache] = None,
+        cache_results: bool = True,
+        model_name: Optional[str] = None,
+        output_format: Optional[str] = None,
+    ):
+        """
+        Initialize the async vision agent
+        
+        Args:
+            use_openai: If True, use OpenAI's GPT-4 Vision. If False, use Phi-4
+            max_concurrency: Maximum number of in-flight vision requests
+            request_timeout: Timeout in seconds for each request attempt
+            max_retries: Retries after the first attempt on 429/5xx/connection errors
+            backoff_base: Delay in seconds before the first retry (doubles each time)
+            backoff_max: Upper bound for a single backoff delay
+            http_client: Shared HTTP client; one with keep-alive pooling is created if omitted
+            preprocess: If set, crop/downscale/re-encode both images before sending them
+            asset_cache: Cache of encoded legend images (defaults to the process-wide one)
+            result_cache: Memoized analyses (defaults to the process-wide one)
+            cache_results: If False, never read or write memoized analyses
+            model_name: Model to request instead of the endpoint's default, e.g. "gpt-4o"
+            output_format: One of OUTPUT_FORMATS (see ``VisionAgent``)
+        """
+        self.max_concurrency = max_concurrency
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        import httpx
+
+        self.http_client = http_client or httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            timeout=request_timeout,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        super().__init__(
+            use_openai=use_openai,
+            preprocess=preprocess,
+            asset_cache=asset_cache,
+            result_cache=result_cache,
+            cache_results=cache_results,
+            model_name=model_name,
+            output_format=output_format,
+        )
+    
+    def _create_client(self, **kwargs):
+        # Retries are handled here so that backoff can honour the semaphore and Retry-After
+        from openai import AsyncOpenAI
+
+        return AsyncOpenAI(http_client=self.http_client, max_retries=0, **kwargs)
+    
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        from openai import APIStatusError
 
+        retry_after = None
+        if isinstance(error, APIStatusError):
+            retry_after = error.response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # "Full jitter": spread retries of concurrent requests across the whole window
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+    
+    async def _create_completion(self, messages: List[Dict[str, Any]]):
+        from openai import APIConnectionError, APIStatusError, APITimeoutError, BadRequestError
+
+        # Fixed per call, so a schema rejection is judged by what this request sent
+        options = self._request_options()
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    return await self.client.chat.completions.create(
+                        model=self.model_name,
+                        messages=messages,
+                        timeout=self.request_timeout,
+                        **options
+                    )
+            except BadRequestError as e:
+                if not self._schema_rejected(e, options):
+                    raise
+                options = self._without_schema(options)
+            except (APIConnectionError, APITimeoutError, APIStatusError) as e:
+                retryable = not isinstance(e, APIStatusError) or e.status_code in RETRYABLE_STATUS_CODES
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt, e)
+                attempt += 1
+                await asyncio.sleep(delay)
+    
+    async def analyze_with_reference(
+        self,
+        legend_map_path: str,
+        pin_map_path: str,
+        legend_focus: Optional[Tuple[float, float]] = None,
+        bypass_cache: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Analyze by comparing a legend/reference map with a pin map
+        
+        Args:
+            legend_map_path: Path to map with colored zones and legend
+            pin_map_path: Path to map with pin location
+            legend_focus: Pixel of the address on the legend map, used to crop it when pre-processing
+            bypass_cache: Always call the model (the fresh result still replaces the memoized one)
+            
+        Returns:
+            Dictionary with neighborhood analysis; memoized results have ``cached`` set to True
+        """
+        return await self._analyze(legend_map_path, pin_map_path, legend_focus, bypass_cache)
+    
+    async def analyze_images(
+        self,
+        legend_png: bytes,
+        pin_png: bytes,
+        legend_focus: Optional[Tuple[float, float]] = None,
+        bypass_cache: bool = False
+    ) -> Dict[str, Any]:
+        """Same as ``analyze_with_reference`` for in-memory captures"""
+        return await self._analyze(legend_png, pin_png, legend_focus, bypass_cache)
+    
+    async def _analyze(
+        self,
+        legend: Union[str, bytes],
+        pin: Union[str, bytes],
+        legend_focus: Optional[Tuple[float, float]],
+        bypass_cache: bool
+    ) -> Dict[str, Any]:
+        with span("vision.analyze", model=self.model_name) as analyze_span:
+            try:
+                images, savings = await asyncio.to_thread(self._prepare_images, legend, pin, legend_focus)
+                cache_key, cached = await asyncio.to_thread(self._lookup_result, images, bypass_cache)
+                analyze_span.set(cached=cached is not None)
+                if cached is not None:
+                    return cached
+                
+                with span("llm.vision", model=self.model_name, output_format=self.output_format) as llm_span:
+                    response = await self._create_completion(self._build_messages(*images))
+                    llm_span.record_usage(self.model_name, getattr(response, "usage", None))
+                result = self._parse_response(
+                    response.choices[0].message.content, savings, getattr(response, "usage", None)
+                )
+                await asyncio.to_thread(self._store_result, cache_key, result)
+                return result
+                
+            except Exception as e:
+                analyze_span.set(success=False, error_message=str(e))
+                return self._error_result(e)
+    
+    async def analyze_many(self, pairs: Iterable[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Analyze many (legend_map_path, pin_map_path) pairs concurrently
+        
+        Returns:
+            One result per pair, in input order
+        """
+        return await asyncio.gather(*(self.analyze_with_reference(legend, pin) for legend, pin in pairs))
+    
+    async def aclose(self):
+        """Close the underlying HTTP connection pool"""
+        await self.http_client.aclose()
@@ -0,0 +1,169 @@
+"""
+Precompiled, memory-mapped neighborhood label grid
+
+Compile a HoodMaps capture once:
+
+    python -m agents.zone_grid compile hoodmaps_screenshot.png -o sf.zgrid
+
+and answer point lookups from the mmap'd grid without decoding PNGs or
+calling a model:
+
+    python -m agents.zone_grid lookup sf.zgrid 37.7650 -122.4217
+"""
+
+import argparse
+import json
+import struct
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from .local_classifier import (
+    CATEGORIES,
+    HOODMAPS_MAP_AREA,
+    UNKNOWN_LABEL,
+    GeoTransform,
+    LocalNeighborhoodClassifier,
+    classify_labels_at,
+)
+
+# File layout: 64-byte little-endian header followed by height * width uint8 labels.
+# The header stores the pixel-from-world affine transform of the grid itself.
+MAGIC = b"APZG"
+VERSION = 1
+HEADER_FORMAT = "<4sHHII6d"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+
+def _mode_pool(labels: np.ndarray, factor: int) -> np.ndarray:
+    """Downsample a label image by taking the most common label in each factor x factor cell"""
+    height, width = labels.shape[0] // factor, labels.shape[1] // factor
+    cells = labels[: height * factor, : width * factor].reshape(height, factor, width, factor)
+    cells = cells.transpose(0, 2, 1, 3).reshape(height, width, factor * factor)
+
+    values = list(range(len(CATEGORIES))) + [UNKNOWN_LABEL]
+    counts = np.stack([(cells == value).sum(axis=2) for value in values], axis=2)
+    return np.asarray(values, dtype=np.uint8)[counts.argmax(axis=2)]
+
+
+def compile_zone_grid(
+    reference_map: Union[str, bytes],
+    output_path: str,
+    transform: Optional[GeoTransform] = None,
+    map_area: Optional[Tuple[int, int, int, int]] = HOODMAPS_MAP_AREA,
+    downsample: int = 1,
+) -> str:
+    """
+    Convert a colored HoodMaps capture into a label grid file
+
+    Args:
+        reference_map: Path to, or PNG bytes of, a HoodMaps capture
+        output_path: Where to write the grid
+        transform: Pixel <-> lat/lng transform of the capture
+        map_area: ``(left, top, right, bottom)`` of the map inside the capture
+        downsample: Capture pixels per grid cell along each axis
+
+    Returns:
+        ``output_path``
+    """
+    classifier = LocalNeighborhoodClassifier(reference_map, transform=transform, map_area=map_area)
+    labels = classifier.labels
+    matrix = classifier.transform.matrix
+    if downsample > 1:
+        labels = _mode_pool(labels, downsample)
+        matrix = matrix / downsample
+
+    height, width = labels.shape
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, 0, width, height, *matrix.ravel())
+    with open(output_path, "wb") as f:
+        f.write(header)
+        f.write(np.ascontiguousarray(labels, dtype=np.uint8).tobytes())
+    return output_path
+
+
+class ZoneGrid:
+    """
+    Read-only, memory-mapped label grid produced by ``compile_zone_grid``.
+
+    Opening a grid only reads its header; label pages are faulted in on demand
+    and shared by every process mapping the same file, so a lookup costs one
+    small window read regardless of how many workers are scoring addresses.
+    """
+
+    model_name = "zone-grid"
+    method = "zone grid lookup"
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Grid file written by ``compile_zone_grid``
+        """
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) != HEADER_SIZE:
+            raise ValueError(f"{path} is too short to be a zone grid")
+
+        magic, version, _, width, height, *matrix = struct.unpack(HEADER_FORMAT, header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a zone grid")
+        if version != VERSION:
+            raise ValueError(f"Unsupported zone grid version {version} in {path}")
+
+        self.path = path
+        self.transform = GeoTransform([matrix[:3], matrix[3:]])
+        self.labels = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER_SIZE, shape=(height, width))
+
+    def classify_point(self, lat: float, lng: float, radius_m: float = 300.0) -> Dict[str, Any]:
+        """
+        Classify the area within ``radius_m`` of a point
+
+        Returns:
+            Dictionary with neighborhood analysis, as ``LocalNeighborhoodClassifier.classify_point``
+        """
+        return classify_labels_at(self.labels, self.transform, lat, lng, radius_m, self.model_name, self.method)
+
+
+_open_grids: Dict[str, ZoneGrid] = {}
+_open_grids_lock = threading.Lock()
+
+
+def open_zone_grid(path: str) -> ZoneGrid:
+    """Return a process-wide ZoneGrid for ``path``, mapping the file only once"""
+    with _open_grids_lock:
+        if path not in _open_grids:
+            _open_grids[path] = ZoneGrid(path)
+        return _open_grids[path]
+
+
+def classify_point(lat: float, lng: float, radius_m: float = 300.0, grid_path: str = "sf.zgrid") -> Dict[str, Any]:
+    """Classify a point from the compiled grid at ``grid_path``"""
+    return open_zone_grid(grid_path).classify_point(lat, lng, radius_m)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile and query neighborhood label grids")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compile_parser = subparsers.add_parser("compile", help="Compile a HoodMaps capture into a grid")
+    compile_parser.add_argument("reference_map", help="HoodMaps capture (PNG)")
+    compile_parser.add_argument("-o", "--output", default="sf.zgrid", help="Grid file to write")
+    compile_parser.add_argument("--downsample", type=int, default=1, help="Capture pixels per grid cell")
+
+    lookup_parser = subparsers.add_parser("lookup", help="Classify a point from a compiled grid")
+    lookup_parser.add_argument("grid")
+    lookup_parser.add_argument("lat", type=float)
+    lookup_parser.add_argument("lng", type=float)
+    lookup_parser.add_argument("--radius", type=float, default=300.0, help="Radius in meters")
+
+    args = parser.parse_args()
+    if args.command == "compile":
+        path = compile_zone_grid(args.reference_map, args.output, downsample=args.downsample)
+        grid = ZoneGrid(path)
+        print(f"Wrote {path}: {grid.labels.shape[1]}x{grid.labels.shape[0]} cells")
+    else:
+        print(json.dumps(classify_point(args.lat, args.lng, args.radius, args.grid), indent=2))
+
+
+if __name__ == "__main__":
+    main()
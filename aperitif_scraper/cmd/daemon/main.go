@@ -0,0 +1,116 @@
+// Command daemon is the long-running scraper service. It starts Chrome once,
+// keeps it warm, and serves captures over HTTP (see package server).
+//
+//	go build -o bin/aperitif-scraper ./cmd/daemon
+//	GOOGLE_MAP_API_KEY=... bin/aperitif-scraper -addr 127.0.0.1:8765
+package main
+
+import (
+	"context"
+	"flag"
+	"log"
+	"net"
+	"net/http"
+	"os"
+	"os/signal"
+	"syscall"
+	"time"
+
+	"github.com/artipfw/aperitif/googlemap"
+	"github.com/artipfw/aperitif/hoodmap"
+	"github.com/artipfw/aperitif/server"
+	"github.com/chromedp/chromedp"
+)
+
+// chromeCapturer opens one tab per capture in a shared browser.
+type chromeCapturer struct {
+	browserCtx context.Context
+}
+
+// tab returns a new tab context that is closed when ctx is done.
+func (c chromeCapturer) tab(ctx context.Context) (context.Context, context.CancelFunc) {
+	tabCtx, cancel := chromedp.NewContext(c.browserCtx)
+	stop := context.AfterFunc(ctx, cancel)
+	return tabCtx, func() {
+		stop()
+		cancel()
+	}
+}
+
+func (c chromeCapturer) Hoodmaps(ctx context.Context) ([]byte, error) {
+	tabCtx, cancel := c.tab(ctx)
+	defer cancel()
+	return hoodmap.Capture(tabCtx)
+}
+
+func (c chromeCapturer) GoogleMaps(ctx context.Context, pageURL string) ([]byte, error) {
+	tabCtx, cancel := c.tab(ctx)
+	defer cancel()
+	return googlemap.Capture(tabCtx, pageURL)
+}
+
+func (c chromeCapturer) Ping(ctx context.Context) error {
+	// Evaluate in the browser's first tab, which is kept open for this
+	pingCtx, cancel := context.WithTimeout(c.browserCtx, 2*time.Second)
+	defer cancel()
+	stop := context.AfterFunc(ctx, cancel)
+	defer stop()
+	var ok bool
+	return chromedp.Run(pingCtx, chromedp.Evaluate("true", &ok))
+}
+
+func main() {
+	addr := flag.String("addr", "127.0.0.1:8765", "listen address")
+	maxConcurrent := flag.Int("max-concurrent", 4, "maximum captures (tabs) at once")
+	captureTimeout := flag.Duration("capture-timeout", 60*time.Second, "timeout per capture, including queueing")
+	flag.Parse()
+
+	apiKey := os.Getenv("GOOGLE_MAP_API_KEY")
+	if apiKey == "" {
+		log.Fatal("GOOGLE_MAP_API_KEY environment variable not set")
+	}
+
+	ctx, stop := signal.NotifyContext(context.Background(), os.Interrupt, syscall.SIGTERM)
+	defer stop()
+
+	// HoodMaps captures are cached next to Playwright ones taken at the same size
+	opts := append(chromedp.DefaultExecAllocatorOptions[:],
+		chromedp.WindowSize(hoodmap.ViewportWidth, hoodmap.ViewportHeight))
+	allocCtx, cancelAlloc := chromedp.NewExecAllocator(ctx, opts...)
+	defer cancelAlloc()
+	browserCtx, cancelBrowser := chromedp.NewContext(allocCtx)
+	defer cancelBrowser()
+
+	// Start Chrome now so the first capture does not pay for the launch
+	start := time.Now()
+	if err := chromedp.Run(browserCtx); err != nil {
+		log.Fatalf("Starting Chrome failed: %v", err)
+	}
+	log.Printf("Chrome started in %v", time.Since(start).Round(time.Millisecond))
+
+	srv := server.New(
+		chromeCapturer{browserCtx: browserCtx},
+		func(address string) (float64, float64, error) { return googlemap.Geocode(address, apiKey) },
+		func(lat, lng float64) string { return googlemap.PinPageHTML(lat, lng, apiKey) },
+		server.Options{MaxConcurrent: *maxConcurrent, CaptureTimeout: *captureTimeout},
+	)
+
+	ln, err := net.Listen("tcp", *addr)
+	if err != nil {
+		log.Fatalf("Listen failed: %v", err)
+	}
+	srv.SetBaseURL("http://" + ln.Addr().String())
+
+	httpServer := &http.Server{Handler: srv}
+	go func() {
+		<-ctx.Done()
+		shutdownCtx, cancel := context.WithTimeout(context.Background(), 10*time.Second)
+		defer cancel()
+		httpServer.Shutdown(shutdownCtx)
+	}()
+
+	log.Printf("Scraper daemon listening on http://%s", ln.Addr())
+	if err := httpServer.Serve(ln); err != nil && err != http.ErrServerClosed {
+		log.Fatalf("Server failed: %v", err)
+	}
+}
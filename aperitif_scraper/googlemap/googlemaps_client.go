@@ -5,6 +5,7 @@ import (
 	"encoding/json"
 	"fmt"
 	"log"
+	"net"
 	"net/http"
 	"net/url"
 	"os"
@@ -17,6 +18,9 @@ const (
 	defaultAddress = "208 Anza St, San Francisco, CA"
 	htmlPort       = ":8080"
 	outputPNG      = "google_screenshot.png"
+
+	// tilesLoadedBudget bounds the wait for Google Maps' tilesloaded event
+	tilesLoadedBudget = 10 * time.Second
 )
 
 type GeocodeResponse struct {
@@ -31,6 +35,11 @@ type GeocodeResponse struct {
 	Status string `json:"status"`
 }
 
+// Geocode resolves an address to coordinates with the Google Geocoding API.
+func Geocode(address, apiKey string) (float64, float64, error) {
+	return geocode(address, apiKey)
+}
+
 func geocode(address, apiKey string) (float64, float64, error) {
 	endpoint := "https://maps.googleapis.com/maps/api/geocode/json"
 	u := fmt.Sprintf("%s?address=%s&key=%s", endpoint, url.QueryEscape(address), apiKey)
@@ -55,6 +64,11 @@ func geocode(address, apiKey string) (float64, float64, error) {
 	return lat, lng, nil
 }
 
+// PinPageHTML is the Google Maps page with a marker at (lat, lng).
+func PinPageHTML(lat, lng float64, apiKey string) string {
+	return generateMapHTML(lat, lng, apiKey)
+}
+
 func generateMapHTML(lat, lng float64, apiKey string) string {
 	return fmt.Sprintf(`
 <!DOCTYPE html>
@@ -82,6 +96,9 @@ func generateMapHTML(lat, lng float64, apiKey string) string {
           position: center,
           map: map
         });
+        google.maps.event.addListenerOnce(map, "tilesloaded", () => {
+          window.__aperitifTilesLoaded = true;
+        });
       }
       window.onload = initMap;
     </script>
@@ -92,6 +109,32 @@ func generateMapHTML(lat, lng float64, apiKey string) string {
 </html>`, apiKey, lat, lng)
 }
 
+// Capture loads a pin page (see PinPageHTML) in the browser tab behind ctx,
+// waits for the map tiles and returns a full-page screenshot.
+func Capture(ctx context.Context, pageURL string) ([]byte, error) {
+	var buf []byte
+	start := time.Now()
+	err := chromedp.Run(ctx,
+		chromedp.Navigate(pageURL),
+		chromedp.ActionFunc(func(ctx context.Context) error {
+			waitCtx, cancel := context.WithTimeout(ctx, tilesLoadedBudget)
+			defer cancel()
+			err := chromedp.Poll("window.__aperitifTilesLoaded === true", nil).Do(waitCtx)
+			if err != nil && ctx.Err() == nil && waitCtx.Err() == context.DeadlineExceeded {
+				log.Printf("googlemaps readiness: tiles not loaded after %v, continuing", tilesLoadedBudget)
+				return nil
+			}
+			return err
+		}),
+		chromedp.FullScreenshot(&buf, 90),
+	)
+	if err != nil {
+		return nil, err
+	}
+	log.Printf("googlemaps readiness: captured in %v", time.Since(start).Round(time.Millisecond))
+	return buf, nil
+}
+
 func Run(address ...string) {
 
 	// Use provided address if available, otherwise fallback to default
@@ -118,27 +161,25 @@ func Run(address ...string) {
 	http.HandleFunc("/", func(w http.ResponseWriter, r *http.Request) {
 		fmt.Fprint(w, html)
 	})
-	server := &http.Server{Addr: htmlPort}
+	// Bind before starting the browser so the page is reachable immediately
+	ln, err := net.Listen("tcp", htmlPort)
+	if err != nil {
+		log.Fatalf("Server failed: %v", err)
+	}
+	server := &http.Server{}
 	go func() {
 		log.Printf("Serving map on http://localhost%s", htmlPort)
-		if err := server.ListenAndServe(); err != nil && err != http.ErrServerClosed {
+		if err := server.Serve(ln); err != nil && err != http.ErrServerClosed {
 			log.Fatalf("Server failed: %v", err)
 		}
 	}()
 	defer server.Close()
 
-	// Step 3: Wait and take screenshot
-	time.Sleep(3 * time.Second)
-
+	// Step 3: Wait for the tilesloaded hook and take screenshot
 	ctx, cancel := chromedp.NewContext(context.Background())
 	defer cancel()
 
-	var buf []byte
-	err = chromedp.Run(ctx,
-		chromedp.Navigate("http://localhost"+htmlPort),
-		chromedp.Sleep(5*time.Second),
-		chromedp.FullScreenshot(&buf, 90),
-	)
+	buf, err := Capture(ctx, "http://localhost"+htmlPort)
 	if err != nil {
 		log.Fatalf("chromedp screenshot failed: %v", err)
 	}
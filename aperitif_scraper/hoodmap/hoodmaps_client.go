@@ -6,39 +6,102 @@ import (
 	"os"
 	"time"
 
+	"github.com/chromedp/cdproto/runtime"
 	"github.com/chromedp/chromedp"
 )
 
-func Run() {
-	// Create context
-	ctx, cancel := chromedp.NewContext(context.Background())
-	defer cancel()
+// ViewportWidth and ViewportHeight are the window size of every HoodMaps
+// capture. The Python side (agents/map_capture.py HOODMAPS_VIEWPORT) captures at
+// the same size, and the local classifier's pixel geometry assumes it.
+const (
+	ViewportWidth  = 1280
+	ViewportHeight = 720
+)
 
-	// Increase timeout
-	ctx, cancel = context.WithTimeout(ctx, 30*time.Second)
-	defer cancel()
+// mapRenderedJS is true once the map canvas has a drawable size and no raster
+// tiles are still loading.
+const mapRenderedJS = `(() => {
+  const canvas = document.querySelector("canvas");
+  if (!canvas || canvas.width === 0 || canvas.height === 0) return false;
+  for (const tile of document.querySelectorAll("img.leaflet-tile")) {
+    if (!tile.complete) return false;
+  }
+  const map = window.map;
+  if (map && typeof map.areTilesLoaded === "function") return map.areTilesLoaded();
+  return true;
+})()`
 
-	// Allocate buffer for screenshot
-	var buf []byte
+// nextPaintJS resolves after two animation frames, i.e. once the last DOM
+// change has been painted.
+const nextPaintJS = `new Promise(r => requestAnimationFrame(() => requestAnimationFrame(() => r(true))))`
+
+// step runs action with its own timeout budget and logs how long it took.
+// Optional steps that time out are logged and the capture carries on.
+func step(name string, budget time.Duration, required bool, action chromedp.Action) chromedp.Action {
+	return chromedp.ActionFunc(func(ctx context.Context) error {
+		start := time.Now()
+		stepCtx, cancel := context.WithTimeout(ctx, budget)
+		defer cancel()
+
+		err := action.Do(stepCtx)
+		log.Printf("hoodmaps readiness: %s took %v", name, time.Since(start).Round(time.Millisecond))
+		if err != nil && !required && ctx.Err() == nil && stepCtx.Err() == context.DeadlineExceeded {
+			log.Printf("hoodmaps readiness: %s not ready after %v, continuing", name, budget)
+			return nil
+		}
+		return err
+	})
+}
+
+func waitForPaint() chromedp.Action {
+	return chromedp.Evaluate(nextPaintJS, nil, func(p *runtime.EvaluateParams) *runtime.EvaluateParams {
+		return p.WithAwaitPromise(true)
+	})
+}
 
-	// Run tasks
+// Capture opens HoodMaps in the browser tab behind ctx, switches to the zone
+// view and returns a full-page screenshot.
+func Capture(ctx context.Context) ([]byte, error) {
+	var buf []byte
+	start := time.Now()
 	err := chromedp.Run(ctx,
 		// Navigate to the page
 		chromedp.Navigate("https://hoodmaps.com/san-francisco-neighborhood-map"),
 
-		// Give time for JS and map to load
-		chromedp.Sleep(5*time.Second),
+		// Wait for the map to render instead of sleeping a fixed 5s
+		step("map_rendered", 10*time.Second, false, chromedp.Poll(mapRenderedJS, nil)),
 
-		chromedp.Click(`div.action-toggle-tags`, chromedp.NodeVisible),
-		chromedp.Sleep(3*time.Second), // allow animation/render
-		chromedp.Click(`div.action-toggle-shapes`, chromedp.NodeVisible),
-		chromedp.Sleep(3*time.Second), // allow animation/render
-		chromedp.Click(`div.action-toggle-shapes`, chromedp.NodeVisible),
-		chromedp.Sleep(3*time.Second), // allow animation/render
+		step("toggle tags", 10*time.Second, true, chromedp.Click(`div.action-toggle-tags`, chromedp.NodeVisible)),
+		step("paint", time.Second, false, waitForPaint()),
+		step("toggle shapes", 10*time.Second, true, chromedp.Click(`div.action-toggle-shapes`, chromedp.NodeVisible)),
+		step("paint", time.Second, false, waitForPaint()),
+		step("toggle shapes", 10*time.Second, true, chromedp.Click(`div.action-toggle-shapes`, chromedp.NodeVisible)),
+		step("paint", time.Second, false, waitForPaint()),
+		step("map_rendered", 3*time.Second, false, chromedp.Poll(mapRenderedJS, nil)),
 
 		// Take full page screenshot
 		chromedp.FullScreenshot(&buf, 90),
 	)
+	if err != nil {
+		return nil, err
+	}
+	log.Printf("hoodmaps readiness: captured in %v", time.Since(start).Round(time.Millisecond))
+	return buf, nil
+}
+
+func Run() {
+	// Create context
+	opts := append(chromedp.DefaultExecAllocatorOptions[:], chromedp.WindowSize(ViewportWidth, ViewportHeight))
+	allocCtx, cancelAlloc := chromedp.NewExecAllocator(context.Background(), opts...)
+	defer cancelAlloc()
+	ctx, cancel := chromedp.NewContext(allocCtx)
+	defer cancel()
+
+	// Increase timeout
+	ctx, cancel = context.WithTimeout(ctx, 30*time.Second)
+	defer cancel()
+
+	buf, err := Capture(ctx)
 	if err != nil {
 		log.Fatal(err)
 	}
@@ -0,0 +1,233 @@
+// Package server exposes map captures over a local HTTP API so callers talk
+// to one long-lived process with a warm browser instead of running the
+// scraper once per capture.
+//
+//	GET /healthz                                  -> JSON status
+//	GET /capture?type=hoodmaps                    -> image bytes
+//	GET /capture?type=googlemaps&address=...      -> image bytes
+//	GET /capture?type=googlemaps&lat=...&lng=...  -> image bytes
+//	GET /pin-page?lat=...&lng=...                 -> Google Maps pin page (loaded by the browser)
+package server
+
+import (
+	"context"
+	"encoding/json"
+	"errors"
+	"fmt"
+	"log"
+	"net/http"
+	"net/url"
+	"strconv"
+	"sync"
+	"sync/atomic"
+	"time"
+)
+
+// Capturer takes screenshots in a shared browser.
+type Capturer interface {
+	// Hoodmaps captures the HoodMaps zone view.
+	Hoodmaps(ctx context.Context) ([]byte, error)
+	// GoogleMaps captures the pin page at pageURL.
+	GoogleMaps(ctx context.Context, pageURL string) ([]byte, error)
+	// Ping reports whether the browser is still usable.
+	Ping(ctx context.Context) error
+}
+
+// GeocodeFunc resolves an address to coordinates.
+type GeocodeFunc func(address string) (lat, lng float64, err error)
+
+// PinPageFunc renders the pin page HTML for a location.
+type PinPageFunc func(lat, lng float64) string
+
+// Options tune a Server.
+type Options struct {
+	// MaxConcurrent bounds the number of captures running at once (tabs open).
+	MaxConcurrent int
+	// CaptureTimeout bounds a single capture, including time queued.
+	CaptureTimeout time.Duration
+}
+
+// Server is an http.Handler serving captures from a Capturer.
+type Server struct {
+	capturer Capturer
+	geocode  GeocodeFunc
+	pinPage  PinPageFunc
+	opts     Options
+	slots    chan struct{}
+	mux      *http.ServeMux
+	started  time.Time
+
+	baseMu  sync.RWMutex
+	baseURL string
+
+	inFlight atomic.Int64
+	captures atomic.Int64
+	failures atomic.Int64
+}
+
+// New builds a Server. SetBaseURL must be called before Google Maps captures
+// so the browser can load the pin page from this server.
+func New(capturer Capturer, geocode GeocodeFunc, pinPage PinPageFunc, opts Options) *Server {
+	if opts.MaxConcurrent <= 0 {
+		opts.MaxConcurrent = 2
+	}
+	if opts.CaptureTimeout <= 0 {
+		opts.CaptureTimeout = 60 * time.Second
+	}
+	s := &Server{
+		capturer: capturer,
+		geocode:  geocode,
+		pinPage:  pinPage,
+		opts:     opts,
+		slots:    make(chan struct{}, opts.MaxConcurrent),
+		mux:      http.NewServeMux(),
+		started:  time.Now(),
+	}
+	s.mux.HandleFunc("/healthz", s.handleHealth)
+	s.mux.HandleFunc("/capture", s.handleCapture)
+	s.mux.HandleFunc("/pin-page", s.handlePinPage)
+	return s
+}
+
+// SetBaseURL records the URL this server is reachable at, e.g. "http://127.0.0.1:8765".
+func (s *Server) SetBaseURL(baseURL string) {
+	s.baseMu.Lock()
+	defer s.baseMu.Unlock()
+	s.baseURL = baseURL
+}
+
+func (s *Server) pinPageURL(lat, lng float64) string {
+	s.baseMu.RLock()
+	defer s.baseMu.RUnlock()
+	query := url.Values{}
+	query.Set("lat", strconv.FormatFloat(lat, 'f', -1, 64))
+	query.Set("lng", strconv.FormatFloat(lng, 'f', -1, 64))
+	return s.baseURL + "/pin-page?" + query.Encode()
+}
+
+func (s *Server) ServeHTTP(w http.ResponseWriter, r *http.Request) {
+	s.mux.ServeHTTP(w, r)
+}
+
+func (s *Server) handleHealth(w http.ResponseWriter, r *http.Request) {
+	ctx, cancel := context.WithTimeout(r.Context(), 5*time.Second)
+	defer cancel()
+
+	status, code := "ok", http.StatusOK
+	if err := s.capturer.Ping(ctx); err != nil {
+		status, code = "browser unavailable: "+err.Error(), http.StatusServiceUnavailable
+	}
+	w.Header().Set("Content-Type", "application/json")
+	w.WriteHeader(code)
+	json.NewEncoder(w).Encode(map[string]any{
+		"status":         status,
+		"in_flight":      s.inFlight.Load(),
+		"captures":       s.captures.Load(),
+		"failures":       s.failures.Load(),
+		"max_concurrent": s.opts.MaxConcurrent,
+		"uptime_s":       int(time.Since(s.started).Seconds()),
+	})
+}
+
+func (s *Server) handlePinPage(w http.ResponseWriter, r *http.Request) {
+	lat, lng, err := parseLatLng(r.URL.Query())
+	if err != nil {
+		http.Error(w, err.Error(), http.StatusBadRequest)
+		return
+	}
+	w.Header().Set("Content-Type", "text/html; charset=utf-8")
+	fmt.Fprint(w, s.pinPage(lat, lng))
+}
+
+func (s *Server) handleCapture(w http.ResponseWriter, r *http.Request) {
+	if r.Method != http.MethodGet {
+		http.Error(w, "method not allowed", http.StatusMethodNotAllowed)
+		return
+	}
+	query := r.URL.Query()
+	kind := query.Get("type")
+
+	// The capture timeout covers waiting for a free slot, too
+	ctx, cancel := context.WithTimeout(r.Context(), s.opts.CaptureTimeout)
+	defer cancel()
+
+	var capture func() ([]byte, error)
+	switch kind {
+	case "hoodmaps":
+		capture = func() ([]byte, error) { return s.capturer.Hoodmaps(ctx) }
+	case "googlemaps":
+		lat, lng, err := s.location(query)
+		if err != nil {
+			var geoErr geocodeError
+			if errors.As(err, &geoErr) {
+				http.Error(w, err.Error(), http.StatusBadGateway)
+			} else {
+				http.Error(w, err.Error(), http.StatusBadRequest)
+			}
+			return
+		}
+		w.Header().Set("X-Lat", strconv.FormatFloat(lat, 'f', -1, 64))
+		w.Header().Set("X-Lng", strconv.FormatFloat(lng, 'f', -1, 64))
+		pageURL := s.pinPageURL(lat, lng)
+		capture = func() ([]byte, error) { return s.capturer.GoogleMaps(ctx, pageURL) }
+	default:
+		http.Error(w, fmt.Sprintf("unknown capture type %q (want hoodmaps or googlemaps)", kind), http.StatusBadRequest)
+		return
+	}
+
+	select {
+	case s.slots <- struct{}{}:
+		defer func() { <-s.slots }()
+	case <-ctx.Done():
+		http.Error(w, "timed out waiting for a capture slot", http.StatusServiceUnavailable)
+		return
+	}
+
+	s.inFlight.Add(1)
+	start := time.Now()
+	buf, err := capture()
+	s.inFlight.Add(-1)
+	if err != nil {
+		s.failures.Add(1)
+		log.Printf("%s capture failed after %v: %v", kind, time.Since(start).Round(time.Millisecond), err)
+		http.Error(w, err.Error(), http.StatusBadGateway)
+		return
+	}
+	s.captures.Add(1)
+
+	w.Header().Set("Content-Type", http.DetectContentType(buf))
+	w.Header().Set("X-Capture-Ms", strconv.FormatInt(time.Since(start).Milliseconds(), 10))
+	w.Write(buf)
+}
+
+type geocodeError struct{ err error }
+
+func (e geocodeError) Error() string { return "geocoding failed: " + e.err.Error() }
+
+// location returns the lat/lng query parameters, or geocodes the address one.
+func (s *Server) location(query url.Values) (float64, float64, error) {
+	if query.Get("lat") != "" || query.Get("lng") != "" {
+		return parseLatLng(query)
+	}
+	address := query.Get("address")
+	if address == "" {
+		return 0, 0, errors.New("googlemaps captures need an address or lat and lng")
+	}
+	lat, lng, err := s.geocode(address)
+	if err != nil {
+		return 0, 0, geocodeError{err}
+	}
+	return lat, lng, nil
+}
+
+func parseLatLng(query url.Values) (float64, float64, error) {
+	lat, err := strconv.ParseFloat(query.Get("lat"), 64)
+	if err != nil {
+		return 0, 0, fmt.Errorf("invalid lat %q", query.Get("lat"))
+	}
+	lng, err := strconv.ParseFloat(query.Get("lng"), 64)
+	if err != nil {
+		return 0, 0, fmt.Errorf("invalid lng %q", query.Get("lng"))
+	}
+	return lat, lng, nil
+}
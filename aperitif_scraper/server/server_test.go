@@ -0,0 +1,229 @@
+package server
+
+import (
+	"context"
+	"errors"
+	"fmt"
+	"io"
+	"net/http"
+	"net/http/httptest"
+	"strings"
+	"sync"
+	"sync/atomic"
+	"testing"
+	"time"
+)
+
+var pngMagic = []byte("\x89PNG\r\n\x1a\n")
+
+// fakeCapturer stands in for the browser. Google Maps captures fetch the pin
+// page the way Chrome would, so the whole round trip through the server runs.
+type fakeCapturer struct {
+	delay    time.Duration
+	inFlight atomic.Int64
+	peak     atomic.Int64
+	pingErr  error
+}
+
+func (f *fakeCapturer) track() func() {
+	n := f.inFlight.Add(1)
+	for {
+		peak := f.peak.Load()
+		if n <= peak || f.peak.CompareAndSwap(peak, n) {
+			break
+		}
+	}
+	return func() { f.inFlight.Add(-1) }
+}
+
+func (f *fakeCapturer) Hoodmaps(ctx context.Context) ([]byte, error) {
+	defer f.track()()
+	select {
+	case <-time.After(f.delay):
+	case <-ctx.Done():
+		return nil, ctx.Err()
+	}
+	return append(append([]byte{}, pngMagic...), "hoodmaps"...), nil
+}
+
+func (f *fakeCapturer) GoogleMaps(ctx context.Context, pageURL string) ([]byte, error) {
+	defer f.track()()
+	req, err := http.NewRequestWithContext(ctx, http.MethodGet, pageURL, nil)
+	if err != nil {
+		return nil, err
+	}
+	resp, err := http.DefaultClient.Do(req)
+	if err != nil {
+		return nil, err
+	}
+	defer resp.Body.Close()
+	page, err := io.ReadAll(resp.Body)
+	if err != nil {
+		return nil, err
+	}
+	time.Sleep(f.delay)
+	return append(append([]byte{}, pngMagic...), page...), nil
+}
+
+func (f *fakeCapturer) Ping(ctx context.Context) error { return f.pingErr }
+
+func fakeGeocode(address string) (float64, float64, error) {
+	if address == "nowhere" {
+		return 0, 0, errors.New("ZERO_RESULTS")
+	}
+	return 37.7763, -122.4328, nil
+}
+
+func fakePinPage(lat, lng float64) string {
+	return fmt.Sprintf("<html>pin %.4f,%.4f</html>", lat, lng)
+}
+
+func newTestServer(t *testing.T, capturer *fakeCapturer, opts Options) *httptest.Server {
+	t.Helper()
+	s := New(capturer, fakeGeocode, fakePinPage, opts)
+	ts := httptest.NewServer(s)
+	s.SetBaseURL(ts.URL)
+	t.Cleanup(ts.Close)
+	return ts
+}
+
+func get(t *testing.T, url string) (*http.Response, string) {
+	t.Helper()
+	resp, err := http.Get(url)
+	if err != nil {
+		t.Fatalf("GET %s: %v", url, err)
+	}
+	defer resp.Body.Close()
+	body, err := io.ReadAll(resp.Body)
+	if err != nil {
+		t.Fatalf("reading %s: %v", url, err)
+	}
+	return resp, string(body)
+}
+
+// fetch is get for use from goroutines other than the test's own.
+func fetch(url string) (int, string, error) {
+	resp, err := http.Get(url)
+	if err != nil {
+		return 0, "", err
+	}
+	defer resp.Body.Close()
+	body, err := io.ReadAll(resp.Body)
+	return resp.StatusCode, string(body), err
+}
+
+func TestHealth(t *testing.T) {
+	capturer := &fakeCapturer{}
+	ts := newTestServer(t, capturer, Options{})
+
+	resp, body := get(t, ts.URL+"/healthz")
+	if resp.StatusCode != http.StatusOK || !strings.Contains(body, `"status":"ok"`) {
+		t.Fatalf("healthy server: got %d %s", resp.StatusCode, body)
+	}
+
+	capturer.pingErr = errors.New("browser closed")
+	resp, body = get(t, ts.URL+"/healthz")
+	if resp.StatusCode != http.StatusServiceUnavailable {
+		t.Fatalf("dead browser: got %d %s", resp.StatusCode, body)
+	}
+}
+
+func TestCaptureHoodmaps(t *testing.T) {
+	ts := newTestServer(t, &fakeCapturer{}, Options{})
+
+	resp, body := get(t, ts.URL+"/capture?type=hoodmaps")
+	if resp.StatusCode != http.StatusOK {
+		t.Fatalf("got %d %s", resp.StatusCode, body)
+	}
+	if ct := resp.Header.Get("Content-Type"); ct != "image/png" {
+		t.Errorf("Content-Type = %q, want image/png", ct)
+	}
+	if !strings.HasSuffix(body, "hoodmaps") {
+		t.Errorf("unexpected body %q", body)
+	}
+}
+
+func TestCaptureGoogleMaps(t *testing.T) {
+	capturer := &fakeCapturer{}
+	ts := newTestServer(t, capturer, Options{})
+
+	cases := []struct {
+		query string
+		pin   string
+	}{
+		{"address=208+Anza+St", "pin 37.7763,-122.4328"},
+		{"lat=37.7599&lng=-122.4148", "pin 37.7599,-122.4148"},
+	}
+	for _, c := range cases {
+		resp, body := get(t, ts.URL+"/capture?type=googlemaps&"+c.query)
+		if resp.StatusCode != http.StatusOK {
+			t.Fatalf("%s: got %d %s", c.query, resp.StatusCode, body)
+		}
+		if !strings.Contains(body, c.pin) {
+			t.Errorf("%s: capture %q does not show %q", c.query, body, c.pin)
+		}
+		if resp.Header.Get("X-Lat") == "" || resp.Header.Get("X-Capture-Ms") == "" {
+			t.Errorf("%s: missing X-Lat/X-Capture-Ms headers", c.query)
+		}
+	}
+}
+
+func TestCaptureErrors(t *testing.T) {
+	ts := newTestServer(t, &fakeCapturer{}, Options{})
+
+	cases := []struct {
+		query string
+		code  int
+	}{
+		{"type=streetview", http.StatusBadRequest},
+		{"type=googlemaps", http.StatusBadRequest},
+		{"type=googlemaps&lat=abc&lng=1", http.StatusBadRequest},
+		{"type=googlemaps&address=nowhere", http.StatusBadGateway},
+	}
+	for _, c := range cases {
+		resp, body := get(t, ts.URL+"/capture?"+c.query)
+		if resp.StatusCode != c.code {
+			t.Errorf("%s: got %d %s, want %d", c.query, resp.StatusCode, body, c.code)
+		}
+	}
+}
+
+func TestConcurrencyCap(t *testing.T) {
+	capturer := &fakeCapturer{delay: 50 * time.Millisecond}
+	ts := newTestServer(t, capturer, Options{MaxConcurrent: 2})
+
+	var wg sync.WaitGroup
+	for i := 0; i < 8; i++ {
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			code, body, err := fetch(ts.URL + "/capture?type=hoodmaps")
+			if err != nil || code != http.StatusOK {
+				t.Errorf("got %d %s (%v)", code, body, err)
+			}
+		}()
+	}
+	wg.Wait()
+
+	if peak := capturer.peak.Load(); peak > 2 {
+		t.Errorf("peak concurrent captures = %d, want <= 2", peak)
+	}
+}
+
+func TestSlotTimeout(t *testing.T) {
+	capturer := &fakeCapturer{delay: 500 * time.Millisecond}
+	ts := newTestServer(t, capturer, Options{MaxConcurrent: 1, CaptureTimeout: 100 * time.Millisecond})
+
+	codes := make(chan int, 2)
+	for i := 0; i < 2; i++ {
+		go func() {
+			code, _, _ := fetch(ts.URL + "/capture?type=hoodmaps")
+			codes <- code
+		}()
+	}
+	for i := 0; i < 2; i++ {
+		if code := <-codes; code == http.StatusOK {
+			t.Errorf("capture outliving its timeout returned 200")
+		}
+	}
+}
@@ -0,0 +1,77 @@
+"""
+Compare two benchmark result files
+
+    python -m benchmarks.compare benchmarks/results/<base>.json benchmarks/results/<head>.json
+
+Prints p50/p95/p99 of every stage, throughput and peak RSS side by side with
+the relative change. Latency and memory increases beyond ``--threshold``
+percent are flagged.
+"""
+
+import argparse
+import json
+from typing import Any, Dict, Optional
+
+
+def _change(base: Optional[float], head: Optional[float]) -> Optional[float]:
+    if base is None or head is None or base == 0:
+        return None
+    return (head - base) / base * 100
+
+
+def _row(label: str, base, head, unit: str, threshold: float, higher_is_better: bool = False) -> str:
+    def fmt(value):
+        return "-" if value is None else f"{value:.1f}{unit}"
+
+    change = _change(base, head)
+    flag = ""
+    if change is not None:
+        worse = -change if higher_is_better else change
+        flag = "  <-- regression" if worse > threshold else ""
+    pct = "" if change is None else f"{change:+.1f}%"
+    return f"   {label:<24} {fmt(base):>12} {fmt(head):>12} {pct:>9}{flag}"
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float = 10.0) -> int:
+    """Print the comparison and return the number of flagged regressions"""
+    print(f"base {base.get('commit')} ({base.get('timestamp')})  vs  head {head.get('commit')} ({head.get('timestamp')})")
+    if base.get("options") != head.get("options") or base.get("fake_services") != head.get("fake_services"):
+        print("warning: the runs used different options or fake service settings")
+
+    lines = []
+    for name in sorted(set(base["scenarios"]) | set(head["scenarios"])):
+        old, new = base["scenarios"].get(name, {}), head["scenarios"].get(name, {})
+        lines.append(f"\n{name}")
+        if "failed" in old or "failed" in new or not old or not new:
+            lines.append(f"   not comparable (base: {old.get('failed', 'ok' if old else 'missing')}, "
+                         f"head: {new.get('failed', 'ok' if new else 'missing')})")
+            continue
+        lines.append(_row("throughput", old["throughput_rps"], new["throughput_rps"], "/s", threshold, True))
+        lines.append(_row("peak RSS", old["peak_rss_mb"], new["peak_rss_mb"], "MiB", threshold))
+        for stage in sorted(set(old["stages_ms"]) | set(new["stages_ms"]), key=lambda s: (s == "total", s)):
+            for q in ("p50", "p95", "p99"):
+                lines.append(_row(
+                    f"{stage} {q}", old["stages_ms"].get(stage, {}).get(q), new["stages_ms"].get(stage, {}).get(q),
+                    "ms", threshold,
+                ))
+    print("\n".join(lines))
+    return sum("regression" in line for line in lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base", help="Result file of the baseline commit")
+    parser.add_argument("head", help="Result file of the commit under test")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent change flagged as a regression")
+    args = parser.parse_args(argv)
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    regressions = compare(base, head, args.threshold)
+    print(f"\n{regressions} regression(s) beyond {args.threshold:g}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+"""
+Accuracy, latency and cost of the vision backends on a labeled dataset
+
+    python -m benchmarks.evaluate cases.jsonl
+    python -m benchmarks.evaluate cases.jsonl --backends openai:gpt-4o,openai:gpt-4o-mini,phi4,local --rps 2
+
+The manifest is JSON Lines (or one JSON list) of labeled cases:
+
+    {"id": "alamo-square", "pin": "pins/alamo_square.png", "lat": 37.7763, "lng": -122.4328, "expected": "Rich"}
+    {"id": "mission", "address": "2000 Mission St, San Francisco, CA", "expected": "Hip"}
+    {"id": "old-capture", "pin": "pins/ucsf.png", "legend": "legends/2023.png", "expected": "Uni"}
+
+``expected`` is one of the HoodMaps categories. Relative paths are resolved
+against the manifest's directory and ``legend`` defaults to ``--legend``.
+Addresses are geocoded (needs GOOGLE_MAP_API_KEY) and cases without a ``pin``
+image get one captured, so the models are scored on the same images.
+
+Backends:
+    phi4, phi4:<model>        Phi-4 endpoint (APERITIF_PHI4_BASE_URL)
+    openai, openai:<model>    OpenAI (OPENAI_API_KEY), gpt-4o-mini unless a model is given
+    local                     Pixel lookup on the legend; needs coordinates, skips other cases
+    cascade                   CascadeClassifier: local, then Phi-4, escalating to OpenAI
+
+All backends run at the same time, each under its own request rate and
+concurrency limit, with result memoization off. Latency is timed from when a
+request is let through, so it excludes rate limiting but includes retries.
+The report (default ``benchmarks/results/eval-<commit>.json``) has, per
+backend, accuracy, a confusion matrix, latency percentiles, token counts,
+estimated cost and whether the backend is on the latency/accuracy frontier.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from agents.tracing import estimate_cost
+from agents.vision_agent import NEIGHBORHOOD_TYPES
+
+from .run import REPO_DIR, RESULTS_DIR, git_commit
+from .stats import summarize
+
+DEFAULT_LEGEND = os.path.join(REPO_DIR, "hoodmaps_screenshot.png")
+DEFAULT_BACKENDS = "phi4,openai,local"
+
+# Confusion matrix columns: the categories plus unclassified answers and errors
+LABELS = list(NEIGHBORHOOD_TYPES) + ["None"]
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """Read and validate the labeled cases of a manifest"""
+    with open(path) as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        cases = json.loads(text)
+    else:
+        cases = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    seen = set()
+    for i, case in enumerate(cases):
+        case.setdefault("id", f"case-{i + 1}")
+        if case["id"] in seen:
+            raise ValueError(f"Duplicate case id {case['id']!r}")
+        seen.add(case["id"])
+        if case.get("expected") not in NEIGHBORHOOD_TYPES:
+            raise ValueError(f"Case {case['id']!r}: expected must be one of {list(NEIGHBORHOOD_TYPES)}")
+        if not (case.get("pin") or case.get("address") or ("lat" in case and "lng" in case)):
+            raise ValueError(f"Case {case['id']!r} needs a pin image, an address or lat/lng")
+        for key in ("pin", "legend"):
+            if case.get(key):
+                case[key] = os.path.join(base_dir, case[key])
+    return cases
+
+
+def prepare_cases(cases: List[Dict[str, Any]], legend: str, api_key: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Load (or capture) the images of every case before anything is timed
+
+    Returns:
+        Cases with ``legend_png``, ``pin_png``, ``lat``/``lng`` (None when unknown)
+        and ``legend_focus`` filled in
+    """
+    from agents.local_classifier import HOODMAPS_SF_VIEW, GeoTransform
+
+    transform = GeoTransform.from_view(**HOODMAPS_SF_VIEW)
+    legends: Dict[str, bytes] = {}
+    prepared = []
+    for case in cases:
+        case = dict(case)
+        if case.get("address") and "lat" not in case:
+            if not api_key:
+                raise ValueError(f"Case {case['id']!r}: geocoding needs GOOGLE_MAP_API_KEY")
+            from agents.geocoding import get_geocoder
+
+            case["lat"], case["lng"] = get_geocoder(api_key).geocode(case["address"])
+        lat, lng = case.get("lat"), case.get("lng")
+
+        if case.get("pin"):
+            case["pin_png"] = _read(case["pin"])
+        else:
+            if not api_key:
+                raise ValueError(f"Case {case['id']!r}: capturing a pin map needs GOOGLE_MAP_API_KEY")
+            from agents.pipeline import capture_pin
+
+            print(f"Capturing pin map for {case['id']}...", flush=True)
+            case["pin_png"] = capture_pin(lat, lng, api_key)
+
+        legend_path = case.get("legend") or legend
+        if legend_path not in legends:
+            legends[legend_path] = _read(legend_path)
+        case["legend"] = legend_path
+        case["legend_png"] = legends[legend_path]
+        # Only meaningful for captures of the standard HoodMaps view
+        case["legend_focus"] = transform.to_pixel(lat, lng) if lat is not None and legend_path == legend else None
+        case["lat"], case["lng"] = lat, lng
+        prepared.append(case)
+    return prepared
+
+
+class RateLimiter:
+    """Let at most ``rate`` requests per second through, evenly spaced (no limit if rate is 0)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class VisionBackend:
+    """A Phi-4 or OpenAI model behind ``AsyncVisionAgent``"""
+
+    def __init__(self, name: str, use_openai: bool, model_name: Optional[str], options: Dict[str, Any]):
+        from agents.image_preprocessing import PreprocessOptions
+        from agents.vision_agent import AsyncVisionAgent
+
+        self.name = name
+        self.agent = AsyncVisionAgent(
+            use_openai=use_openai,
+            model_name=model_name,
+            max_concurrency=options["concurrency"],
+            request_timeout=options["timeout"],
+            preprocess=PreprocessOptions() if options["preprocess"] else None,
+            cache_results=False,
+        )
+        self.model_name = self.agent.model_name
+
+    def accepts(self, case: Dict[str, Any]) -> bool:
+        return True
+
+    def warm_up(self, cases: List[Dict[str, Any]]):
+        pass
+
+    async def classify(self, case: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.agent.analyze_images(case["legend_png"], case["pin_png"], case["legend_focus"])
+
+    async def aclose(self):
+        await self.agent.aclose()
+
+
+class LocalBackend:
+    """``LocalNeighborhoodClassifier`` on each case's legend image"""
+
+    def __init__(self, name: str):
+        from agents.local_classifier import LocalNeighborhoodClassifier
+
+        self.name = name
+        self.model_name = LocalNeighborhoodClassifier.model_name
+        self._classifiers: Dict[str, Any] = {}
+
+    def accepts(self, case: Dict[str, Any]) -> bool:
+        return case["lat"] is not None
+
+    def warm_up(self, cases: List[Dict[str, Any]]):
+        """Georeference and quantize each legend once, outside the timed requests"""
+        from agents.local_classifier import LocalNeighborhoodClassifier
+
+        for case in cases:
+            if self.accepts(case) and case["legend"] not in self._classifiers:
+                self._classifiers[case["legend"]] = LocalNeighborhoodClassifier(case["legend_png"])
+
+    def _classify(self, case: Dict[str, Any]) -> Dict[str, Any]:
+        return self._classifiers[case["legend"]].classify_point(case["lat"], case["lng"])
+
+    async def classify(self, case: Dict[str, Any]) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._classify, case)
+
+    async def aclose(self):
+        pass
+
+
+class CascadeBackend:
+    """``CascadeClassifier`` with the default tiers, one request per worker thread"""
+
+    def __init__(self, name: str, options: Dict[str, Any]):
+        from agents.cascade import CascadeClassifier, default_tiers
+        from agents.image_preprocessing import PreprocessOptions
+
+        self.name = name
+        self.classifier = CascadeClassifier(default_tiers(
+            preprocess=PreprocessOptions() if options["preprocess"] else None, cache_results=False
+        ))
+        self.model_name = self.classifier.model_name
+
+    def accepts(self, case: Dict[str, Any]) -> bool:
+        return True
+
+    def warm_up(self, cases: List[Dict[str, Any]]):
+        from agents.cascade import LocalTier
+
+        for tier in self.classifier.tiers:
+            if isinstance(tier.classify, LocalTier):
+                for case in cases:
+                    tier.classify.load(case["legend_png"])
+
+    async def classify(self, case: Dict[str, Any]) -> Dict[str, Any]:
+        return await asyncio.to_thread(
+            self.classifier.analyze_images, case["legend_png"], case["pin_png"], case["legend_focus"]
+        )
+
+    async def aclose(self):
+        pass
+
+
+def create_backend(spec: str, options: Dict[str, Any]):
+    """Backend for a ``--backends`` entry such as ``openai:gpt-4o``"""
+    kind, _, model_name = spec.partition(":")
+    if kind == "local":
+        return LocalBackend(spec)
+    if kind == "cascade":
+        return CascadeBackend(spec, options)
+    if kind in ("phi4", "openai"):
+        return VisionBackend(spec, kind == "openai", model_name or None, options)
+    raise ValueError(f"Unknown backend {spec!r} (expected phi4, openai, local, cascade; phi4/openai optionally with :<model>)")
+
+
+async def _run_case(backend, case: Dict[str, Any], limiter: RateLimiter, slots: asyncio.Semaphore) -> Dict[str, Any]:
+    record: Dict[str, Any] = {"id": case["id"], "expected": case["expected"]}
+    if not backend.accepts(case):
+        record["skipped"] = True
+        return record
+    async with slots:
+        await limiter.wait()
+        started = time.perf_counter()
+        try:
+            result = await backend.classify(case)
+        except Exception as e:
+            result = {"success": False, "neighborhood_type": None, "error": str(e)}
+        latency_ms = (time.perf_counter() - started) * 1000
+    usage = result.get("usage") or {}
+    prompt_tokens, completion_tokens = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    if "cost_usd" in result:
+        # A cascade prices each of its model calls itself
+        cost = result["cost_usd"]
+    else:
+        cost = estimate_cost(backend.model_name, prompt_tokens, completion_tokens) if usage else 0.0
+    record.update({
+        "predicted": result.get("neighborhood_type"),
+        "correct": result.get("neighborhood_type") == case["expected"],
+        "latency_ms": round(latency_ms, 1),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cost_usd": None if cost is None else round(cost, 8),
+        "error": None if result.get("success") else result.get("error"),
+    })
+    if "tier" in result:
+        record["tier"] = result["tier"]
+        record["tier_timings"] = result["tier_timings"]
+    return record
+
+
+async def evaluate(backends, cases: List[Dict[str, Any]], rps: float, concurrency: int) -> Dict[str, List[Dict[str, Any]]]:
+    """Run every backend over every case concurrently; returns the per-case records of each backend"""
+    async def run_backend(backend):
+        limiter, slots = RateLimiter(rps), asyncio.Semaphore(concurrency)
+        try:
+            return await asyncio.gather(*(_run_case(backend, case, limiter, slots) for case in cases))
+        finally:
+            await backend.aclose()
+
+    records = await asyncio.gather(*(run_backend(backend) for backend in backends))
+    return {backend.name: list(backend_records) for backend, backend_records in zip(backends, records)}
+
+
+def score(model_name: str, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Accuracy, confusion matrix, latency, tokens and cost of one backend"""
+    scored = [r for r in records if not r.get("skipped")]
+    confusion = {expected: {predicted: 0 for predicted in LABELS} for expected in NEIGHBORHOOD_TYPES}
+    for record in scored:
+        confusion[record["expected"]][record["predicted"] or "None"] += 1
+    per_category = {}
+    for category in NEIGHBORHOOD_TYPES:
+        support = sum(confusion[category].values())
+        predicted = sum(row[category] for row in confusion.values())
+        hits = confusion[category][category]
+        per_category[category] = {
+            "support": support,
+            "recall": round(hits / support, 4) if support else None,
+            "precision": round(hits / predicted, 4) if predicted else None,
+        }
+
+    prompt_tokens = sum(r["prompt_tokens"] for r in scored)
+    completion_tokens = sum(r["completion_tokens"] for r in scored)
+    costs = [r["cost_usd"] for r in scored]
+    cost = None if None in costs else sum(costs)
+    correct = sum(r["correct"] for r in scored)
+    tiers: Dict[str, int] = {}
+    for record in scored:
+        if "tier" in record:
+            tiers[record["tier"]] = tiers.get(record["tier"], 0) + 1
+    return {
+        "model": model_name,
+        "cases": len(scored),
+        "skipped": len(records) - len(scored),
+        "correct": correct,
+        "errors": sum(r["error"] is not None for r in scored),
+        "accuracy": round(correct / len(scored), 4) if scored else None,
+        "confusion": confusion,
+        "per_category": per_category,
+        # Failed requests are left out so that timeouts do not pass for slow answers
+        "latency_ms": summarize([r["latency_ms"] for r in scored if r["error"] is None]),
+        "tokens": {"prompt": prompt_tokens, "completion": completion_tokens},
+        "cost_usd": None if cost is None else round(cost, 6),
+        "cost_per_case_usd": None if cost is None or not scored else round(cost / len(scored), 8),
+        # Cascades only: how many cases each tier answered
+        "answered_by": tiers or None,
+        "records": records,
+    }
+
+
+def mark_frontier(backends: Dict[str, Dict[str, Any]]):
+    """Set ``frontier`` on backends no other backend beats on both accuracy and p50 latency"""
+    candidates = {
+        name: (result["accuracy"], result["latency_ms"]["p50"])
+        for name, result in backends.items()
+        if result["accuracy"] is not None and result["latency_ms"]["count"]
+    }
+    for name, result in backends.items():
+        if name not in candidates:
+            result["frontier"] = False
+            continue
+        accuracy, p50 = candidates[name]
+        result["frontier"] = not any(
+            other_accuracy >= accuracy and other_p50 <= p50 and (other_accuracy, other_p50) != (accuracy, p50)
+            for other, (other_accuracy, other_p50) in candidates.items() if other != name
+        )
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n{'backend':<24} {'accuracy':>9} {'errors':>7} {'p50':>9} {'p95':>9} {'tokens':>9} {'cost':>10}")
+    for name, result in report["backends"].items():
+        latency = result["latency_ms"]
+        accuracy = "-" if result["accuracy"] is None else f"{result['accuracy'] * 100:.1f}%"
+        p50 = f"{latency['p50']:.0f}ms" if latency["count"] else "-"
+        p95 = f"{latency['p95']:.0f}ms" if latency["count"] else "-"
+        tokens = result["tokens"]["prompt"] + result["tokens"]["completion"]
+        cost = "?" if result["cost_usd"] is None else f"${result['cost_usd']:.4f}"
+        marker = "  *" if result["frontier"] else ""
+        print(f"{name:<24} {accuracy:>9} {result['errors']:>7} {p50:>9} {p95:>9} {tokens:>9} {cost:>10}{marker}")
+    print("* on the latency/accuracy frontier")
+
+    for name, result in report["backends"].items():
+        print(f"\n{name} ({result['model']}), rows expected, columns predicted")
+        if result["answered_by"]:
+            print("answered by " + ", ".join(f"{tier} {n}" for tier, n in result["answered_by"].items()))
+        print(" " * 10 + "".join(f"{label:>9}" for label in LABELS))
+        for expected, row in result["confusion"].items():
+            if sum(row.values()):
+                print(f"{expected:<10}" + "".join(f"{row[label]:>9}" for label in LABELS))
+        for record in result["records"]:
+            if record.get("error"):
+                print(f"   error on {record['id']}: {record['error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate vision backends on a labeled manifest")
+    parser.add_argument("manifest", help="JSON Lines (or JSON list) of labeled cases")
+    parser.add_argument("--backends", default=DEFAULT_BACKENDS, help="Comma-separated backends, e.g. openai:gpt-4o,phi4")
+    parser.add_argument("--legend", default=DEFAULT_LEGEND, help="HoodMaps capture used for cases without one")
+    parser.add_argument("--rps", type=float, default=2.0, help="Requests started per second per backend (0: no limit)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight per backend")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds per request attempt")
+    parser.add_argument("--preprocess", action="store_true", help="Crop/downscale images before vision requests")
+    parser.add_argument("--output", help="Report file (default benchmarks/results/eval-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    options = {
+        "backends": [spec.strip() for spec in args.backends.split(",") if spec.strip()],
+        "rps": args.rps,
+        "concurrency": args.concurrency,
+        "timeout": args.timeout,
+        "preprocess": args.preprocess,
+    }
+    try:
+        cases = prepare_cases(load_manifest(args.manifest), args.legend, os.getenv("GOOGLE_MAP_API_KEY"))
+        backends = [create_backend(spec, options) for spec in options["backends"]]
+    except ValueError as e:
+        parser.error(str(e))
+
+    for backend in backends:
+        backend.warm_up(cases)
+    print(f"Evaluating {len(backends)} backend(s) on {len(cases)} case(s)...", flush=True)
+    started = time.perf_counter()
+    records = asyncio.run(evaluate(backends, cases, args.rps, args.concurrency))
+    models = {backend.name: backend.model_name for backend in backends}
+
+    commit = git_commit()
+    report: Dict[str, Any] = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "manifest": os.path.abspath(args.manifest),
+        "options": options,
+        "wall_time_s": round(time.perf_counter() - started, 2),
+        "labels": LABELS,
+        "backends": {name: score(models[name], backend_records) for name, backend_records in records.items()},
+    }
+    mark_frontier(report["backends"])
+    print_report(report)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"eval-{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {output}")
+
+
+if __name__ == "__main__":
+    main()
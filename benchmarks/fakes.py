@@ -0,0 +1,339 @@
+"""
+Local stand-ins for every external service the agents talk to
+
+One threaded HTTP server plays all of them:
+
+    POST /v1/chat/completions      OpenAI-compatible chat (GPT-4o, Phi-4, DeepSeek R1, agno models)
+    GET  /maps/api/geocode/json    Google Geocoding API
+    GET  /healthz, /capture        Go scraper daemon (see aperitif_scraper/server)
+
+Latency and token counts are configurable so a benchmark can model a fast
+or slow endpoint without a network.
+"""
+
+import hashlib
+import json
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+# San Francisco bounding box used for fake geocoding results
+SF_BOUNDS = {"south": 37.715, "north": 37.805, "west": -122.505, "east": -122.390}
+
+VISION_ANSWER = """- Pin location: Near the center of the map
+- Surrounding area analysis: Mostly green zones with some yellow blocks
+- Predominant zone color: Green
+- Neighborhood type: Rich
+- Reasoning: The blocks around the pin are predominantly green
+- Confidence: high"""
+
+VISION_JSON_ANSWER = json.dumps({
+    "neighborhood_type": "Rich",
+    "confidence": "high",
+    "rationale": "The blocks around the pin are predominantly green",
+})
+
+CHAT_ANSWER = "Based on the captures, this location is in a Rich neighborhood."
+
+
+@dataclass
+class FakeServiceConfig:
+    """Latency and size of the fake responses"""
+
+    # Time to first token of a chat completion
+    chat_latency_ms: float = 300.0
+    # Decode time per completion token
+    ms_per_token: float = 5.0
+    completion_tokens: int = 120
+    # Reported prompt tokens per image part (text parts are estimated at four characters per token)
+    tokens_per_image: int = 765
+    # Whether response_format json_schema is accepted (the Phi-4 deployment answers 400)
+    schema_support: bool = True
+    geocode_latency_ms: float = 80.0
+    capture_latency_ms: float = 1500.0
+    # Images returned by /capture
+    pin_png: bytes = b""
+    hoodmaps_png: bytes = b""
+
+
+@dataclass
+class FakeServiceStats:
+    """Requests and tokens served, per endpoint"""
+
+    chat_requests: int = 0
+    tool_call_responses: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    geocode_requests: int = 0
+    captures: Dict[str, int] = field(default_factory=dict)
+
+
+def _fake_location(address: str):
+    """Deterministic point inside SF_BOUNDS for an address"""
+    digest = hashlib.sha256(address.lower().encode()).digest()
+    fx = int.from_bytes(digest[:4], "big") / 2 ** 32
+    fy = int.from_bytes(digest[4:8], "big") / 2 ** 32
+    lat = SF_BOUNDS["south"] + fy * (SF_BOUNDS["north"] - SF_BOUNDS["south"])
+    lng = SF_BOUNDS["west"] + fx * (SF_BOUNDS["east"] - SF_BOUNDS["west"])
+    return round(lat, 6), round(lng, 6)
+
+
+def _prompt_tokens(messages: List[Dict[str, Any]], tokens_per_image: int) -> int:
+    tokens = 0
+    for message in messages:
+        content = message.get("content")
+        parts = content if isinstance(content, list) else [{"type": "text", "text": content or ""}]
+        for part in parts:
+            if part.get("type") == "image_url":
+                tokens += tokens_per_image
+            else:
+                tokens += len(part.get("text") or "") // 4 + 1
+        tokens += len(json.dumps(message.get("tool_calls") or "")) // 4 + 4
+    return tokens
+
+
+def _asks_for_json(body: Dict[str, Any]) -> bool:
+    """Whether a request wants a JSON answer, by response_format or in the prompt"""
+    if body.get("response_format"):
+        return True
+    for message in body.get("messages") or []:
+        content = message.get("content")
+        for part in content if isinstance(content, list) else []:
+            if part.get("type") == "text" and "JSON object" in (part.get("text") or ""):
+                return True
+    return False
+
+
+def _tool_arguments(tool: Dict[str, Any], address: str) -> Dict[str, Any]:
+    """Arguments a planner would pass: the address for string parameters, live captures"""
+    properties = tool["function"].get("parameters", {}).get("properties", {})
+    arguments = {}
+    for name, schema in properties.items():
+        if name == "use_test_image":
+            arguments[name] = False
+        elif schema.get("type") == "string":
+            arguments[name] = address
+    return arguments
+
+
+def plan_tool_calls(body: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Tool calls the fake model makes for a request, or None to answer in text
+
+    Mirrors the real planners: on a fresh user turn with tools available, call
+    every capture tool at once; once tool results are in, answer. Analysis
+    tools need capture handles the model does not have yet, so they are skipped.
+    """
+    tools = body.get("tools") or []
+    messages = body.get("messages") or []
+    if not tools or not messages or messages[-1].get("role") != "user":
+        return None
+    address = str(messages[-1].get("content") or "")
+    calls = []
+    for tool in tools:
+        name = tool["function"]["name"]
+        if name.startswith("analyze"):
+            continue
+        calls.append({
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(_tool_arguments(tool, address))},
+        })
+    return calls or None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "FakeServices"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload: Any, status: int = 200):
+        self._send(status, json.dumps(payload).encode())
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        config = self.server.config
+        if url.path == "/maps/api/geocode/json":
+            self.server.count("geocode_requests")
+            time.sleep(config.geocode_latency_ms / 1000)
+            lat, lng = _fake_location(query.get("address", ""))
+            self._send_json({"status": "OK", "results": [{"geometry": {"location": {"lat": lat, "lng": lng}}}]})
+        elif url.path == "/healthz":
+            self._send_json({"status": "ok", "in_flight": 0, "captures": 0, "failures": 0})
+        elif url.path == "/capture":
+            kind = query.get("type")
+            png = {"googlemaps": config.pin_png, "hoodmaps": config.hoodmaps_png}.get(kind)
+            if png is None:
+                self._send(400, f"unknown capture type {kind!r}".encode(), "text/plain")
+                return
+            with self.server.lock:
+                self.server.stats.captures[kind] = self.server.stats.captures.get(kind, 0) + 1
+            time.sleep(config.capture_latency_ms / 1000)
+            self._send(200, png, "image/png")
+        else:
+            self._send(404, b"not found", "text/plain")
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip("/") != "/v1/chat/completions":
+            self._send(404, b"not found", "text/plain")
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self._chat_completion(body)
+
+    def _chat_completion(self, body: Dict[str, Any]):
+        config = self.server.config
+        messages = body.get("messages") or []
+        tool_calls = plan_tool_calls(body)
+        has_image = any(
+            isinstance(m.get("content"), list) and any(p.get("type") == "image_url" for p in m["content"])
+            for m in messages
+        )
+        if body.get("response_format") and not config.schema_support:
+            self._send_json({"error": {"message": "response_format is not supported", "type": "invalid_request_error"}}, 400)
+            return
+        content = None if tool_calls else (VISION_ANSWER if has_image else CHAT_ANSWER)
+        completion_tokens = config.completion_tokens
+        if has_image and _asks_for_json(body):
+            # Structured answers are billed by their (short) length
+            content = VISION_JSON_ANSWER
+            completion_tokens = min(completion_tokens, len(content) // 4 + 1)
+        prompt_tokens = _prompt_tokens(messages, config.tokens_per_image)
+        with self.server.lock:
+            stats = self.server.stats
+            stats.chat_requests += 1
+            stats.tool_call_responses += 1 if tool_calls else 0
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        time.sleep(config.chat_latency_ms / 1000)
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage")
+            self._stream(completion_id, body.get("model", ""), content, tool_calls, completion_tokens,
+                         usage if include_usage else None)
+            return
+        time.sleep(completion_tokens * config.ms_per_token / 1000)
+        message: Dict[str, Any] = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        self._send_json({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", ""),
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+            }],
+            "usage": usage,
+        })
+
+    def _stream(self, completion_id, model, content, tool_calls, completion_tokens, usage=None):
+        """Server-sent events, with the content spread over the decode time"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def emit(delta, finish_reason=None, usage=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if usage:
+                chunk["usage"] = usage
+            data = f"data: {json.dumps(chunk)}\n\n".encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        if tool_calls:
+            emit({"role": "assistant", "tool_calls": [{**call, "index": i} for i, call in enumerate(tool_calls)]})
+        else:
+            words = content.split(" ")
+            delay = completion_tokens * self.server.config.ms_per_token / 1000 / max(1, len(words))
+            for i, word in enumerate(words):
+                emit({"content": word if i == 0 else " " + word})
+                time.sleep(delay)
+        emit({}, "tool_calls" if tool_calls else "stop")
+        if usage:
+            emit({}, usage=usage)
+        done = b"data: [DONE]\n\n"
+        self.wfile.write(f"{len(done):x}\r\n".encode() + done + b"\r\n0\r\n\r\n")
+        self.wfile.flush()
+
+
+class FakeServices(ThreadingHTTPServer):
+    """
+    The fake endpoints on 127.0.0.1, served from a daemon thread
+
+        with FakeServices(FakeServiceConfig(chat_latency_ms=200)) as fakes:
+            os.environ["OPENAI_BASE_URL"] = fakes.openai_url
+    """
+
+    daemon_threads = True
+
+    def __init__(self, config: Optional[FakeServiceConfig] = None, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.config = config or FakeServiceConfig()
+        self.stats = FakeServiceStats()
+        self.lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openai_url(self) -> str:
+        return f"{self.base_url}/v1"
+
+    @property
+    def geocode_url(self) -> str:
+        return f"{self.base_url}/maps/api/geocode/json"
+
+    def count(self, name: str):
+        with self.lock:
+            setattr(self.stats, name, getattr(self.stats, name) + 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return json.loads(json.dumps(asdict(self.stats)))
+
+    def start(self) -> "FakeServices":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-services", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "FakeServices":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,460 @@
+"""
+Offline end-to-end benchmarks
+
+    python -m benchmarks.run                                # every scenario, defaults
+    python -m benchmarks.run --scenarios vision,fast_path --requests 200 --concurrency 16
+    python -m benchmarks.run --chat-latency-ms 800 --output /tmp/slow-model.json
+    python -m benchmarks.compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+
+Every external service is replaced by a local stand-in (``benchmarks/fakes.py``
+for OpenAI-compatible models, geocoding and the scraper daemon,
+``benchmarks/static_pages.py`` for the map sites), so results only depend on
+this code and the configured fake latencies. Each scenario runs in a fresh
+process so its peak RSS is its own. Results are written as JSON, by default
+to ``benchmarks/results/<commit>.json``.
+
+Scenarios:
+    vision        VisionAgent.analyze_images on the recorded captures
+    fast_path     ConversationalAgent answering through analyze_address()
+    conversation  ConversationalAgent through the full tool-calling loop
+    tool_calling  tool_calling.py's agno agent and Playwright tools (needs Chromium)
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .fakes import FakeServiceConfig, FakeServices
+from .stats import peak_rss_mb, summarize
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+SCENARIOS = ["vision", "fast_path", "conversation", "tool_calling"]
+
+# Recorded captures used as the "live" screenshots
+PIN_PNG = os.path.join(REPO_DIR, "google_screenshot.png")
+HOODMAPS_PNG = os.path.join(REPO_DIR, "hoodmaps_screenshot.png")
+
+ADDRESSES = [
+    "208 Anza St, San Francisco, CA",
+    "2000 Mission St, San Francisco, CA",
+    "1 Market St, San Francisco, CA",
+    "Pier 39, San Francisco, CA",
+    "1600 Holloway Ave, San Francisco, CA",
+    "1700 Post St, San Francisco, CA",
+    "3999 24th St, San Francisco, CA",
+    "2130 Fulton St, San Francisco, CA",
+]
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _describe(error: Exception) -> str:
+    """One-line description of an error (Playwright errors carry multi-line banners)"""
+    lines = str(error).strip().splitlines()
+    return f"{type(error).__name__}: {lines[0] if lines else ''}"
+
+
+class StageTimer:
+    """
+    Per-request stage durations, collected from whichever thread serves the request
+
+    Exceptions raised inside a wrapped stage are remembered too, so a request
+    fails even when the code under test swallows the error (agno reports tool
+    failures to the model instead of raising).
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def start(self):
+        self._local.stages = {}
+        self._local.errors = []
+
+    @property
+    def errors(self) -> List[str]:
+        """Errors of the current request (the stored list, so ``wrap`` can append to it)"""
+        errors = getattr(self._local, "errors", None)
+        if errors is None:
+            # Outside a request (e.g. scenario setup) there is nothing to fail
+            errors = self._local.errors = []
+        return errors
+
+    def add(self, stage: str, ms: float):
+        stages = getattr(self._local, "stages", None)
+        if stages is not None:
+            stages[stage] = stages.get(stage, 0.0) + ms
+
+    def finish(self) -> Dict[str, float]:
+        stages, self._local.stages = self._local.stages, None
+        return stages
+
+    def wrap(self, stage: str, func: Callable) -> Callable:
+        """``func`` with its duration added to ``stage`` of the current request"""
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                self.errors.append(f"{stage}: {_describe(e)}")
+                raise
+            finally:
+                self.add(stage, (time.perf_counter() - started) * 1000)
+        return timed
+
+
+def drive(work: Callable[[int], Dict[str, float]], timer: StageTimer, requests: int, concurrency: int, warmup: int):
+    """
+    Run ``work(i)`` for ``requests`` requests on ``concurrency`` threads
+
+    Returns:
+        ``(per-request stage timings, error messages, wall seconds)``; the
+        ``warmup`` requests run first, serially, and are not counted
+    """
+    def one(i: int) -> Dict[str, float]:
+        timer.start()
+        started = time.perf_counter()
+        try:
+            extra = work(i) or {}
+            if timer.errors:
+                raise RuntimeError(timer.errors[0])
+        finally:
+            stages = timer.finish()
+        stages.update(extra)
+        stages["total"] = (time.perf_counter() - started) * 1000
+        return stages
+
+    for i in range(warmup):
+        one(i)
+
+    samples: List[Dict[str, float]] = []
+    errors: List[str] = []
+
+    def guarded(i: int):
+        try:
+            samples.append(one(warmup + i))
+        except Exception as e:
+            errors.append(_describe(e))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench") as executor:
+        list(executor.map(guarded, range(requests)))
+    return samples, errors, time.perf_counter() - started
+
+
+# ----------------------------------------------------------------------
+# Scenarios (run inside the scenario process, after the environment is set)
+# ----------------------------------------------------------------------
+
+
+def _vision_agent(options: Dict[str, Any]):
+    from agents.image_preprocessing import PreprocessOptions
+    from agents.vision_agent import VisionAgent
+
+    return VisionAgent(
+        use_openai=True,
+        preprocess=PreprocessOptions() if options["preprocess"] else None,
+        cache_results=options["result_cache"],
+    )
+
+
+def _seed_reference_map():
+    """Put the recorded HoodMaps capture in the (empty) reference cache, as a warm deployment has it"""
+    from agents.map_capture import HOODMAPS_VIEWPORT
+    from agents.reference_cache import get_reference_cache
+
+    get_reference_cache().refresh(lambda: _read(HOODMAPS_PNG), viewport=HOODMAPS_VIEWPORT)
+
+
+def scenario_vision(options: Dict[str, Any], timer: StageTimer):
+    agent = _vision_agent(options)
+    agent._prepare_images = timer.wrap("encode", agent._prepare_images)
+    agent.client.chat.completions.create = timer.wrap("model", agent.client.chat.completions.create)
+    legend, pin = _read(HOODMAPS_PNG), _read(PIN_PNG)
+
+    def work(i: int):
+        result = agent.analyze_images(legend, pin)
+        if not result.get("success"):
+            raise RuntimeError(result.get("error"))
+
+    return work
+
+
+def _conversational_agents(options: Dict[str, Any], timer: StageTimer, fast_path: bool):
+    """One agent per worker thread (an agent holds one conversation)"""
+    from agents.conversational_agent import ConversationalAgent
+
+    local = threading.local()
+
+    def agent_for_thread():
+        agent = getattr(local, "agent", None)
+        if agent is None:
+            agent = ConversationalAgent(fast_path=fast_path)
+            agent.vision_agent = _vision_agent(options)
+            agent.vision_agent.client.chat.completions.create = timer.wrap(
+                "vision", agent.vision_agent.client.chat.completions.create
+            )
+            agent.client.chat.completions.create = timer.wrap("llm", agent.client.chat.completions.create)
+            agent.execute_tool_calls = timer.wrap("tools", agent.execute_tool_calls)
+            local.agent = agent
+        agent.reset_conversation()
+        return agent
+
+    return agent_for_thread
+
+
+def scenario_fast_path(options: Dict[str, Any], timer: StageTimer):
+    _seed_reference_map()
+    agent_for_thread = _conversational_agents(options, timer, fast_path=True)
+
+    def work(i: int):
+        agent = agent_for_thread()
+        agent.chat(f"What kind of neighborhood is {ADDRESSES[i % len(ADDRESSES)]}?")
+        result = agent.last_fast_path_result
+        if not result or not result.get("success"):
+            raise RuntimeError(f"fast path failed: {result and result.get('error')}")
+        return {stage: ms for stage, ms in result["timings"].items() if stage != "total"}
+
+    return work
+
+
+def scenario_conversation(options: Dict[str, Any], timer: StageTimer):
+    _seed_reference_map()
+    agent_for_thread = _conversational_agents(options, timer, fast_path=False)
+
+    def work(i: int):
+        agent = agent_for_thread()
+        agent.chat(f"What kind of neighborhood is {ADDRESSES[i % len(ADDRESSES)]}?")
+        for message in agent.conversation_history:
+            if message["role"] == "tool" and '"success":false' in message["content"]:
+                raise RuntimeError(f"tool call failed: {message['content']}")
+
+    return work
+
+
+def scenario_tool_calling(options: Dict[str, Any], timer: StageTimer):
+    import tool_calling
+    from agents.browser_pool import get_browser_pool
+
+    from .static_pages import install_static_routes
+
+    # tool_calling configures INFO logging for its demo; keep the report readable
+    logging.getLogger().setLevel(logging.WARNING)
+
+    get_browser_pool(size=options["concurrency"], context_setup=install_static_routes)
+    tool_calling.geocode = timer.wrap("geocode", tool_calling.geocode)
+    tool_calling.capture_pin_map = timer.wrap("pin_capture", tool_calling.capture_pin_map)
+    tool_calling.hoodmaps_reference = timer.wrap("reference", tool_calling.hoodmaps_reference)
+    local = threading.local()
+
+    def work(i: int):
+        agent = getattr(local, "agent", None)
+        if agent is None:
+            agent = local.agent = tool_calling.create_agent()
+        address = ADDRESSES[i % len(ADDRESSES)]
+        response = agent.run(f"Please retrieve images of the location {address} from both tools.")
+        # agno hands tool errors to the model as the tool result; successful tools return handles
+        for message in response.messages or []:
+            if message.role == "tool" and not str(message.content).startswith("capture://"):
+                raise RuntimeError(f"tool call failed: {message.content}")
+
+    return work
+
+
+SCENARIO_SETUP = {
+    "vision": scenario_vision,
+    "fast_path": scenario_fast_path,
+    "conversation": scenario_conversation,
+    "tool_calling": scenario_tool_calling,
+}
+
+
+def run_scenario(name: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Set up and drive one scenario in the current process"""
+    from agents.http_clients import get_http_clients
+
+    timer = StageTimer()
+    setup_started = time.perf_counter()
+    work = SCENARIO_SETUP[name](options, timer)
+    setup_ms = (time.perf_counter() - setup_started) * 1000
+
+    samples, errors, wall = drive(work, timer, options["requests"], options["concurrency"], options["warmup"])
+    stages = sorted({stage for sample in samples for stage in sample}, key=lambda s: (s == "total", s))
+    return {
+        "requests": options["requests"],
+        "concurrency": options["concurrency"],
+        "succeeded": len(samples),
+        "errors": len(errors),
+        "error_samples": errors[:3],
+        "setup_ms": round(setup_ms, 1),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(samples) / wall, 3) if wall else 0.0,
+        "stages_ms": {stage: summarize(s[stage] for s in samples if stage in s) for stage in stages},
+        "peak_rss_mb": peak_rss_mb(),
+        "http_connections": get_http_clients().stats,
+    }
+
+
+def _scenario_process(name: str, options: Dict[str, Any], env: Dict[str, str], results):
+    os.environ.update(env)
+    sys.path.insert(0, REPO_DIR)
+    try:
+        results.put(run_scenario(name, options))
+    except Exception as e:
+        traceback.print_exc()
+        results.put({"failed": _describe(e), "peak_rss_mb": peak_rss_mb()})
+
+
+def service_environment(fakes: FakeServices, cache_dir: str) -> Dict[str, str]:
+    """Environment pointing every client at the fakes"""
+    return {
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": fakes.openai_url,
+        "APERITIF_CHAT_BASE_URL": fakes.openai_url,
+        "APERITIF_PHI4_BASE_URL": fakes.openai_url,
+        "TT_BASE_URL": fakes.openai_url,
+        "TT_MODEL_ID": "benchmark-model",
+        "APERITIF_GEOCODE_URL": fakes.geocode_url,
+        "GOOGLE_MAP_API_KEY": "benchmark",
+        "APERITIF_SCRAPER_URL": fakes.base_url,
+        "APERITIF_CACHE_DIR": cache_dir,
+        "APERITIF_ARTIFACT_DIR": "",
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+
+def print_report(report: Dict[str, Any]):
+    for name, result in report["scenarios"].items():
+        print(f"\n{name}")
+        if "failed" in result:
+            print(f"   failed: {result['failed']}")
+            continue
+        print(
+            f"   {result['succeeded']}/{result['requests']} ok at concurrency {result['concurrency']}, "
+            f"{result['throughput_rps']:.2f} req/s, peak RSS {result['peak_rss_mb']:.0f} MiB"
+        )
+        for stage, summary in result["stages_ms"].items():
+            if summary["count"]:
+                print(
+                    f"   {stage:<12} p50 {summary['p50']:>9.1f}ms  p95 {summary['p95']:>9.1f}ms  "
+                    f"p99 {summary['p99']:>9.1f}ms"
+                )
+        for host, http in result.get("http_connections", {}).items():
+            print(
+                f"   {host}: {http['requests']} HTTP requests over {http['connections']} connections "
+                f"({http['reuse_rate']:.0%} reused)"
+            )
+        for error in result["error_samples"]:
+            print(f"   error: {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmarks with local stand-ins for every service")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated subset of {SCENARIOS}")
+    parser.add_argument("--requests", type=int, default=50, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests run first")
+    parser.add_argument("--preprocess", action="store_true", help="Crop/downscale images before vision requests")
+    parser.add_argument("--result-cache", action="store_true", help="Keep vision result memoization on")
+    parser.add_argument("--chat-latency-ms", type=float, default=300.0, help="Fake model time to first token")
+    parser.add_argument("--ms-per-token", type=float, default=5.0, help="Fake model decode time per token")
+    parser.add_argument("--completion-tokens", type=int, default=120, help="Fake completion length")
+    parser.add_argument("--geocode-latency-ms", type=float, default=80.0, help="Fake Geocoding API latency")
+    parser.add_argument("--capture-latency-ms", type=float, default=1500.0, help="Fake scraper daemon capture time")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/<commit>.json)")
+    args = parser.parse_args(argv)
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    config = FakeServiceConfig(
+        chat_latency_ms=args.chat_latency_ms,
+        ms_per_token=args.ms_per_token,
+        completion_tokens=args.completion_tokens,
+        geocode_latency_ms=args.geocode_latency_ms,
+        capture_latency_ms=args.capture_latency_ms,
+        pin_png=_read(PIN_PNG),
+        hoodmaps_png=_read(HOODMAPS_PNG),
+    )
+    options = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "warmup": args.warmup,
+        "preprocess": args.preprocess,
+        "result_cache": args.result_cache,
+    }
+    commit = git_commit()
+    report: Dict[str, Any] = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "options": options,
+        "fake_services": {key: value for key, value in vars(config).items() if not key.endswith("_png")},
+        "scenarios": {},
+    }
+
+    context = multiprocessing.get_context("spawn")
+    with FakeServices(config) as fakes:
+        for name in scenarios:
+            print(f"Running {name} ({args.requests} requests, concurrency {args.concurrency})...", flush=True)
+            # A fresh cache root per scenario so nothing carries over between them
+            with tempfile.TemporaryDirectory(prefix=f"aperitif-bench-{name}-") as cache_dir:
+                before = fakes.snapshot()
+                results = context.Queue()
+                process = context.Process(
+                    target=_scenario_process, args=(name, options, service_environment(fakes, cache_dir), results)
+                )
+                process.start()
+                result = results.get()
+                process.join()
+                after = fakes.snapshot()
+            result["fake_services"] = {
+                key: (
+                    {k: v - before[key].get(k, 0) for k, v in value.items()}
+                    if isinstance(value, dict) else value - before[key]
+                )
+                for key, value in after.items()
+            }
+            report["scenarios"][name] = result
+
+    print_report(report)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+// Offline stand-in for the Google Maps JavaScript API: enough of google.maps
+// for generate_map_html() to show a recorded map, labelled with its center, and
+// fire "tilesloaded".
+(function () {
+  function Map(element, options) {
+    this.element = element;
+    this.options = options;
+    this.listeners = {};
+    const container = document.createElement("div");
+    container.className = "gm-style";
+    container.style.cssText = "position:relative;width:100%;height:100%;overflow:hidden";
+    const tile = document.createElement("img");
+    tile.style.cssText = "width:100%;height:100%;object-fit:cover";
+    tile.onload = () => this.trigger("tilesloaded");
+    tile.src = "http://aperitif.localhost/static/pin_map.png";
+    container.appendChild(tile);
+    // The recorded tile is the same everywhere; the printed center tells captures apart
+    const label = document.createElement("div");
+    label.className = "aperitif-center";
+    label.style.cssText = "position:absolute;top:8px;left:8px;padding:4px 8px;background:#fff;font:16px monospace";
+    label.textContent = options.center.lat.toFixed(5) + ", " + options.center.lng.toFixed(5);
+    container.appendChild(label);
+    element.appendChild(container);
+  }
+  Map.prototype.trigger = function (name) {
+    const callbacks = this.listeners[name] || [];
+    this.listeners[name] = [];
+    callbacks.forEach((callback) => callback());
+  };
+
+  function Marker(options) {
+    this.options = options;
+  }
+
+  window.google = {
+    maps: {
+      Map: Map,
+      Marker: Marker,
+      event: {
+        addListenerOnce: function (map, name, callback) {
+          (map.listeners[name] = map.listeners[name] || []).push(callback);
+        },
+      },
+    },
+  };
+})();
@@ -0,0 +1,70 @@
+"""
+Serve the map pages from local copies inside the browser pool
+
+``install_static_routes`` is a ``BrowserPool`` context setup hook: HoodMaps and
+the Google Maps JavaScript API are answered from ``benchmarks/static`` and the
+recorded screenshots, and every other outside request is aborted, so the
+Playwright capture paths run without a network.
+"""
+
+import os
+from typing import Dict
+
+from agents.map_capture import HOODMAPS_URL
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STATIC_ORIGIN = "http://aperitif.localhost/static/"
+GOOGLE_MAPS_JS_URL = "https://maps.googleapis.com/maps/api/js**"
+
+# URL suffix under STATIC_ORIGIN -> recorded capture shown by the local pages
+STATIC_IMAGES = {
+    "hoodmaps.png": os.path.join(REPO_DIR, "hoodmaps_screenshot.png"),
+    "pin_map.png": os.path.join(REPO_DIR, "google_screenshot.png"),
+}
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def load_static_assets() -> Dict[str, bytes]:
+    """Pages and images served by the routes, read once"""
+    assets = {name: _read(path) for name, path in STATIC_IMAGES.items()}
+    assets["hoodmaps.html"] = _read(os.path.join(STATIC_DIR, "hoodmaps.html"))
+    assets["google_maps_stub.js"] = _read(os.path.join(STATIC_DIR, "google_maps_stub.js"))
+    return assets
+
+
+_assets = load_static_assets()
+
+
+async def install_static_routes(context):
+    """Route the map sites of a Playwright ``BrowserContext`` to the local copies"""
+    async def offline(route):
+        # Anything not served locally would leave the machine
+        if route.request.url.startswith("http://aperitif.localhost/"):
+            await route.fallback()
+        else:
+            await route.abort()
+
+    async def hoodmaps(route):
+        await route.fulfill(status=200, content_type="text/html", body=_assets["hoodmaps.html"])
+
+    async def google_maps_js(route):
+        await route.fulfill(status=200, content_type="application/javascript", body=_assets["google_maps_stub.js"])
+
+    async def static(route):
+        name = route.request.url[len(STATIC_ORIGIN):].split("?")[0]
+        if name not in _assets:
+            await route.fulfill(status=404, body="not found")
+            return
+        await route.fulfill(status=200, content_type="image/png", body=_assets[name])
+
+    # The most recently added matching route wins, so the catch-all goes first
+    await context.route("**/*", offline)
+    await context.route(HOODMAPS_URL, hoodmaps)
+    await context.route(GOOGLE_MAPS_JS_URL, google_maps_js)
+    await context.route(f"{STATIC_ORIGIN}*", static)
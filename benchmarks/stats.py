@@ -0,0 +1,50 @@
+"""Latency statistics and process memory for the benchmark suite"""
+
+import math
+import resource
+import sys
+from typing import Dict, Iterable, List, Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Percentile with linear interpolation between closest ranks (numpy's default)
+
+    Args:
+        values: Samples, in any order
+        q: Percentile in [0, 100]
+
+    Raises:
+        ValueError: No samples or q outside [0, 100]
+    """
+    if not values:
+        raise ValueError("percentile of an empty sample")
+    if not 0 <= q <= 100:
+        raise ValueError(f"percentile must be in [0, 100], got {q}")
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: Iterable[float]) -> Dict[str, float]:
+    """Count, mean, min, max and p50/p95/p99 of latency samples in milliseconds"""
+    samples: List[float] = list(values)
+    if not samples:
+        return {"count": 0}
+    return {
+        "count": len(samples),
+        "mean": round(sum(samples) / len(samples), 2),
+        "min": round(min(samples), 2),
+        "p50": round(percentile(samples, 50), 2),
+        "p95": round(percentile(samples, 95), 2),
+        "p99": round(percentile(samples, 99), 2),
+        "max": round(max(samples), 2),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
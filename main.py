@@ -4,6 +4,7 @@ Main interface for the multi-agent San Francisco neighborhood analysis system
 """
 
 import sys
+import time
 from agents.conversational_agent import ConversationalAgent
 
 def main():
@@ -12,16 +13,21 @@ def main():
             test_conversation()
         elif sys.argv[1] == "--vision":
             test_vision()
+        elif sys.argv[1] == "--batch":
+            from agents.batch import main as batch_main
+            batch_main(sys.argv[2:])
         else:
-            print("Usage: python main.py [--conversation|--vision]")
+            print("Usage: python main.py [--conversation|--vision|--batch input.csv]")
             print("  --conversation: Test DeepSeek R1 conversational agent")
             print("  --vision: Test GPT-4o vision analysis with SF images")
+            print("  --batch: Classify a CSV of addresses, streaming JSONL results")
     else:
         interactive_mode()
 
 def test_conversation():
     print("Testing DeepSeek R1 conversational agent...")
     
+    agent = None
     try:
         agent = ConversationalAgent(demo_mode=True)
         test_prompt = "Can you analyze what type of neighborhood the Mission District is in San Francisco?"
@@ -32,6 +38,9 @@ def test_conversation():
         
     except Exception as e:
         print(f"Error: {e}")
+    finally:
+        if agent is not None:
+            agent.close()
 
 def test_vision():
     print("Testing GPT-4o vision analysis with SF test images...")
@@ -50,7 +59,7 @@ def test_vision():
         
         if result['success']:
             print(f"Neighborhood type: {result.get('neighborhood_type', 'Unknown')}")
-            print(f"Analysis: {result.get('raw_analysis', 'No analysis')}")
+            print(f"Analysis: {result.get('rationale') or result.get('raw_analysis', 'No analysis')}")
         else:
             print(f"Vision analysis failed: {result.get('error', 'Unknown error')}")
             
@@ -59,8 +68,9 @@ def test_vision():
 
 def interactive_mode():
     print("SF Neighborhood Analysis System")
-    print("Usage: python main.py [--conversation|--vision]")
+    print("Usage: python main.py [--conversation|--vision|--batch input.csv]")
     
+    agent = None
     try:
         agent = ConversationalAgent()
         print("Interactive mode (type 'quit' to exit)")
@@ -74,13 +84,27 @@ def interactive_mode():
             if not user_input:
                 continue
             
-            response = agent.chat(user_input)
-            print(f"Agent: {response}")
+            # Print the answer as it streams in
+            print("Agent: ", end="", flush=True)
+            started = time.perf_counter()
+            first_token = None
+            for delta in agent.chat_stream(user_input):
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                print(delta, end="", flush=True)
+            total = time.perf_counter() - started
+            ttft = f"{first_token:.2f}s" if first_token is not None else "n/a"
+            prompt_tokens = agent.conversation_history.prompt_tokens
+            prompt = f", prompt: ~{prompt_tokens[-1]['estimated']} tokens" if prompt_tokens else ""
+            print(f"\n[time to first token: {ttft}, total: {total:.2f}s{prompt}]")
             
     except KeyboardInterrupt:
         pass
     except Exception as e:
         print(f"Error: {e}")
+    finally:
+        if agent is not None:
+            agent.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Test the offline benchmark harness itself: stage errors the code under test swallows still fail the request
+"""
+
+import argparse
+
+from benchmarks.run import StageTimer, drive
+
+
+def test_swallowed_stage_error_fails_request():
+    """A wrapped stage that raises fails its request even if the caller catches the error"""
+    print("=" * 80)
+    print("🧪 Swallowed stage errors count as failed requests")
+    print("=" * 80)
+
+    timer = StageTimer()
+
+    def flaky_tool(i):
+        if i % 2:
+            raise RuntimeError(f"tool failed on request {i}")
+        return "capture://ok"
+
+    tool = timer.wrap("tool", flaky_tool)
+
+    def work(i):
+        # Like agno, report the tool failure instead of raising it
+        try:
+            tool(i)
+        except RuntimeError:
+            pass
+
+    samples, errors, _ = drive(work, timer, requests=6, concurrency=2, warmup=0)
+    passed = len(samples) == 3 and len(errors) == 3 and all("tool:" in error for error in errors)
+    print(f"   {'✅' if passed else '❌'} {len(samples)} succeeded, {len(errors)} failed: {errors[:1]}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="🧪 Check the offline benchmark harness"
+    )
+    parser.parse_args()
+
+    passed = test_swallowed_stage_error_fails_request()
+    print(f"\n{'✅ PASS' if passed else '❌ FAIL'}")
+    raise SystemExit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
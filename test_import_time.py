@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test that the CLI and agent modules import quickly
+
+Each entry point is imported in a fresh interpreter under ``python -X importtime``;
+the check fails when its cumulative import time exceeds the budget or when it
+pulls in one of the heavy SDKs, which must only load when first used.
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+# Milliseconds allowed for each import, about 3x what it takes today. Before
+# the SDKs were deferred, main took ~1.5s and tool_calling ~1.8s.
+IMPORT_BUDGETS_MS = {
+    "main": 150,
+    "tool_calling": 150,
+    "agents.conversational_agent": 150,
+    "agents.vision_agent": 200,
+    "agents.pipeline": 100,
+    "agents.cascade": 100,
+    "agents.batch": 200,
+}
+
+# Imported only by the code paths that need them (first request, first capture, --metrics)
+HEAVY_MODULES = ["openai", "httpx", "agno", "playwright", "numpy", "PIL", "requests", "http.server"]
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+_LOADED_HEAVY = f"""
+import sys
+import {{module}}
+print(",".join(name for name in {HEAVY_MODULES!r} if name in sys.modules))
+"""
+
+_DEMO_AGENT = f"""
+import sys
+from agents.conversational_agent import ConversationalAgent
+ConversationalAgent(demo_mode=True)
+print(",".join(name for name in {HEAVY_MODULES!r} if name in sys.modules))
+"""
+
+
+def _python(code, *flags, env=None):
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+    )
+
+
+def import_time_ms(module):
+    """Cumulative import time of ``module`` in a fresh interpreter, in milliseconds"""
+    result = _python(f"import {module}", "-X", "importtime")
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip()}")
+    for line in reversed(result.stderr.splitlines()):
+        match = _IMPORTTIME_LINE.match(line)
+        if match and match.group(2) == module:
+            return int(match.group(1)) / 1000
+    raise RuntimeError(f"No importtime entry for {module}")
+
+
+def heavy_modules_loaded(code, env=None):
+    """HEAVY_MODULES imported by running ``code`` (which prints them) in a fresh interpreter"""
+    result = _python(code, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    loaded = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ""
+    return [name for name in loaded.split(",") if name]
+
+
+def test_import_budgets(runs, scale):
+    """Best-of-``runs`` import time of every entry point against its (scaled) budget"""
+    print("=" * 80)
+    print(f"⏱️  Import times (best of {runs}, budget x{scale:g})")
+    print("=" * 80)
+
+    passed = True
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        best = min(import_time_ms(module) for _ in range(runs))
+        loaded = heavy_modules_loaded(_LOADED_HEAVY.format(module=module))
+        ok = best <= budget * scale and not loaded
+        passed &= ok
+        heavy = f" - imports {', '.join(loaded)}" if loaded else ""
+        print(f"   {'✅' if ok else '❌'} {module:<30} {best:7.1f}ms (budget {budget * scale:.0f}ms){heavy}")
+    return passed
+
+
+def test_demo_agent_is_lazy():
+    """Building an agent needs neither OPENAI_API_KEY nor the OpenAI SDK (both wait for the first request)"""
+    print("\n🤖 ConversationalAgent(demo_mode=True) without OPENAI_API_KEY")
+    env = {key: value for key, value in os.environ.items() if key != "OPENAI_API_KEY"}
+    try:
+        loaded = heavy_modules_loaded(_DEMO_AGENT, env=env)
+    except RuntimeError as e:
+        print(f"   ❌ Failed: {str(e).splitlines()[-1]}")
+        return False
+    if loaded:
+        print(f"   ❌ Imported {', '.join(loaded)}")
+        return False
+    print("   ✅ Constructed without importing any SDK")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="⏱️ Check that CLI startup does not import the heavy SDKs"
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Imports per module; the fastest counts")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiply every budget (e.g. 2 on a slow CI machine)")
+    args = parser.parse_args()
+
+    passed = test_import_budgets(args.runs, args.scale)
+    passed &= test_demo_agent_is_lazy()
+    print(f"\n{'✅ PASS' if passed else '❌ FAIL'}")
+    raise SystemExit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,17 +5,24 @@ Test vision agents' ability to map pins between uncolored and colored maps
 
 import os
 import argparse
+from agents.image_preprocessing import PreprocessOptions
 from agents.vision_agent import VisionAgent
 
 def display_result(result, test_name):
     """Display analysis results in a clean, presentation-ready format"""
     print(f"\n🤖 Model: {result['model_used']}")
     print(f"🔍 Method: {result.get('method', 'two-image-comparison')}")
+    if result.get('cached'):
+        print("💾 Cached: memoized result, no model call")
     print(f"✨ Success: {'✅ Yes' if result['success'] else '❌ No'}")
     
     if result['success']:
         print(f"\n📊 ANALYSIS RESULTS:")
         print(f"{result['raw_analysis']}")
+        if result.get('confidence') is not None:
+            print(f"   Confidence: {result['confidence']:.1f}")
+        if result.get('usage'):
+            print(f"🪙 Tokens: {result['usage']['prompt_tokens']:,} prompt, {result['usage']['completion_tokens']:,} completion")
         
         if result['neighborhood_type']:
             print(f"\n🎯 FINAL CLASSIFICATION:")
@@ -30,14 +37,14 @@ def display_result(result, test_name):
     
     print()
 
-def test_phi4_pin_mapping():
+def test_phi4_pin_mapping(cache_results=True, output_format=None):
     """Test Phi-4's ability to map pins between images"""
     print("=" * 80)
     print("🚀 Testing Phi-4 Vision Model - Pin Mapping")
     print("=" * 80)
     
     # Initialize Phi-4 agent
-    phi4_agent = VisionAgent(use_openai=False)
+    phi4_agent = VisionAgent(use_openai=False, cache_results=cache_results, output_format=output_format)
     
     print("\n🗺️  PHI-4 TEST: San Francisco Map Analysis")
     print("Pin location: Painted Ladies area")
@@ -50,14 +57,14 @@ def test_phi4_pin_mapping():
     print(f"🎨 Reference map: {colored_map_path}")
     
     if os.path.exists(pin_map_path) and os.path.exists(colored_map_path):
-        result = phi4_agent.analyze_with_reference(pin_map_path, colored_map_path)
+        result = phi4_agent.analyze_with_reference(colored_map_path, pin_map_path)
         display_result(result, "Phi-4 SF Analysis")
     else:
         print("❌ Required test images not found")
     
     print("\n" + "=" * 50)
 
-def test_openai_pin_mapping():
+def test_openai_pin_mapping(cache_results=True, output_format=None):
     """Test OpenAI's ability to map pins between uncolored and colored maps"""
     print("\n\n" + "=" * 80)
     print("🤖 Testing OpenAI GPT-4 Vision Model - Pin Mapping")
@@ -71,7 +78,7 @@ def test_openai_pin_mapping():
         return
     
     # Initialize OpenAI agent
-    openai_agent = VisionAgent(use_openai=True)
+    openai_agent = VisionAgent(use_openai=True, cache_results=cache_results, output_format=output_format)
     
     # Test 1: SF Map with Painted Ladies Pin
     print("\n🗺️  TEST 1: San Francisco Map Analysis")
@@ -85,7 +92,7 @@ def test_openai_pin_mapping():
     print(f"🎨 Reference map: {colored_map_path}")
     
     if os.path.exists(pin_map_path) and os.path.exists(colored_map_path):
-        result = openai_agent.analyze_with_reference(pin_map_path, colored_map_path)
+        result = openai_agent.analyze_with_reference(colored_map_path, pin_map_path)
         display_result(result, "SF Painted Ladies")
     else:
         print("❌ Required images not found")
@@ -111,6 +118,47 @@ def test_openai_pin_mapping():
     
 
 
+def test_preprocessing_accuracy(use_openai=True):
+    """Check that pre-processed images give the same answer as the raw PNGs"""
+    print("\n\n" + "=" * 80)
+    print("🗜️  Testing Image Pre-processing - Accuracy vs. Unprocessed")
+    print("=" * 80)
+    
+    if use_openai and not os.environ.get("OPENAI_API_KEY"):
+        print("\n❌ OPENAI_API_KEY environment variable not set")
+        return
+    
+    pin_map_path = "test_images/sf_map_with_pin.png"
+    colored_map_path = "test_images/sf_map_original.png"
+    if not (os.path.exists(pin_map_path) and os.path.exists(colored_map_path)):
+        print("❌ Required images not found")
+        return
+    
+    # Memoized answers would make the comparison meaningless
+    raw_agent = VisionAgent(use_openai=use_openai, cache_results=False)
+    processed_agent = VisionAgent(use_openai=use_openai, preprocess=PreprocessOptions(), cache_results=False)
+    
+    raw = raw_agent.analyze_with_reference(colored_map_path, pin_map_path)
+    processed = processed_agent.analyze_with_reference(colored_map_path, pin_map_path)
+    display_result(processed, "Pre-processed SF Analysis")
+    
+    if processed.get("preprocessing"):
+        savings = processed["preprocessing"]
+        print(f"📦 Bytes saved: {savings['bytes_saved']:,}")
+        print(f"🪙 Estimated image tokens saved: {savings['tokens_saved']:,}")
+        for name in ("legend", "pin"):
+            image = savings[name]
+            print(f"   {name}: {image['original_size']} -> {image['processed_size']} "
+                  f"({image['original_bytes']:,} -> {image['processed_bytes']:,} bytes, detail={image['detail']})")
+    
+    print(f"\n🎯 Unprocessed: {raw['neighborhood_type']} | Pre-processed: {processed['neighborhood_type']}")
+    if raw["success"] and processed["success"]:
+        agree = raw["neighborhood_type"] == processed["neighborhood_type"]
+        print(f"   Accuracy check: {'✅ same classification' if agree else '❌ classifications differ'}")
+    
+    print("\n" + "=" * 50)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="🗺️  Test vision models' ability to map pins between colored and uncolored maps"
@@ -125,6 +173,21 @@ def main():
         action="store_true",
         help="Only run Phi-4 model tests"
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Call the models even when a memoized result exists"
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=["text", "json", "json_schema"],
+        help="Answer format (default: json_schema for OpenAI, json for Phi-4; text is the prose prompt)"
+    )
+    parser.add_argument(
+        "--preprocess-check",
+        action="store_true",
+        help="Compare pre-processed and unprocessed images on the same pair"
+    )
     
     args = parser.parse_args()
     
@@ -134,14 +197,18 @@ def main():
     print()
     
     # Run tests based on arguments
+    cache_results = not args.no_cache
     if args.only_phi:
-        test_phi4_pin_mapping()
+        test_phi4_pin_mapping(cache_results, args.output_format)
     elif args.skip_phi:
-        test_openai_pin_mapping()
+        test_openai_pin_mapping(cache_results, args.output_format)
     else:
         # Run both by default
-        test_phi4_pin_mapping()
-        test_openai_pin_mapping()
+        test_phi4_pin_mapping(cache_results, args.output_format)
+        test_openai_pin_mapping(cache_results, args.output_format)
+    
+    if args.preprocess_check:
+        test_preprocessing_accuracy(use_openai=not args.only_phi)
     
     if not args.only_phi:
         print("\n\n" + "=" * 80)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test that many Google Maps pin captures can render at the same time
+
+By default the pool is routed to the offline stand-ins of
+``benchmarks/static_pages.py`` (a Maps API stub that prints the map center), so
+the test needs Chromium but no API key or network. ``--live`` renders real
+Google Maps instead (requires GOOGLE_MAP_API_KEY).
+"""
+
+import os
+import time
+import errno
+import socket
+import asyncio
+import argparse
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.browser_pool import get_browser_pool
+from agents.map_capture import capture_pin_map, capture_pin_map_async
+
+# The pin page used to be served from a local HTTP server on this port
+LEGACY_PIN_PORT = 8080
+
+# Spread across the city so every capture is centered somewhere different
+SF_POINTS = [
+    (37.7763, -122.4328),  # Alamo Square
+    (37.7599, -122.4148),  # Mission
+    (37.7946, -122.3999),  # Financial District
+    (37.8080, -122.4177),  # Fisherman's Wharf
+    (37.7295, -122.4760),  # SF State
+    (37.7694, -122.4862),  # Golden Gate Park
+    (37.7850, -122.4294),  # Japantown
+    (37.7510, -122.4476),  # Twin Peaks
+]
+
+
+def hold_port(port):
+    """
+    Bind ``port`` for the duration of the test, or return None if something else has it
+
+    While it is held, a capture that tried to serve the pin page from a local
+    server on this port would fail with "address in use".
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.bind(("0.0.0.0", port))
+        sock.listen(1)
+    except OSError as e:
+        sock.close()
+        if e.errno != errno.EADDRINUSE:
+            raise
+        return None
+    return sock
+
+
+def capture_concurrently(points, api_key):
+    """Capture the first half of ``points`` from threads and the rest with capture_pin_map_async"""
+    half = len(points) // 2
+
+    def capture(point):
+        started = time.perf_counter()
+        png = capture_pin_map(point[0], point[1], api_key)
+        return png, time.perf_counter() - started
+
+    async def capture_async(point):
+        started = time.perf_counter()
+        png = await capture_pin_map_async(point[0], point[1], api_key)
+        return png, time.perf_counter() - started
+
+    async def capture_all_async():
+        return await asyncio.gather(*(capture_async(point) for point in points[half:]))
+
+    with ThreadPoolExecutor(max_workers=half + 1) as executor:
+        async_results = executor.submit(asyncio.run, capture_all_async())
+        results = list(executor.map(capture, points[:half]))
+        results.extend(async_results.result())
+    return results
+
+
+def test_concurrent_pin_captures(api_key, count, pool_size, offline):
+    """Render ``count`` pin maps at once and check each one is a distinct PNG of its own point"""
+    print("=" * 80)
+    print(f"📍 Rendering {count} pin maps concurrently (pool size {pool_size}, {'offline' if offline else 'live'})")
+    print("=" * 80)
+
+    pool = get_browser_pool()
+    points = [SF_POINTS[i % len(SF_POINTS)] for i in range(count)]
+    # Nudge repeated points so every capture should differ
+    points = [(lat + (i // len(SF_POINTS)) * 0.002, lng) for i, (lat, lng) in enumerate(points)]
+
+    port = hold_port(LEGACY_PIN_PORT)
+    if port is None:
+        print(f"⚠️  Port {LEGACY_PIN_PORT} is already in use, not checking that captures leave it alone")
+    try:
+        started = time.perf_counter()
+        results = capture_concurrently(points, api_key)
+        elapsed = time.perf_counter() - started
+    finally:
+        if port is not None:
+            port.close()
+
+    # Offline pages are deterministic, so a concurrent capture must match a serial one of the same point
+    expected = [hashlib.sha256(capture_pin_map(lat, lng, api_key)).hexdigest() for lat, lng in points] if offline else None
+
+    failures = 0
+    digests = set()
+    for i, ((lat, lng), (png, seconds)) in enumerate(zip(points, results)):
+        digest = hashlib.sha256(png).hexdigest()
+        ok = png.startswith(b"\x89PNG") and (expected is None or digest == expected[i])
+        failures += not ok
+        digests.add(digest)
+        print(f"   {'✅' if ok else '❌'} ({lat:.4f}, {lng:.4f}) {len(png):,} bytes in {seconds:.2f}s")
+
+    serial_estimate = sum(seconds for _, seconds in results)
+    print(f"\n⏱️  Wall time: {elapsed:.2f}s (sum of capture times {serial_estimate:.2f}s)")
+    print(f"🖼️  Distinct images: {len(digests)}/{count}")
+    if port is not None:
+        print(f"🔌 Port {LEGACY_PIN_PORT} held by the test throughout: no capture needed it")
+    print(f"🧰 Pool stats: {pool.stats}")
+
+    passed = failures == 0 and len(digests) == count
+    print(f"\n{'✅ PASS' if passed else '❌ FAIL'}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="📍 Render many Google Maps pin pages at the same time"
+    )
+    parser.add_argument("--count", type=int, default=8, help="Number of concurrent captures")
+    parser.add_argument("--pool-size", type=int, default=4, help="Pooled browser contexts")
+    parser.add_argument("--live", action="store_true",
+                        help="Render real Google Maps (requires GOOGLE_MAP_API_KEY) instead of the offline stub")
+    args = parser.parse_args()
+
+    if args.live:
+        api_key = os.environ.get("GOOGLE_MAP_API_KEY")
+        if not api_key:
+            print("❌ GOOGLE_MAP_API_KEY environment variable not set")
+            return
+        get_browser_pool(size=args.pool_size)
+    else:
+        from benchmarks.static_pages import install_static_routes
+
+        api_key = "offline"
+        get_browser_pool(size=args.pool_size, context_setup=install_static_routes)
+
+    try:
+        passed = test_concurrent_pin_captures(api_key, args.count, args.pool_size, offline=not args.live)
+    finally:
+        get_browser_pool().shutdown()
+    raise SystemExit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()